@@ -0,0 +1,161 @@
+import sc2
+from sc2.game_data import GameData
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.upgrade_id import UpgradeId
+from sc2.unit import Unit
+from unit_lookup import UnitLookup
+from typing import Dict, Optional, Tuple
+
+
+# Koszt energii zdolności.
+ENERGY_COSTS: Dict[AbilityId, float] = {
+    AbilityId.EFFECT_CHRONOBOOSTENERGYCOST: 50.,
+}
+
+# Czas odnowienia zdolności w sekundach (na szybkim tempie gry).
+COOLDOWNS: Dict[AbilityId, float] = {
+    AbilityId.EFFECT_BLINK_STALKER: 7.,
+}
+
+# Ulepszenia odkrywane przez zdolności badań.
+RESEARCH_UPGRADES: Dict[AbilityId, UpgradeId] = {
+    AbilityId.RESEARCH_BLINK: UpgradeId.BLINKTECH,
+}
+
+
+class AbilityModel:
+    """
+    Lokalny model dostępności zdolności, zastępujący zapytania *BotAI.can_cast()* (każde z nich to osobne zapytanie
+    do gry o dostępne zdolności jednostki). Dla zdolności opisanych w tablicach modułu odpowiedź udzielana jest na
+    podstawie obserwacji:
+
+    - zdolności wymagające energii – na podstawie energii jednostki, pomniejszonej o koszt zdolności użytej przez bota,
+      dopóki spadek energii nie pojawi się w obserwacji (lub nie upłynie *confirm_time* sekund – wtedy rozkaz uznaje
+      się za nieudany),
+    - zdolności z czasem odnowienia – na podstawie czasu ostatniego użycia zdolności przez bota,
+    - badania – na podstawie ulepszeń już odkrytych lub odkrywanych.
+
+    Pozostałe zdolności, dla których model nie zna odpowiedzi, sprawdzane są zapytaniem do gry.
+
+    Model przechowuje także tablicę czasów trwania zdolności (szkolenia jednostek, budowy oraz badań) w klatkach gry,
+    budowaną raz na podstawie danych gry. Metoda *AbilityData.cost* przegląda przy każdym wywołaniu wszystkie rodzaje
+    jednostek i ulepszeń.
+    """
+    def __init__(self, bot: sc2.BotAI, unit_lookup: UnitLookup, energy_regeneration: float = 0.7875,
+                 confirm_time: float = 1.):
+        self.bot:                   sc2.BotAI                                       = bot
+        self.unit_lookup:           UnitLookup                                      = unit_lookup
+        self.energy_regeneration:   float                                           = energy_regeneration
+        self.confirm_time:          float                                           = confirm_time
+
+        # Zdolności wymagające energii użyte przez bota, których efektu nie widać jeszcze w obserwacji: kluczem jest
+        # tag jednostki, wartością trójka (energia przed użyciem, koszt, czas użycia).
+        self.pending:               Dict[int, Tuple[float, float, float]]           = {}
+
+        # Czasy, od których zdolności jednostek będą ponownie dostępne.
+        self.ready_times:           Dict[int, Dict[AbilityId, float]]               = {}
+        self.durations:             Optional[Dict[AbilityId, float]]                = None
+
+        # Statystyki: liczba odpowiedzi udzielonych przez model oraz liczba zapytań do gry.
+        self.local_answers:         int                                             = 0
+        self.queries:               int                                             = 0
+
+    @staticmethod
+    def duration_table(game_data: GameData) -> Dict[AbilityId, float]:
+        """
+        Buduje tablicę czasów trwania (w klatkach gry) zdolności tworzących jednostki, budynki oraz ulepszenia.
+        """
+        durations: Dict[AbilityId, float] = {}
+        for unit_data in game_data.units.values():
+            ability = unit_data.creation_ability
+            if ability is not None and unit_data.cost.time:
+                durations.setdefault(ability.id, unit_data.cost.time)
+        for upgrade_data in game_data.upgrades.values():
+            ability = upgrade_data.research_ability
+            if ability is not None and upgrade_data.cost.time:
+                durations.setdefault(ability.id, upgrade_data.cost.time)
+        return durations
+
+    def duration(self, ability_id: AbilityId) -> Optional[float]:
+        """
+        Zwraca czas trwania zdolności *ability_id* w klatkach gry lub None, jeśli nie jest znany.
+        """
+        if self.durations is None:
+            self.durations = self.duration_table(self.bot.game_data)
+        return self.durations.get(ability_id)
+
+    def observe(self, time: float):
+        """
+        Usuwa rezerwacje energii, których efekt widać już w obserwacji lub które wygasły. Metoda powinna być
+        wywoływana raz na każde wywołanie metody *on_step()* bota, po przebudowaniu słowników tagów.
+        """
+        for tag, (energy, cost, cast_time) in list(self.pending.items()):
+            unit = self.unit_lookup.friendly(tag)
+            if unit is None or unit.energy <= energy - cost / 2 or time - cast_time > self.confirm_time:
+                del self.pending[tag]
+
+    def energy(self, unit: Unit) -> float:
+        """
+        Zwraca energię jednostki dostępną dla kolejnych zdolności (z uwzględnieniem zdolności użytych przez bota,
+        których efektu nie widać jeszcze w obserwacji).
+        """
+        pending = self.pending.get(unit.tag)
+        return unit.energy - pending[1] if pending is not None else unit.energy
+
+    def time_until_ready(self, unit: Unit, ability_id: AbilityId) -> float:
+        """
+        Zwraca przewidywany czas (w sekundach), po którym jednostka będzie mogła użyć zdolności *ability_id*, biorąc pod
+        uwagę regenerację energii oraz czas odnowienia zdolności.
+        """
+        remaining = self.ready_times.get(unit.tag, {}).get(ability_id, 0.) - self.bot.time
+        cost = ENERGY_COSTS.get(ability_id)
+        if cost is not None:
+            remaining = max(remaining, (cost - self.energy(unit)) / self.energy_regeneration)
+        return max(0., remaining)
+
+    def ready(self, unit: Unit, ability_id: AbilityId) -> Optional[bool]:
+        """
+        Sprawdza na podstawie modelu, czy jednostka *unit* może użyć zdolności *ability_id*.
+
+        Returns
+        -------
+        out : Optional[bool]
+            wynik sprawdzenia lub None, jeśli model nie zna zdolności.
+        """
+        upgrade = RESEARCH_UPGRADES.get(ability_id)
+        if upgrade is not None:
+            return upgrade not in self.bot.state.upgrades and self.bot.already_pending_upgrade(upgrade) == 0
+        if ability_id in ENERGY_COSTS or ability_id in COOLDOWNS:
+            return self.time_until_ready(unit, ability_id) <= 0.
+        return None
+
+    async def can_cast(self, unit: Unit, ability_id: AbilityId, **kwargs) -> bool:
+        """
+        Sprawdza, czy jednostka *unit* może użyć zdolności *ability_id*. Zapytanie do gry (*BotAI.can_cast()*, któremu
+        przekazywane są argumenty *kwargs*) wysyłane jest tylko wtedy, gdy model nie zna zdolności.
+        """
+        ready = self.ready(unit, ability_id)
+        if ready is not None:
+            self.local_answers += 1
+            return ready
+        self.queries += 1
+        return await self.bot.can_cast(unit, ability_id, **kwargs)
+
+    def note_cast(self, unit: Unit, ability_id: AbilityId):
+        """
+        Zapamiętuje użycie zdolności *ability_id* przez jednostkę *unit* w obecnej klatce gry.
+        """
+        time = self.bot.time
+        cost = ENERGY_COSTS.get(ability_id)
+        if cost is not None:
+            self.pending[unit.tag] = (unit.energy, cost, time)
+        cooldown = COOLDOWNS.get(ability_id)
+        if cooldown is not None:
+            self.ready_times.setdefault(unit.tag, {})[ability_id] = time + cooldown
+
+    def remove(self, tag: int):
+        """
+        Usuwa dane jednostki o tagu *tag* (np. po jej zniszczeniu).
+        """
+        self.pending.pop(tag, None)
+        self.ready_times.pop(tag, None)
@@ -1,47 +1,210 @@
 import sc2
 from sc2.position import Point2
 from sc2.units import Units
-from typing import List, Callable
+from typing import Dict, Iterable, Iterator, List, Callable, Optional
 import py_trees
 from py_trees.composites import Sequence, Selector
 from py_trees.idioms import eternal_guard
 from py_trees.behaviour import Behaviour
 from unit_ai_data import UnitAiOrderType, UnitAiOrder, UnitAiController
+from perception import PerceptionCache
+from unit_lookup import UnitLookup
+from profiling import NodeProfiler
+from bt_compiler import CompiledBehaviour, compile_tree
+from strength_ledger import EnemyStrengthLedger
+from expansions import ExpansionTable
+from combat_prediction import CombatPrediction, UnitProfiles, predict_combat
 import numpy as np
-import random
+
+
+class ArmyUnits:
+    """
+    Zbiór tagów jednostek należących do armii. Sprawdzenie przynależności, dodanie oraz usunięcie jednostki odbywają
+    się w czasie O(1), a kolejność iteracji odpowiada kolejności dołączania jednostek do armii. Każda zmiana składu
+    armii zgłaszana jest funkcji *on_change*, dzięki czemu dane zależne od składu armii (np. jej środek) mogą zostać
+    unieważnione.
+    """
+    def __init__(self, on_change: Callable[[], None]):
+        self.tags:      Dict[int, None]     = {}
+        self.on_change: Callable[[], None]  = on_change
+
+    def add(self, tag: int) -> bool:
+        """
+        Dodaje jednostkę o tagu *tag* do armii.
+
+        Parameters
+        ----------
+        tag : int
+            tag dodawanej jednostki.
+
+        Returns
+        -------
+        out : bool
+            True, jeśli jednostka nie należała wcześniej do armii.
+        """
+        if tag in self.tags:
+            return False
+        self.tags[tag] = None
+        self.on_change()
+        return True
+
+    def discard(self, tag: int) -> bool:
+        """
+        Usuwa jednostkę o tagu *tag* z armii, jeśli do niej należy.
+
+        Parameters
+        ----------
+        tag : int
+            tag usuwanej jednostki.
+
+        Returns
+        -------
+        out : bool
+            True, jeśli jednostka należała do armii.
+        """
+        if tag not in self.tags:
+            return False
+        del self.tags[tag]
+        self.on_change()
+        return True
+
+    def assign(self, tags: Iterable[int]):
+        """
+        Zastępuje skład armii jednostkami o podanych tagach. Zmiana zgłaszana jest tylko wtedy, gdy zbiór jednostek
+        armii faktycznie uległ zmianie.
+
+        Parameters
+        ----------
+        tags : Iterable[int]
+            tagi jednostek, które od teraz tworzą armię.
+        """
+        tags = dict.fromkeys(tags)
+        if tags.keys() != self.tags.keys():
+            self.tags = tags
+            self.on_change()
+
+    def __contains__(self, tag: int) -> bool:
+        return tag in self.tags
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.tags)
+
+    def __len__(self) -> int:
+        return len(self.tags)
 
 
 class Army:
     """
     Pomocnicza klasa gromadząca dane przydatne dla węzłów drzewa zachowań kontrolującego armię gracza.
     """
-    def __init__(self, bot: sc2.BotAI, get_unit_ai: Callable[[int], UnitAiController]):
-        self.bot:               sc2.BotAI   = bot
-        self.units:             List[int]   = []
-        self.army_cluster_size: float       = 3.
-        self.enemy_strength:    float       = 0.
-        self.get_unit_ai:       Callable[[int], UnitAiController] = get_unit_ai
+    def __init__(self, bot: sc2.BotAI,
+                 get_unit_ai: Callable[[int], Optional[UnitAiController]],
+                 perception: PerceptionCache,
+                 unit_lookup: UnitLookup):
+        self.bot:               sc2.BotAI           = bot
+        self.units:             ArmyUnits           = ArmyUnits(on_change=self.invalidate_center)
+        self.center_frame:      int                 = -1
+        self.cached_center:     Optional[Point2]    = None
+        self.cached_strength:   Optional[float]     = None
+        self.army_cluster_size: float               = 3.
+        self.enemy_strength:    float               = 0.
+        self.perception:        PerceptionCache     = perception
+        self.unit_lookup:       UnitLookup          = unit_lookup
+        self.get_unit_ai:       Callable[[int], Optional[UnitAiController]] = get_unit_ai
+        self.unit_profiles:     UnitProfiles        = UnitProfiles()
+
+    def get_units(self) -> Units:
+        """
+        Zwraca grupę istniejących jednostek bota, które należą do armii.
+
+        Returns
+        -------
+        out : Units
+            jednostki armii.
+        """
+        return self.unit_lookup.friendly_group(self.units)
+
+    def invalidate_center(self):
+        """
+        Unieważnia zapamiętany środek oraz siłę armii, np. po zmianie jej składu.
+        """
+        self.center_frame = -1
+        self.cached_strength = None
+
+    def strength(self) -> float:
+        """
+        Zwraca siłę armii, tzn. sumaryczną liczbę obrażeń zadawanych na sekundę (dps) przez jej jednostki. Wartość
+        obliczana jest ponownie tylko po zmianie składu armii.
+
+        Returns
+        -------
+        out : float
+            siła armii.
+        """
+        if self.cached_strength is None:
+            self.cached_strength = sum(unit.ground_dps for unit in self.get_units())
+        return self.cached_strength
+
+    def center(self) -> Optional[Point2]:
+        """
+        Zwraca środek armii, tzn. średnią pozycję jej istniejących jednostek. Wartość obliczana jest co najwyżej raz
+        na klatkę gry (oraz ponownie po zmianie składu armii). Jeśli armia nie posiada żadnej jednostki, zwracane jest
+        None.
+
+        Returns
+        -------
+        out : Optional[Point2]
+            środek armii lub None.
+        """
+        frame = self.bot.state.game_loop
+        if frame != self.center_frame:
+            units = self.get_units()
+            self.cached_center = units.center if units.exists else None
+            self.center_frame = frame
+        return self.cached_center
 
 
 class IsArmyStrongEnough(Behaviour):
     """
-    Węzeł sprawdzający, czy armia bota jest dość silna, aby być w stanie walczyć z wrogiem. Siła armii jest obliczana
-    na podstawie sumarycznej ilości punktów obrażeń zadawanych na sekundę (dps) przez wszystkie jednostki armii.
-    Wartość ta porównywana jest z tą samą miarą wyliczaną na podstawie do tej pory widzianych jednostek przeciwnika.
-    Węzeł kończy pracę ze statusem *SUCCESS*, jeśli armia bota ma przewagę oraz *FAILURE* w przeciwnym wypadku.
+    Węzeł sprawdzający, czy armia bota jest dość silna, aby być w stanie walczyć z wrogiem. Wynik walki armii
+    z widocznymi jednostkami przeciwnika przewidywany jest funkcją *predict_combat()* (model Lanchestera uwzględniający
+    punkty życia i tarczy, obrażenia zadawane jednostkom naziemnym i powietrznym oraz zasięg ataku). Siła widocznych
+    jednostek przeciwnika skalowana jest tak, aby ich sumaryczna ilość obrażeń zadawanych na sekundę (dps)
+    odpowiadała sile do tej pory widzianych jednostek przeciwnika. Jeśli żadna jednostka przeciwnika nie jest
+    widoczna, siła armii (dps) porównywana jest bezpośrednio z siłą przeciwnika. Węzeł kończy pracę ze statusem
+    *SUCCESS*, jeśli armia bota ma przewagę (z uwzględnieniem mnożnika *advantage*) oraz *FAILURE* w przeciwnym
+    wypadku.
     """
-    def __init__(self, name: str, army: Army):
+    def __init__(self, name: str, army: Army, advantage: float = 1.25):
         super().__init__(name)
-        self.army: Army = army
+        self.army:          Army                        = army
+        self.advantage:     float                       = advantage
+        self.prediction:    Optional[CombatPrediction]  = None     # Ostatni przewidziany wynik walki.
 
     def get_army_strength(self) -> float:
-        return sum(unit.ground_dps for unit in self.army.bot.units.tags_in(self.army.units))
+        return self.army.strength()
+
+    def predict(self) -> Optional[CombatPrediction]:
+        """
+        Przewiduje wynik walki armii z widocznymi jednostkami przeciwnika lub zwraca None, jeśli żadna widoczna
+        jednostka przeciwnika nie zadaje obrażeń jednostkom naziemnym.
+        """
+        enemy = self.army.unit_profiles.group(self.army.bot.enemy_units)
+        visible_strength = float(enemy.ground_dps.sum())
+        if visible_strength <= 0.:
+            return None
+        friendly = self.army.unit_profiles.group(self.army.get_units())
+        return predict_combat(friendly, enemy, enemy_scale=max(1., self.army.enemy_strength / visible_strength))
 
     def update(self):
-        if self.get_army_strength() * 1.25 >= self.army.enemy_strength:
+        if self.army.enemy_strength <= 0.:
             return py_trees.common.Status.SUCCESS
+        self.prediction = self.predict()
+        if self.prediction is None:
+            is_strong_enough = self.get_army_strength() * self.advantage >= self.army.enemy_strength
         else:
-            return py_trees.common.Status.FAILURE
+            is_strong_enough = self.prediction.ratio * self.advantage >= 1.
+        return py_trees.common.Status.SUCCESS if is_strong_enough else py_trees.common.Status.FAILURE
 
 
 class AreEnemiesVisible(Behaviour):
@@ -55,12 +218,9 @@ class AreEnemiesVisible(Behaviour):
         self.army: Army = army
 
     def update(self):
-        units = self.army.bot.units.tags_in(self.army.units)
+        units = self.army.get_units()
         for unit in units:
-            visible_enemies = (self.army.bot.enemy_units + self.army.bot.enemy_structures).filter(
-                lambda enemy: enemy.distance_to(unit) <= unit.sight_range and enemy.can_be_attacked
-            )
-            if visible_enemies.exists:
+            if self.army.perception.has_visible_enemies(unit):
                 return py_trees.common.Status.SUCCESS
         return py_trees.common.Status.FAILURE
 
@@ -78,45 +238,50 @@ class SeekEnemies(Behaviour):
     Gdy wszystkie miejsca zostaną odwiedzone, węzeł kończy pracę ze statusem *SUCCESS*. Jeśli natomiast armia nie
     posiada żadnej jednostki (jest pusta), węzeł kończy ze statusem *FAILURE*.
     """
-    def __init__(self, name: str, army: Army):
+    def __init__(self, name: str, army: Army, expansion_table: ExpansionTable):
         super().__init__(name)
         self.army: Army = army
+        self.expansion_table: ExpansionTable = expansion_table
         self.locations_to_check: List[Point2] = []
 
     def initialise(self):
-        # Znajdowanie miejsc zawierających surowce.
-        expansions = self.army.bot.expansion_locations_list
-        random.shuffle(expansions)
+        # Znajdowanie miejsc zawierających surowce – najpierw lokacje startowe przeciwnika, a następnie lokacje według
+        # odległości od nich.
+        bot = self.army.bot
+        expansions = self.expansion_table.scouting_targets(bot.enemy_start_locations, bot.start_location)
 
         # Znajdowanie miejsc, w których widziano budynki wroga.
         snapshot_buildings = self.army.bot.enemy_structures.filter(lambda enemy: enemy.is_snapshot)
         buildings_locations = [building.position for building in snapshot_buildings]
 
-        self.locations_to_check = buildings_locations + self.army.bot.enemy_start_locations + expansions
+        self.locations_to_check = buildings_locations + expansions
 
     def update(self):
         # Weź wszystkie jednostki bota o tagach z przechowywanej listy.
-        units = self.army.bot.units.tags_in(self.army.units)
+        units = self.army.get_units()
         if units.empty:
             return py_trees.common.Status.FAILURE
 
         # Jeśli jednostki dotarły do docelowego miejsca, usuń je z listy miejsc do odwiedzenia oraz kontynuuj
         # eksplorację.
+        center = self.army.center()
         if len(self.locations_to_check) > 0:
-            if (units.center - self.locations_to_check[0]).length < 5:
+            if (center - self.locations_to_check[0]).length < 5:
                 self.locations_to_check.pop(0)
         else:
             return py_trees.common.Status.SUCCESS
 
         # Każ jednostkom iść do pierwszego miejsca do odwiedzenia z listy miejsc do odwiedzenia. Jeśli jednostki są
         # zbyt od siebie oddalone, rozkaż im zbić się w bardziej zwartą grupę.
-        mean_distance = np.mean([(unit.position - units.center).length for unit in units])
+        mean_distance = np.mean([(unit.position - center).length for unit in units])
         for unit in units:
             unit_ai = self.army.get_unit_ai(unit.tag)
+            if unit_ai is None:
+                continue
             if mean_distance < self.army.army_cluster_size:
                 unit_ai.order = UnitAiOrder(UnitAiOrderType.Move, target=self.locations_to_check[0])
             else:
-                unit_ai.order = UnitAiOrder(UnitAiOrderType.Move, target=units.center)
+                unit_ai.order = UnitAiOrder(UnitAiOrderType.Move, target=center)
         return py_trees.common.Status.RUNNING
 
 
@@ -130,7 +295,7 @@ class StayInBase(Behaviour):
         self.army: Army = army
 
     def update(self):
-        units = self.army.bot.units.tags_in(self.army.units)
+        units = self.army.get_units()
         base_buildings = self.army.bot.structures.in_distance_between(self.army.bot.start_location, 0, 25)
         if base_buildings.empty:
             target_location = self.army.bot.start_location
@@ -139,7 +304,8 @@ class StayInBase(Behaviour):
 
         for unit in units:
             unit_ai = self.army.get_unit_ai(unit.tag)
-            unit_ai.order = UnitAiOrder(UnitAiOrderType.DefendLocation, target=target_location)
+            if unit_ai is not None:
+                unit_ai.order = UnitAiOrder(UnitAiOrderType.DefendLocation, target=target_location)
         return py_trees.common.Status.SUCCESS
 
 
@@ -154,16 +320,15 @@ class Attack(Behaviour):
         self.army: Army = army
 
     def update(self):
-        units = self.army.bot.units.tags_in(self.army.units)
+        units = self.army.get_units()
         for unit in units:
-            visible_enemies = (self.army.bot.enemy_units + self.army.bot.enemy_structures).filter(
-                lambda enemy: enemy.distance_to(unit) <= unit.sight_range and enemy.can_be_attacked
-            )
-            if visible_enemies.exists:
+            if self.army.perception.has_visible_enemies(unit):
+                visible_enemies = self.army.perception.visible_enemies(unit)
+                target = visible_enemies.closest_to(self.army.center()).position
                 for unit in units:
                     unit_ai = self.army.get_unit_ai(unit.tag)
-                    unit_ai.order = UnitAiOrder(UnitAiOrderType.MoveAttack,
-                                                target=visible_enemies.closest_to(units.center).position)
+                    if unit_ai is not None:
+                        unit_ai.order = UnitAiOrder(UnitAiOrderType.MoveAttack, target=target)
                 return py_trees.common.Status.SUCCESS
         return py_trees.common.Status.SUCCESS
 
@@ -196,7 +361,7 @@ class ArmyBht:
         are_enemies_visible = AreEnemiesVisible(name="Are enemies visible?", army=self.army)
 
         stay_in_base = StayInBase(name="Stay in base", army=self.army)
-        seek_enemies = SeekEnemies(name="Seek enemies", army=self.army)
+        seek_enemies = SeekEnemies(name="Seek enemies", army=self.army, expansion_table=self.expansion_table)
 
         attack_visible_enemies = Sequence(name="Attack visible enemies")
         attack = Attack(name="Attack", army=self.army)
@@ -210,34 +375,34 @@ class ArmyBht:
         return root
 
     def __init__(self, bot:         sc2.BotAI,
-                 get_unit_ai:       Callable[[int], UnitAiController],
-                 delta_time:        Callable[[], float]):
-        self.army:              Army                = Army(bot, get_unit_ai)
+                 get_unit_ai:       Callable[[int], Optional[UnitAiController]],
+                 delta_time:        Callable[[], float],
+                 perception:        PerceptionCache,
+                 unit_lookup:       UnitLookup,
+                 enemy_ledger:      EnemyStrengthLedger,
+                 expansion_table:   ExpansionTable):
+        self.army:              Army                = Army(bot, get_unit_ai, perception, unit_lookup)
         self.delta_time:        Callable[[], float] = delta_time
+        self.enemy_ledger:      EnemyStrengthLedger = enemy_ledger
+        self.expansion_table:   ExpansionTable      = expansion_table
         self.behavior_tree:     Behaviour           = self.construct_behavior_tree()
         self.forget_rate:       float               = 0.1
 
-    def calculate_units_strength(self, units: Units) -> float:
-        """
-        Oblicza siłę grupy jednostek w oparciu o liczbę zadawanych obrażeń na sekundę (dps).
-
-        Parameters
-        ----------
-        units : Units
-            grupa jednostek, której siłę należy obliczyć.
-
-        Returns
-        -------
-        out : float
-            obliczona siła grupy jednostek.
-        """
-        return sum(unit.ground_dps for unit in units)
+        # Skompilowana wersja drzewa, wykonywana zamiast metody tick_once() py_trees, jeśli *compiled* jest True.
+        self.compiled_tree:     CompiledBehaviour   = compile_tree(self.behavior_tree)
+        self.compiled:          bool                = True
 
     def update(self):
-        # Obliczaj siłę armii wroga w oparciu o posiadane przez niego jednostki (te które do tej pory zobaczono).
-        # Z czasem siła przeciwnika zmniejsza się (aż do 0), tak aby armia, jeśli się wycofała, mogła za jakiś czas
-        # jeszcze raz zaatakować.
+        # Obliczaj siłę armii wroga w oparciu o posiadane przez niego jednostki (te które do tej pory zobaczono –
+        # rejestr pamięta również jednostki, które zniknęły we mgle wojny). Z czasem siła przeciwnika zmniejsza się
+        # (aż do 0), tak aby armia, jeśli się wycofała, mogła za jakiś czas jeszcze raz zaatakować.
         self.army.enemy_strength = max(0.0,
                                        self.army.enemy_strength - self.delta_time() * self.forget_rate,
-                                       self.calculate_units_strength(self.army.bot.enemy_units))
-        self.behavior_tree.tick_once()
+                                       self.enemy_ledger.strength(self.army.bot.time))
+        if self.compiled:
+            self.compiled_tree.tick()
+        else:
+            self.behavior_tree.tick_once()
+
+    def instrument(self, profiler: NodeProfiler):
+        profiler.instrument_tree(self.behavior_tree, "army_bt")
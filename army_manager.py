@@ -0,0 +1,180 @@
+from sc2.units import Units
+from army_bht import ArmyBht
+from profiling import NodeProfiler
+from unit_ai_data import UnitAiOrder, UnitAiOrderType
+from typing import Callable, Dict, List, Optional
+from collections import Counter
+import numpy as np
+
+
+class ArmyClustering:
+    """
+    Zwektoryzowany podział jednostek na skupiska. Pozycje jednostek przypisywane są do komórek siatki o boku
+    *link_distance*, a skupiskiem jest spójna składowa zajętych komórek (komórki sąsiadują, jeśli stykają się bokiem
+    lub rogiem). Spójne składowe wyznaczane są przez propagację najmniejszej etykiety wzdłuż krawędzi pomiędzy
+    sąsiednimi komórkami, bez pętli po jednostkach.
+    """
+    def __init__(self, link_distance: float = 6.):
+        self.link_distance: float = link_distance
+
+    def cluster(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Dzieli punkty na skupiska.
+
+        Parameters
+        ----------
+        positions : np.ndarray
+            tablica pozycji jednostek o kształcie (n, 2).
+
+        Returns
+        -------
+        out : np.ndarray
+            tablica n etykiet skupisk – kolejnych liczb całkowitych od 0.
+        """
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Współrzędne komórek przesunięte tak, aby sąsiedzi każdej komórki mieli nieujemne współrzędne, zakodowane
+        # jako jedna liczba całkowita.
+        cells = np.floor(positions / self.link_distance).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        stride = int(cells[:, 1].max()) + 2
+        keys = cells[:, 0] * stride + cells[:, 1]
+        occupied, inverse = np.unique(keys, return_inverse=True)
+
+        # Krawędzie pomiędzy zajętymi komórkami sąsiadującymi w kierunkach (0, 1), (1, -1), (1, 0) oraz (1, 1).
+        sources: List[np.ndarray] = []
+        targets: List[np.ndarray] = []
+        for offset in (1, stride - 1, stride, stride + 1):
+            neighbours = occupied + offset
+            index = np.minimum(np.searchsorted(occupied, neighbours), len(occupied) - 1)
+            found = np.flatnonzero(occupied[index] == neighbours)
+            sources.append(found)
+            targets.append(index[found])
+        source = np.concatenate(sources)
+        target = np.concatenate(targets)
+
+        labels = np.arange(len(occupied))
+        while len(source) > 0:
+            smallest = np.minimum(labels[source], labels[target])
+            updated = labels.copy()
+            np.minimum.at(updated, source, smallest)
+            np.minimum.at(updated, target, smallest)
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                break
+            labels = updated
+        return np.unique(labels[inverse], return_inverse=True)[1]
+
+
+class ArmyManager:
+    """
+    Zarządca wielu jednoczesnych armii bota. W każdej klatce gry jednostki bojowe dzielone są na skupiska
+    (*ArmyClustering*), a każde skupisko staje się armią sterowaną przez własne drzewo zachowań *ArmyBht*.
+
+    Armie zachowują swoją tożsamość pomiędzy klatkami gry: skupisko przejmuje armię, do której należała największa
+    część jego jednostek w poprzedniej klatce (skupiska rozpatrywane są od największego). Jeśli armia została już
+    przejęta przez inne skupisko (np. armia rozdzieliła się na dwie części), tworzona jest nowa armia, która dziedziczy
+    oszacowanie siły przeciwnika po armii, z której pochodzi większość jej jednostek. Armie, które nie zostały przejęte
+    przez żadne skupisko, są usuwane.
+
+    Największe skupisko zawsze tworzy armię. Pozostałe skupiska liczące mniej niż *min_army_size* jednostek (np. nowo
+    wyszkolone jednostki) nie tworzą osobnych armii, które samodzielnie porównywałyby swoją siłę z siłą przeciwnika –
+    są posiłkami, którym rozkazywane jest dołączenie do największej armii.
+    """
+    def __init__(self, create_army: Callable[[], ArmyBht], link_distance: float = 6., min_army_size: int = 4):
+        self.create_army:       Callable[[], ArmyBht]   = create_army
+        self.clustering:        ArmyClustering          = ArmyClustering(link_distance)
+        self.min_army_size:     int                     = min_army_size
+        self.armies:            Dict[int, ArmyBht]      = {}
+        self.army_of:           Dict[int, int]          = {}
+        self.next_id:           int                     = 0
+
+        # Tagi jednostek, które nie należą do żadnej armii i zmierzają do największej armii, oraz jej identyfikator.
+        self.reinforcements:    List[int]               = []
+        self.main_army:         Optional[int]           = None
+
+    def assign(self, units: Units):
+        """
+        Dzieli jednostki *units* na armie.
+
+        Parameters
+        ----------
+        units : Units
+            jednostki bojowe bota.
+        """
+        tags = [unit.tag for unit in units]
+        positions = np.array([unit.position_tuple for unit in units], dtype=np.float64).reshape(-1, 2)
+        labels = self.clustering.cluster(positions)
+
+        clusters: List[List[int]] = [[] for _ in range(int(labels.max()) + 1 if len(labels) > 0 else 0)]
+        for tag, label in zip(tags, labels.tolist()):
+            clusters[label].append(tag)
+        clusters.sort(key=len, reverse=True)
+
+        armies: Dict[int, ArmyBht] = {}
+        army_of: Dict[int, int] = {}
+        reinforcements: List[int] = []
+        for members in clusters:
+            if armies and len(members) < self.min_army_size:
+                reinforcements.extend(members)
+                continue
+            previous = Counter(self.army_of[tag] for tag in members if tag in self.army_of)
+            army_id = next((army_id for army_id, _ in previous.most_common() if army_id not in armies), None)
+            if army_id is not None:
+                army_bht = self.armies[army_id]
+            else:
+                army_id = self.next_id
+                self.next_id += 1
+                army_bht = self.create_army()
+                if previous:
+                    parent = self.armies[previous.most_common(1)[0][0]]
+                    army_bht.army.enemy_strength = parent.army.enemy_strength
+            army_bht.army.units.assign(members)
+            armies[army_id] = army_bht
+            army_of.update(dict.fromkeys(members, army_id))
+        self.armies = armies
+        self.army_of = army_of
+        self.reinforcements = reinforcements
+        self.main_army = next(iter(armies), None)
+
+    def rally_reinforcements(self):
+        """
+        Rozkazuje posiłkom przemieszczenie się do środka największej armii.
+        """
+        if self.main_army is None or not self.reinforcements:
+            return
+        army = self.armies[self.main_army].army
+        center = army.center()
+        if center is None:
+            return
+        for tag in self.reinforcements:
+            unit_ai = army.get_unit_ai(tag)
+            if unit_ai is not None:
+                unit_ai.order = UnitAiOrder(UnitAiOrderType.Move, target=center)
+
+    def update(self, units: Units):
+        """
+        Dzieli jednostki *units* na armie, a następnie podejmuje decyzję dla każdej armii w oparciu o jej drzewo
+        zachowań i kieruje posiłki do największej armii.
+
+        Parameters
+        ----------
+        units : Units
+            jednostki bojowe bota.
+        """
+        self.assign(units)
+        for army_bht in self.armies.values():
+            army_bht.update()
+        self.rally_reinforcements()
+
+    def discard(self, tag: int):
+        """
+        Usuwa jednostkę o tagu *tag* z armii, do której należy (np. po jej zniszczeniu).
+        """
+        army_id = self.army_of.pop(tag, None)
+        if army_id is not None and army_id in self.armies:
+            self.armies[army_id].army.units.discard(tag)
+
+    def instrument(self, profiler: NodeProfiler):
+        profiler.instrument_method(self, "assign", "armies")
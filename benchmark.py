@@ -0,0 +1,191 @@
+from headless import HeadlessGame, HeadlessProtossBot, create_battle_world
+from protoss_bot import UnitAiType
+from combat_prediction import UnitProfiles, predict_combat
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import numpy as np
+import random
+import time
+import tracemalloc
+
+
+AI_TYPES: Dict[str, UnitAiType] = {
+    "hfsm":     UnitAiType.HierarchicalStateMachine,
+    "flat":     UnitAiType.FlatStateMachine,
+    "bt":       UnitAiType.BehaviorTree,
+    "shared":   UnitAiType.SharedBehaviorTree,
+}
+AI_NAMES: Dict[UnitAiType, str] = {ai_type: name for name, ai_type in AI_TYPES.items()}
+
+
+class BenchmarkResult:
+    """
+    Wyniki pomiaru czasu wywołań metody *on_step()* bota dla jednego scenariusza.
+    """
+    def __init__(self, ai_type: UnitAiType, units: int):
+        self.ai_type:           UnitAiType  = ai_type
+        self.units:             int         = units
+        self.step_times:        List[float] = []
+        self.allocations:       List[int]   = []
+        self.scheduler_times:   List[float] = []
+        self.frames:            int         = 0
+        self.survivors:         int         = 0
+        self.enemy_survivors:   int         = 0
+        self.profile:           str         = ""
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.step_times, q)) * 1000 if self.step_times else 0.
+
+    def report(self) -> str:
+        line = "{:<6} {:>5} {:>6} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>10.2f}".format(
+            AI_NAMES[self.ai_type], self.units, len(self.step_times),
+            self.percentile(50), self.percentile(90), self.percentile(99), self.percentile(100),
+            float(np.mean(self.scheduler_times)) * 1000 if self.scheduler_times else 0.,
+            float(np.mean(self.allocations)) / 1024 if self.allocations else 0.)
+        return line + " {:>5}/{:<5}".format(self.survivors, self.enemy_survivors)
+
+
+def run_benchmark(ai_type: UnitAiType, units: int, enemies: int, frames: int, seed: int = 0,
+                  allocations: bool = False, profile: bool = False, compiled: bool = True) -> BenchmarkResult:
+    """
+    Uruchamia bota w symulatorze na *frames* klatek gry i mierzy czas każdego wywołania metody *on_step()*.
+
+    Parameters
+    ----------
+    ai_type : UnitAiType
+        typ AI sterującego jednostkami.
+    units : int
+        liczba jednostek bojowych bota.
+    enemies : int
+        liczba jednostek bojowych przeciwnika.
+    frames : int
+        liczba klatek gry do zasymulowania.
+    seed : int
+        ziarno generatora liczb losowych (rozstawienie jednostek oraz decyzje bota).
+    allocations : bool
+        jeśli True, dla każdego wywołania *on_step()* mierzony jest szczytowy rozmiar pamięci zaalokowanej w jego
+        trakcie (moduł *tracemalloc* znacząco spowalnia wykonanie, więc czasy nie są wtedy miarodajne).
+    profile : bool
+        jeśli True, włączany jest profiler węzłów drzew zachowań oraz maszyn stanów bota.
+    compiled : bool
+        determinuje, czy drzewa zachowań wykonywane są w wersji skompilowanej, czy przez bibliotekę py_trees.
+
+    Returns
+    -------
+    out : BenchmarkResult
+        wyniki pomiaru.
+    """
+    random.seed(seed)
+    world = create_battle_world(units, enemies, seed=seed)
+    bot = HeadlessProtossBot(world)
+    bot.unit_ai_type = ai_type
+    bot.profiler.enabled = profile
+    bot.compiled_behavior_trees = compiled
+    game = HeadlessGame(bot, world)
+    result = BenchmarkResult(ai_type, units)
+
+    async def run():
+        await game.start()
+        while bot.state.game_loop < frames and world.outcome() is None:
+            await game.step()
+            if allocations:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                await game.act()
+                result.allocations.append(tracemalloc.get_traced_memory()[1] - before)
+            else:
+                await game.act()
+            result.step_times.append(game.step_time)
+            result.scheduler_times.append(bot.controller_scheduler.elapsed)
+
+    if allocations:
+        tracemalloc.start()
+    try:
+        asyncio.run(run())
+    finally:
+        if allocations:
+            tracemalloc.stop()
+
+    result.frames = bot.state.game_loop
+    result.survivors = bot.units.amount
+    result.enemy_survivors = bot.enemy_units.amount
+    if profile:
+        result.profile = bot.profiler.table()
+    return result
+
+
+def run_combat_benchmark(units: int, enemies: int, repeats: int = 1000, seed: int = 0) -> Tuple[float, float, str]:
+    """
+    Mierzy czas przewidywania wyniku walki funkcją *predict_combat()* dla armii *units* jednostek bota i *enemies*
+    jednostek przeciwnika z symulatora.
+
+    Returns
+    -------
+    out : Tuple[float, float, str]
+        średni czas (w sekundach) samego przewidywania, średni czas przewidywania wraz z budową tablic jednostek
+        metodą *UnitProfiles.group()* oraz przewidywany zwycięzca.
+    """
+    world = create_battle_world(units, enemies, seed=seed)
+    bot = HeadlessProtossBot(world)
+    game = HeadlessGame(bot, world)
+    asyncio.run(game.start())
+    army, enemy_army = bot.units.not_structure, bot.enemy_units.not_structure
+    profiles = UnitProfiles()
+    friendly, enemy = profiles.group(army), profiles.group(enemy_army)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        prediction = predict_combat(friendly, enemy)
+    predict_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict_combat(profiles.group(army), profiles.group(enemy_army))
+    total_time = (time.perf_counter() - start) / repeats
+    return predict_time, total_time, prediction.winner.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pomiar czasu wywołań on_step() bota w symulatorze, bez gry.")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 50, 200],
+                        help="liczby jednostek bojowych bota, dla których wykonywany jest pomiar")
+    parser.add_argument("--enemy-ratio", type=float, default=1.,
+                        help="liczba jednostek przeciwnika w stosunku do liczby jednostek bota")
+    parser.add_argument("--frames", type=int, default=2000, help="liczba klatek gry w każdym pomiarze")
+    parser.add_argument("--ai", choices=list(AI_TYPES) + ["all"], default="all", help="typ AI jednostek")
+    parser.add_argument("--allocations", action="store_true",
+                        help="mierz pamięć alokowaną w każdym wywołaniu on_step() (spowalnia wykonanie)")
+    parser.add_argument("--profile", action="store_true",
+                        help="wypisz czasy wykonania poszczególnych węzłów drzew zachowań i maszyn stanów")
+    parser.add_argument("--interpreted", action="store_true",
+                        help="wykonuj drzewa zachowań metodą tick_once() py_trees zamiast wersji skompilowanej")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno generatora liczb losowych")
+    parser.add_argument("--combat", action="store_true",
+                        help="zamiast wywołań on_step() mierz czas przewidywania wyniku walki (predict_combat())")
+    args = parser.parse_args()
+
+    if args.combat:
+        print("{:>5} {:>7} {:>12} {:>12} {:>9}".format("units", "enemies", "predict[us]", "total[us]", "winner"))
+        for units in args.units:
+            enemies = max(1, round(units * args.enemy_ratio))
+            predict_time, total_time, winner = run_combat_benchmark(units, enemies, seed=args.seed)
+            print("{:>5} {:>7} {:>12.1f} {:>12.1f} {:>9}".format(units, enemies, predict_time * 1e6,
+                                                                  total_time * 1e6, winner))
+        return
+
+    ai_types = list(AI_TYPES.values()) if args.ai == "all" else [AI_TYPES[args.ai]]
+    print("{:<6} {:>5} {:>6} {:>8} {:>8} {:>8} {:>8} {:>8} {:>10} {:>11}".format(
+        "ai", "units", "steps", "p50[ms]", "p90[ms]", "p99[ms]", "max[ms]", "ctrl[ms]", "alloc[KiB]", "alive"))
+    for ai_type in ai_types:
+        for units in args.units:
+            result = run_benchmark(ai_type, units, max(1, round(units * args.enemy_ratio)), args.frames,
+                                   seed=args.seed, allocations=args.allocations, profile=args.profile,
+                                   compiled=not args.interpreted)
+            print(result.report())
+            if result.profile:
+                print(result.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,18 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.ability_id import AbilityId
 from sc2.position import Point2
 import py_trees
-from py_trees.composites import Sequence, Selector, Parallel
+from py_trees.composites import Composite, Sequence, Selector, Parallel
 from py_trees.decorators import Inverter
 from py_trees.idioms import eternal_guard
 from py_trees.behaviour import Behaviour
 from unit_ai_data import UnitAiOrderType, UnitAiOrder, UnitAiData, UnitAiController
-from typing import Callable, Optional
+from perception import PerceptionCache
+from target_selection import BatchTargetSelector
+from unit_lookup import UnitLookup
+from ability_model import AbilityModel
+from profiling import NodeProfiler
+from bt_compiler import CompiledBehaviour, compile_tree
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 # =========================
@@ -26,7 +32,7 @@ class ShouldFight(Behaviour):
         self.ai_data: UnitAiData = unit_ai_data
 
     def update(self):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return py_trees.common.Status.FAILURE
 
@@ -38,10 +44,7 @@ class ShouldFight(Behaviour):
             elif self.ai_data.unit_ai_order.order == UnitAiOrderType.Move:
                 return py_trees.common.Status.FAILURE
 
-        visible_enemies = (self.ai_data.bot.enemy_units + self.ai_data.bot.enemy_structures).filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-        )
-        if len(visible_enemies) > 0:
+        if self.ai_data.perception.has_visible_enemies(unit):
             return py_trees.common.Status.SUCCESS
         return py_trees.common.Status.FAILURE
 
@@ -59,7 +62,7 @@ class GroupMovement(Behaviour):
         ...
 
     def update(self):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is not None and self.ai_data.unit_ai_order is not None:
             if self.ai_data.unit_ai_order.order is not None:
                 already_going = (unit.is_moving and isinstance(unit.order_target, Point2) and
@@ -82,7 +85,7 @@ class IsInDanger(Behaviour):
         ...
 
     def update(self):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return py_trees.common.Status.FAILURE
         if (unit.health + unit.shield) / (unit.health_max + unit.shield_max) < self.ai_data.low_health and self.ai_data.unit_attacked(unit.tag):
@@ -94,6 +97,10 @@ class AvoidInjury(Behaviour):
     """
     Węzeł odpowiedzialny za unikanie walki w chwili, gdy jest zagrożona.
     """
+    # Atrybuty przechowujące stan węzła dla sterowanej jednostki (zapamiętywane osobno dla każdej jednostki przez
+    # współdzielone drzewo zachowań *SharedUnitBht*).
+    unit_state = ("escape_location", "start_time")
+
     def __init__(self, name: str, unit_ai_data: UnitAiData):
         super().__init__(name)
         self.ai_data:           UnitAiData  = unit_ai_data
@@ -102,24 +109,24 @@ class AvoidInjury(Behaviour):
 
     def initialise(self):
         self.start_time = self.ai_data.bot.time
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is not None:
             # Zbierz jednostki, które mogą zagrozić naszej jednostce
-            visible_enemies = (self.ai_data.bot.enemy_units + self.ai_data.bot.enemy_structures).filter(
-                lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-            )
+            visible_enemies = self.ai_data.perception.visible_enemies(unit)
 
             # Jeśli takie jednostki istnieją, uciekaj (wykorzystując np. zdolność Blink, jeśli jest dostępna)
             if len(visible_enemies) > 0:
                 direction = unit.position - visible_enemies.center
                 if abs(direction) > 0:
                     self.escape_location = unit.position + direction
-                    if unit.type_id == UnitTypeId.STALKER:
+                    ability_model = self.ai_data.ability_model
+                    if unit.type_id == UnitTypeId.STALKER and ability_model.ready(unit, AbilityId.EFFECT_BLINK_STALKER):
                         unit(AbilityId.EFFECT_BLINK_STALKER, self.escape_location)
+                        ability_model.note_cast(unit, AbilityId.EFFECT_BLINK_STALKER)
                     unit.move(self.escape_location)
 
     def update(self):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return py_trees.common.Status.FAILURE
 
@@ -147,34 +154,14 @@ class AttackBestTarget(Behaviour):
         ...
 
     def update(self):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return py_trees.common.Status.FAILURE
 
-        # Wybierz jednostki oraz budynki wroga, które jednostka widzi
-        enemy_units = self.ai_data.bot.enemy_units.filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-        )
-        enemy_structures = self.ai_data.bot.enemy_structures.filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range
-        )
-
-        # Preferuj jednostki, które atakują oraz są blisko
-        visible_enemies = enemy_units + enemy_structures.filter(lambda enemy: enemy.can_attack)
-        visible_enemies.sort(key=lambda enemy: unit.distance_to(enemy))
-        enemies_in_range = visible_enemies.in_attack_range_of(unit, bonus_distance=unit.sight_range * 0.15)
-
-        enemies = visible_enemies
-        if len(enemies_in_range) > 0:
-            enemies = enemies_in_range
-
-        # Wybierz jednostkę, która jest najbardziej ranna. Jeśli wśród niebezpiecznych jednostek nikogo nie udało się
-        # znaleźć, zaatakuj inne, nie niebezpieczne cele.
-        best_target = min(enemies,
-                          key=lambda enemy: (enemy.health + enemy.shield) / (enemy.health_max + enemy.shield_max + self.ai_data.eps),
-                          default=None)
-        if best_target is None and enemy_structures.exists:
-            best_target = enemy_structures.closest_to(unit)
+        # Cele dla wszystkich jednostek wybierane są jednocześnie przez obiekt BatchTargetSelector. Preferowane są
+        # jednostki, które atakują oraz są blisko i spośród nich wybierana jest ta najbardziej ranna. Jeśli wśród
+        # niebezpiecznych jednostek nikogo nie udało się znaleźć, atakowane są inne, nie niebezpieczne cele.
+        best_target = self.ai_data.target_selector.target_for(unit)
 
         if best_target is not None:
             if not (unit.is_attacking and unit.order_target == best_target.tag):
@@ -184,45 +171,75 @@ class AttackBestTarget(Behaviour):
         return py_trees.common.Status.SUCCESS
 
 
+def construct_unit_behavior_tree(unit_ai_data: UnitAiData) -> Selector:
+    """
+    Konstruuje drzewo zachowań jednostki ze zdefiniowanych wcześniej węzłów.
+
+    Parameters
+    ----------
+    unit_ai_data : UnitAiData
+        dane, z których korzystają węzły drzewa.
+
+    Returns
+    -------
+    out : Selector
+        instancja drzewa zachowań pozwalająca na sterowanie zachowaniem jednostki.
+    """
+    root = Selector(name="Unit behavior")
+
+    movement_sequence   = Sequence(name="Group movement")
+    should_fight        = ShouldFight(name="Should fight", unit_ai_data=unit_ai_data)
+    should_not_fight    = Inverter(name="Should not fight", child=should_fight)
+    group_movement      = GroupMovement("Group movement", unit_ai_data=unit_ai_data)
+    movement_sequence.add_children([should_not_fight, group_movement])
+
+    enemy_avoidance     = Sequence(name="Enemy avoidance")
+    is_in_danger        = IsInDanger(name="Is in danger", unit_ai_data=unit_ai_data)
+    avoid_injury        = AvoidInjury(name="Avoid injury", unit_ai_data=unit_ai_data)
+    enemy_avoidance.add_children([is_in_danger, avoid_injury])
+
+    attack_best_target  = AttackBestTarget(name="Attack best target", unit_ai_data=unit_ai_data)
+    root.add_children([movement_sequence, enemy_avoidance, attack_best_target])
+    return root
+
+
 class UnitBhtController(UnitAiController):
-    def construct_behavior_tree(self) -> Behaviour:
+    def construct_behavior_tree(self) -> Selector:
         """
         Metoda konstruująca drzewo zachowań ze zdefiniowanych wcześniej węzłów.
 
         Returns
         -------
-        out : Behaviour
+        out : Selector
             instancja drzewa zachowań pozwalająca na sterowanie zachowaniem jednostki.
         """
-        root = Selector(name="Unit behavior")
-
-        movement_sequence   = Sequence(name="Group movement")
-        should_fight        = ShouldFight(name="Should fight", unit_ai_data=self.unit_ai_data)
-        should_not_fight    = Inverter(name="Should not fight", child=should_fight)
-        group_movement      = GroupMovement("Group movement", unit_ai_data=self.unit_ai_data)
-        movement_sequence.add_children([should_not_fight, group_movement])
-
-        enemy_avoidance     = Sequence(name="Enemy avoidance")
-        is_in_danger        = IsInDanger(name="Is in danger", unit_ai_data=self.unit_ai_data)
-        avoid_injury        = AvoidInjury(name="Avoid injury", unit_ai_data=self.unit_ai_data)
-        enemy_avoidance.add_children([is_in_danger, avoid_injury])
-
-        attack_best_target  = AttackBestTarget(name="Attack best target", unit_ai_data=self.unit_ai_data)
-        root.add_children([movement_sequence, enemy_avoidance, attack_best_target])
-        return root
+        return construct_unit_behavior_tree(self.unit_ai_data)
 
     def __init__(self,
-                 unit_tag:      int,
-                 bot:           sc2.BotAI,
-                 unit_attacked: Callable[[int], bool]):
+                 unit_tag:          int,
+                 bot:               sc2.BotAI,
+                 unit_attacked:     Callable[[int], bool],
+                 perception:        PerceptionCache,
+                 target_selector:   BatchTargetSelector,
+                 unit_lookup:       UnitLookup,
+                 ability_model:     AbilityModel,
+                 compiled:          bool = True):
         self.unit_tag:      int                     = unit_tag
         self.bot:           sc2.BotAI               = bot
         self.unit_attacked: Callable[[int], bool]   = unit_attacked
         self.unit_ai_data:  UnitAiData              = UnitAiData(bot=bot,
                                                                  unit_tag=unit_tag,
                                                                  unit_ai_order=None,
-                                                                 unit_attacked=unit_attacked)
-        self.behavior_tree:     Behaviour           = self.construct_behavior_tree()
+                                                                 unit_attacked=unit_attacked,
+                                                                 perception=perception,
+                                                                 target_selector=target_selector,
+                                                                 unit_lookup=unit_lookup,
+                                                                 ability_model=ability_model)
+        self.behavior_tree:     Selector            = self.construct_behavior_tree()
+
+        # Skompilowana wersja drzewa, wykonywana zamiast metody tick_once() py_trees, jeśli *compiled* jest True.
+        self.compiled_tree:     CompiledBehaviour   = compile_tree(self.behavior_tree)
+        self.compiled:          bool                = compiled
 
     def render_tree(self):
         # =========================
@@ -231,7 +248,19 @@ class UnitBhtController(UnitAiController):
         ...
 
     def update(self):
-        self.behavior_tree.tick_once()
+        if self.compiled:
+            self.compiled_tree.tick()
+        else:
+            self.behavior_tree.tick_once()
+
+    def instrument(self, profiler: NodeProfiler):
+        profiler.instrument_tree(self.behavior_tree, "unit_bt")
+
+    @property
+    def in_combat(self) -> bool:
+        # Jednostka walczy, jeśli w ostatniej aktualizacji drzewo nie wybrało gałęzi poruszania się w grupie.
+        current_child = self.behavior_tree.current_child
+        return current_child is not None and current_child is not self.behavior_tree.children[0]
 
     @property
     def order(self) -> Optional[UnitAiOrder]:
@@ -240,3 +269,155 @@ class UnitBhtController(UnitAiController):
     @order.setter
     def order(self, new_order: Optional[UnitAiOrder]):
         self.unit_ai_data.unit_ai_order = new_order
+
+
+class SharedUnitBht:
+    """
+    Jedno drzewo zachowań współdzielone przez wszystkie jednostki bojowe bota (wzorzec pyłku). Zamiast tworzyć dla
+    każdej jednostki osobne drzewo oraz obiekt *UnitAiData*, każdej jednostce przydzielany jest indeks (slot)
+    w tablicach przechowujących jej stan: statusy węzłów, aktywne gałęzie węzłów złożonych, stan węzła *AvoidInjury*
+    (atrybuty wymienione w *unit_state* klasy węzła), tag jednostki oraz jej rozkaz.
+
+    Przed aktualizacją jednostki jej stan ładowany jest do węzłów drzewa, a po aktualizacji zapisywany z powrotem do
+    tablic, dzięki czemu decyzje są identyczne z decyzjami osobnych drzew *UnitBhtController*, a pamięć oraz koszt
+    tworzenia kontrolera nie zależą od rozmiaru drzewa.
+    """
+    def __init__(self,
+                 bot:               sc2.BotAI,
+                 unit_attacked:     Callable[[int], bool],
+                 perception:        PerceptionCache,
+                 target_selector:   BatchTargetSelector,
+                 unit_lookup:       UnitLookup,
+                 ability_model:     AbilityModel,
+                 compiled:          bool = True):
+        self.unit_ai_data:      UnitAiData          = UnitAiData(bot=bot,
+                                                                 unit_tag=0,
+                                                                 unit_ai_order=None,
+                                                                 unit_attacked=unit_attacked,
+                                                                 perception=perception,
+                                                                 target_selector=target_selector,
+                                                                 unit_lookup=unit_lookup,
+                                                                 ability_model=ability_model)
+        self.behavior_tree:     Selector            = construct_unit_behavior_tree(self.unit_ai_data)
+        self.compiled_tree:     CompiledBehaviour   = compile_tree(self.behavior_tree)
+        self.compiled:          bool                = compiled
+        self.instrumented:      bool                = False
+
+        # Pary (węzeł, atrybut) opisujące stan drzewa dla jednej jednostki oraz ich wartości początkowe.
+        self.fields:            List[Tuple[Behaviour, str]] = []
+        for node in self.behavior_tree.iterate():
+            self.fields.append((node, "status"))
+            if isinstance(node, Composite):
+                self.fields.append((node, "current_child"))
+            self.fields.extend((node, attribute) for attribute in getattr(type(node), "unit_state", ()))
+        self.defaults:          List[Any]           = [getattr(node, attribute) for node, attribute in self.fields]
+        self.root_child_column: int                 = self.fields.index((self.behavior_tree, "current_child"))
+
+        # Tablice stanu jednostek indeksowane slotami (jedna kolumna na każdą parę z *fields*).
+        self.slots:             Dict[int, int]                  = {}
+        self.free_slots:        List[int]                       = []
+        self.tags:              List[int]                       = []
+        self.orders:            List[Optional[UnitAiOrder]]     = []
+        self.columns:           List[List[Any]]                 = [[] for _ in self.fields]
+
+    def add(self, unit_tag: int) -> int:
+        """
+        Przydziela slot jednostce o tagu *unit_tag* (lub zwraca przydzielony wcześniej) z początkowym stanem drzewa.
+
+        Parameters
+        ----------
+        unit_tag : int
+            tag jednostki.
+
+        Returns
+        -------
+        out : int
+            indeks slotu jednostki.
+        """
+        slot = self.slots.get(unit_tag)
+        if slot is not None:
+            return slot
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.tags[slot] = unit_tag
+            self.orders[slot] = None
+            for column, default in zip(self.columns, self.defaults):
+                column[slot] = default
+        else:
+            slot = len(self.tags)
+            self.tags.append(unit_tag)
+            self.orders.append(None)
+            for column, default in zip(self.columns, self.defaults):
+                column.append(default)
+        self.slots[unit_tag] = slot
+        return slot
+
+    def remove(self, unit_tag: int):
+        """
+        Zwalnia slot jednostki o tagu *unit_tag* (np. po jej zniszczeniu).
+
+        Parameters
+        ----------
+        unit_tag : int
+            tag jednostki.
+        """
+        slot = self.slots.pop(unit_tag, None)
+        if slot is not None:
+            self.orders[slot] = None
+            self.free_slots.append(slot)
+
+    def tick(self, slot: int):
+        """
+        Aktualizuje drzewo zachowań dla jednostki zajmującej slot *slot*.
+        """
+        self.unit_ai_data.unit_tag = self.tags[slot]
+        self.unit_ai_data.unit_ai_order = self.orders[slot]
+        fields = self.fields
+        columns = self.columns
+        for (node, attribute), column in zip(fields, columns):
+            setattr(node, attribute, column[slot])
+        if self.compiled:
+            self.compiled_tree.tick()
+        else:
+            self.behavior_tree.tick_once()
+        for (node, attribute), column in zip(fields, columns):
+            column[slot] = getattr(node, attribute)
+
+    def in_combat(self, slot: int) -> bool:
+        # Jednostka walczy, jeśli w ostatniej aktualizacji drzewo nie wybrało gałęzi poruszania się w grupie.
+        current_child = self.columns[self.root_child_column][slot]
+        return current_child is not None and current_child is not self.behavior_tree.children[0]
+
+    def instrument(self, profiler: NodeProfiler):
+        # Drzewo jest współdzielone, więc jego węzły podmieniane są tylko raz.
+        if not self.instrumented:
+            profiler.instrument_tree(self.behavior_tree, "shared_unit_bt")
+            self.instrumented = True
+
+
+class SharedUnitBhtController(UnitAiController):
+    """
+    Lekki kontroler jednostki korzystający ze współdzielonego drzewa zachowań *SharedUnitBht*. Przechowuje jedynie
+    numer slotu jednostki.
+    """
+    def __init__(self, unit_tag: int, shared_tree: SharedUnitBht):
+        self.shared_tree:   SharedUnitBht   = shared_tree
+        self.slot:          int             = shared_tree.add(unit_tag)
+
+    def update(self):
+        self.shared_tree.tick(self.slot)
+
+    def instrument(self, profiler: NodeProfiler):
+        self.shared_tree.instrument(profiler)
+
+    @property
+    def in_combat(self) -> bool:
+        return self.shared_tree.in_combat(self.slot)
+
+    @property
+    def order(self) -> Optional[UnitAiOrder]:
+        return self.shared_tree.orders[self.slot]
+
+    @order.setter
+    def order(self, new_order: Optional[UnitAiOrder]):
+        self.shared_tree.orders[self.slot] = new_order
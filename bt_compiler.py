@@ -0,0 +1,297 @@
+from py_trees.behaviour import Behaviour
+from py_trees.common import ParallelPolicy, Status
+from py_trees.composites import Composite, Parallel, Selector, Sequence
+from py_trees.decorators import Decorator
+from typing import List, Optional, cast
+
+
+RUNNING = Status.RUNNING
+SUCCESS = Status.SUCCESS
+FAILURE = Status.FAILURE
+INVALID = Status.INVALID
+
+
+def set_current_child(node: Composite, child: Optional[Behaviour]):
+    # py_trees przypisuje atrybutowi *current_child* wartość None bez adnotacji typu, przez co mypy uznaje go za atrybut
+    # typu None.
+    setattr(node, "current_child", child)
+
+
+class CompiledBehaviour:
+    """
+    Skompilowany węzeł drzewa zachowań. Przechowuje referencję do oryginalnego węzła py_trees i modyfikuje jego
+    atrybuty (*status*, *current_child*) dokładnie tak, jak robią to metody *tick()* oraz *stop()* biblioteki
+    py_trees, ale bez generatorów, logowania oraz tworzenia nowych iteratorów przy każdym zatrzymaniu węzła.
+    """
+    __slots__ = ("node", "children")
+
+    def __init__(self, node: Behaviour, children: List["CompiledBehaviour"]):
+        self.node:      Behaviour                   = node
+        self.children:  List[CompiledBehaviour]     = children
+
+    def tick(self) -> Status:
+        raise NotImplementedError("tick() abstract method not implemented in CompiledBehaviour subclass.")
+
+    def stop(self, new_status: Status):
+        raise NotImplementedError("stop() abstract method not implemented in CompiledBehaviour subclass.")
+
+
+class CompiledLeaf(CompiledBehaviour):
+    """
+    Odpowiednik metod *Behaviour.tick()* oraz *Behaviour.stop()*.
+    """
+    __slots__ = ()
+
+    def tick(self) -> Status:
+        node = self.node
+        if node.status is not RUNNING:
+            node.initialise()
+        new_status = node.update()
+        if new_status is not RUNNING and new_status is not SUCCESS and new_status is not FAILURE:
+            # Każda inna wartość (np. None) zamieniana jest na INVALID, tak jak w py_trees.
+            new_status = INVALID
+        if new_status is not RUNNING:
+            node.terminate(new_status)
+        node.status = new_status
+        return new_status
+
+    def stop(self, new_status: Status):
+        node = self.node
+        node.terminate(new_status)
+        node.status = new_status
+
+
+class CompiledDecorator(CompiledBehaviour):
+    """
+    Odpowiednik metod *Decorator.tick()* oraz *Decorator.stop()* (np. dla węzła *Inverter*).
+    """
+    __slots__ = ()
+
+    def tick(self) -> Status:
+        node = self.node
+        if node.status is not RUNNING:
+            node.initialise()
+        self.children[0].tick()
+        new_status = node.update()
+        if new_status is not RUNNING and new_status is not SUCCESS and new_status is not FAILURE:
+            # Każda inna wartość (np. None) zamieniana jest na INVALID, tak jak w py_trees.
+            new_status = INVALID
+        if new_status is not RUNNING:
+            self.stop(new_status)
+        node.status = new_status
+        return new_status
+
+    def stop(self, new_status: Status):
+        node = self.node
+        child = self.children[0]
+        node.terminate(new_status)
+        if new_status is INVALID:
+            child.stop(new_status)
+        if child.node.status is RUNNING:
+            child.stop(INVALID)
+        node.status = new_status
+
+
+class CompiledComposite(CompiledBehaviour):
+    """
+    Odpowiednik metody *Composite.stop()*, wspólnej dla węzłów *Selector* oraz *Sequence*.
+    """
+    __slots__ = ()
+    node: Composite
+
+    def stop(self, new_status: Status):
+        node = self.node
+        if new_status is INVALID:
+            set_current_child(node, None)
+            for child in self.children:
+                child.stop(new_status)
+        node.terminate(new_status)
+        node.status = new_status
+
+
+class CompiledSelector(CompiledComposite):
+    """
+    Odpowiednik metody *Selector.tick()* (z pamięcią lub bez niej).
+    """
+    __slots__ = ()
+    node: Selector
+
+    def tick(self) -> Status:
+        node = self.node
+        children = self.children
+        if node.status is not RUNNING:
+            set_current_child(node, node.children[0] if node.children else None)
+            node.initialise()
+        node.update()
+        if not children:
+            set_current_child(node, None)
+            self.stop(FAILURE)
+            return FAILURE
+
+        if node.memory:
+            index = node.children.index(cast(Behaviour, node.current_child))
+            for child in children[:index]:
+                child.stop(INVALID)
+        else:
+            index = 0
+
+        previous = node.current_child
+        for i in range(index, len(children)):
+            child = children[i]
+            status = child.tick()
+            if status is RUNNING or status is SUCCESS:
+                set_current_child(node, child.node)
+                node.status = status
+                if previous is None or previous is not child.node:
+                    # Przerwano wykonywanie innej gałęzi – zatrzymaj wszystkie gałęzie o niższym priorytecie.
+                    for lower in children[i + 1:]:
+                        if lower.node.status is not INVALID:
+                            lower.stop(INVALID)
+                return status
+
+        node.status = FAILURE
+        set_current_child(node, node.children[-1])
+        return FAILURE
+
+
+class CompiledSequence(CompiledComposite):
+    """
+    Odpowiednik metody *Sequence.tick()* (z pamięcią lub bez niej).
+    """
+    __slots__ = ()
+    node: Sequence
+
+    def tick(self) -> Status:
+        node = self.node
+        children = self.children
+        index = 0
+        if node.status is not RUNNING or not node.memory:
+            set_current_child(node, node.children[0] if node.children else None)
+            for child in children:
+                if child.node.status is not INVALID:
+                    child.stop(INVALID)
+            node.initialise()
+        else:
+            index = node.children.index(cast(Behaviour, node.current_child))
+        node.update()
+        if not children:
+            set_current_child(node, None)
+            self.stop(SUCCESS)
+            return SUCCESS
+
+        for i in range(index, len(children)):
+            status = children[i].tick()
+            if status is not SUCCESS:
+                node.status = status
+                return status
+            if i + 1 < len(children):
+                set_current_child(node, node.children[i + 1])
+        self.stop(SUCCESS)
+        return SUCCESS
+
+
+class CompiledParallel(CompiledComposite):
+    """
+    Odpowiednik metod *Parallel.tick()* oraz *Parallel.stop()* (wykorzystywanych m.in. przez idiom *eternal_guard*).
+    """
+    __slots__ = ()
+    node: Parallel
+
+    def tick(self) -> Status:
+        node = self.node
+        children = self.children
+        policy = node.policy
+        if node.status is not RUNNING:
+            for child in children:
+                if child.node.status is not INVALID:
+                    child.stop(INVALID)
+            set_current_child(node, None)
+            node.initialise()
+        if not children:
+            set_current_child(node, None)
+            self.stop(SUCCESS)
+            return SUCCESS
+
+        for child in children:
+            if policy.synchronise and child.node.status is SUCCESS:
+                continue
+            child.tick()
+
+        new_status = RUNNING
+        set_current_child(node, node.children[-1])
+        failed = next((child for child in node.children if child.status is FAILURE), None)
+        if failed is not None:
+            set_current_child(node, failed)
+            new_status = FAILURE
+        elif type(policy) is ParallelPolicy.SuccessOnAll:
+            if all(child.status is SUCCESS for child in node.children):
+                new_status = SUCCESS
+        elif type(policy) is ParallelPolicy.SuccessOnOne:
+            successful = [child for child in node.children if child.status is SUCCESS]
+            if successful:
+                new_status = SUCCESS
+                set_current_child(node, successful[-1])
+        elif type(policy) is ParallelPolicy.SuccessOnSelected:
+            if all(child.status is SUCCESS for child in policy.children):
+                new_status = SUCCESS
+                set_current_child(node, policy.children[-1])
+
+        if new_status is not RUNNING:
+            self.stop(new_status)
+        node.status = new_status
+        return new_status
+
+    def stop(self, new_status: Status):
+        for child in self.children:
+            if child.node.status is RUNNING:
+                child.stop(INVALID)
+        super().stop(new_status)
+
+
+class OpaqueBehaviour(CompiledBehaviour):
+    """
+    Węzeł, którego nie da się skompilować (np. przeciąża metodę *tick()*). Jest wykonywany przez py_trees.
+    """
+    __slots__ = ()
+
+    def tick(self) -> Status:
+        self.node.tick_once()
+        return self.node.status
+
+    def stop(self, new_status: Status):
+        self.node.stop(new_status)
+
+
+def compile_tree(root: Behaviour) -> CompiledBehaviour:
+    """
+    Kompiluje drzewo zachowań o korzeniu *root*. Skompilowane drzewo operuje na tych samych węzłach, dlatego wywołanie
+    jego metody *tick()* jest równoważne wywołaniu *root.tick_once()* – wywoływane są te same metody *initialise()*,
+    *update()* oraz *terminate()* węzłów, a statusy oraz aktywne gałęzie węzłów złożonych zmieniają się tak samo
+    (np. atrybut *current_child* selektora). Obie metody można wywoływać zamiennie na tym samym drzewie.
+
+    Obsługiwane są węzły *Selector*, *Sequence*, *Parallel*, dekoratory (np. *Inverter*) oraz węzły-liście, które nie
+    przeciążają metod *tick()* ani *stop()*. Pozostałe węzły wykonywane są przez py_trees.
+
+    Parameters
+    ----------
+    root : Behaviour
+        korzeń drzewa zachowań.
+
+    Returns
+    -------
+    out : CompiledBehaviour
+        skompilowany korzeń drzewa.
+    """
+    node_type = type(root)
+    if isinstance(root, Selector) and node_type.tick is Selector.tick and node_type.stop is Selector.stop:
+        return CompiledSelector(root, [compile_tree(child) for child in root.children])
+    if isinstance(root, Sequence) and node_type.tick is Sequence.tick and node_type.stop is Sequence.stop:
+        return CompiledSequence(root, [compile_tree(child) for child in root.children])
+    if isinstance(root, Parallel) and node_type.tick is Parallel.tick and node_type.stop is Parallel.stop:
+        root.validate_policy_configuration()
+        return CompiledParallel(root, [compile_tree(child) for child in root.children])
+    if isinstance(root, Decorator) and node_type.tick is Decorator.tick and node_type.stop is Decorator.stop:
+        return CompiledDecorator(root, [compile_tree(root.decorated)])
+    if not root.children and node_type.tick is Behaviour.tick and node_type.stop is Behaviour.stop:
+        return CompiledLeaf(root, [])
+    return OpaqueBehaviour(root, [])
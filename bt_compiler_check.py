@@ -0,0 +1,129 @@
+from py_trees.behaviour import Behaviour
+from py_trees.common import ParallelPolicy, Status
+from py_trees.composites import Parallel, Selector, Sequence
+from py_trees.decorators import Inverter
+from py_trees.idioms import eternal_guard
+from bt_compiler import compile_tree
+from typing import List, Tuple
+import argparse
+import random
+
+
+# Statusy zwracane przez liście losowych drzew.
+LEAF_STATUSES: List[Status] = [Status.SUCCESS, Status.FAILURE, Status.RUNNING]
+
+
+class RandomLeaf(Behaviour):
+    """
+    Liść zwracający losowe statusy i zapisujący w dzienniku *log* wywołania metod *initialise()*, *update()* oraz
+    *terminate()*.
+    """
+    def __init__(self, name: str, log: List[Tuple], seed: int):
+        super().__init__(name)
+        self.log:   List[Tuple]     = log
+        self.rng:   random.Random   = random.Random(seed)
+
+    def initialise(self):
+        self.log.append(("initialise", self.name))
+
+    def update(self) -> Status:
+        status = self.rng.choice(LEAF_STATUSES)
+        self.log.append(("update", self.name, status))
+        return status
+
+    def terminate(self, new_status: Status):
+        self.log.append(("terminate", self.name, new_status))
+
+
+def random_tree(rng: random.Random, log: List[Tuple], depth: int, counter: List[int]) -> Behaviour:
+    """
+    Buduje losowe drzewo zachowań o głębokości co najwyżej *depth*, złożone z selektorów i sekwencji (z pamięcią
+    i bez niej), węzłów *Parallel* z każdą z polityk, dekoratorów *Inverter*, idiomu *eternal_guard* oraz liści
+    *RandomLeaf*. Drzewa zbudowane generatorami o tym samym ziarnie są identyczne.
+    """
+    counter[0] += 1
+    name = "node{}".format(counter[0])
+    if depth == 0 or rng.random() < 0.3:
+        return RandomLeaf(name, log, rng.randrange(1 << 30))
+    kind = rng.choice(["selector", "sequence", "parallel", "inverter", "guard"])
+    if kind == "inverter":
+        return Inverter(name=name, child=random_tree(rng, log, depth - 1, counter))
+    children = [random_tree(rng, log, depth - 1, counter) for _ in range(rng.randint(1, 4))]
+    if kind == "selector":
+        return Selector(name, memory=rng.random() < 0.5, children=children)
+    if kind == "sequence":
+        return Sequence(name, memory=rng.random() < 0.5, children=children)
+    if kind == "guard":
+        conditions = children[1:] or [RandomLeaf(name + "_condition", log, rng.randrange(1 << 30))]
+        return eternal_guard(name=name, subtree=children[0], conditions=conditions)
+    policy = rng.choice([ParallelPolicy.SuccessOnAll(synchronise=rng.random() < 0.5),
+                         ParallelPolicy.SuccessOnOne(),
+                         ParallelPolicy.SuccessOnSelected(children=[children[0]], synchronise=rng.random() < 0.5)])
+    return Parallel(name, policy=policy, children=children)
+
+
+def tree_state(root: Behaviour) -> List[Tuple]:
+    """
+    Zwraca statusy wszystkich węzłów drzewa oraz nazwy aktywnych gałęzi węzłów złożonych.
+    """
+    return [(node.name, node.status, getattr(getattr(node, "current_child", None), "name", None))
+            for node in root.iterate()]
+
+
+def check_equivalence(trees: int, ticks: int, depth: int = 4, seed: int = 0) -> List[Tuple[int, int]]:
+    """
+    Porównuje wykonanie skompilowanych drzew (*compile_tree()*) z metodą *tick_once()* py_trees na *trees* parach
+    identycznych losowych drzew. Po każdym z *ticks* kroków porównywane są dzienniki wywołań metod liści, statusy
+    węzłów oraz aktywne gałęzie węzłów złożonych.
+
+    Parameters
+    ----------
+    trees : int
+        liczba losowych drzew.
+    ticks : int
+        liczba kroków wykonywanych na każdym drzewie.
+    depth : int
+        maksymalna głębokość drzew.
+    seed : int
+        ziarno pierwszego drzewa (kolejne drzewa mają kolejne ziarna).
+
+    Returns
+    -------
+    out : List[Tuple[int, int]]
+        pary (ziarno drzewa, numer kroku), w których wykonania się różnią (pusta lista, jeśli są równoważne).
+    """
+    mismatches = []
+    for tree_seed in range(seed, seed + trees):
+        interpreted_log: List[Tuple] = []
+        compiled_log: List[Tuple] = []
+        interpreted = random_tree(random.Random(tree_seed), interpreted_log, depth, [0])
+        compiled_root = random_tree(random.Random(tree_seed), compiled_log, depth, [0])
+        compiled = compile_tree(compiled_root)
+        for tick in range(ticks):
+            interpreted.tick_once()
+            compiled.tick()
+            if interpreted_log != compiled_log or tree_state(interpreted) != tree_state(compiled_root):
+                mismatches.append((tree_seed, tick))
+                break
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie skompilowanych drzew zachowań z py_trees na losowych "
+                                                 "drzewach.")
+    parser.add_argument("--trees", type=int, default=2000, help="liczba losowych drzew")
+    parser.add_argument("--ticks", type=int, default=12, help="liczba kroków wykonywanych na każdym drzewie")
+    parser.add_argument("--depth", type=int, default=4, help="maksymalna głębokość drzew")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno pierwszego drzewa")
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(args.trees, args.ticks, args.depth, args.seed)
+    for tree_seed, tick in mismatches[:10]:
+        print("drzewo {}: różnica w kroku {}".format(tree_seed, tick))
+    print("niezgodne drzewa: {} / {}".format(len(mismatches), args.trees))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+from enum import Enum
+from typing import Dict, Iterable, Tuple
+import numpy as np
+import math
+
+
+class CombatWinner(Enum):
+    Friendly = 0
+    Enemy = 1
+    Draw = 2
+
+
+class CombatGroup:
+    """
+    Grupa jednostek biorących udział w walce, opisana tablicami NumPy: punkty życia wraz z tarczą, obrażenia na sekundę
+    zadawane jednostkom naziemnym i powietrznym, zasięg ataku, szybkość poruszania się oraz to, czy jednostka lata.
+    """
+    def __init__(self, hp: np.ndarray, ground_dps: np.ndarray, air_dps: np.ndarray, attack_range: np.ndarray,
+                 speed: np.ndarray, is_flying: np.ndarray):
+        self.hp:            np.ndarray  = hp
+        self.ground_dps:    np.ndarray  = ground_dps
+        self.air_dps:       np.ndarray  = air_dps
+        self.attack_range:  np.ndarray  = attack_range
+        self.speed:         np.ndarray  = speed
+        self.is_flying:     np.ndarray  = is_flying
+
+    @classmethod
+    def empty(cls) -> "CombatGroup":
+        return cls(np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.hp)
+
+
+class UnitProfiles:
+    """
+    Tablica parametrów rodzajów jednostek potrzebnych do przewidywania wyniku walki (obrażenia na sekundę, zasięg,
+    szybkość), obliczanych raz dla każdego rodzaju jednostki. Właściwości *Unit.ground_dps* czy *Unit.ground_range*
+    przeglądają przy każdym odczycie dane broni jednostki, więc w każdym wywołaniu *group()* odczytywane są jedynie
+    punkty życia i tarczy jednostek.
+    """
+    def __init__(self):
+        self.profiles: Dict[UnitTypeId, Tuple[float, float, float, float, bool]] = {}
+
+    def profile(self, unit: Unit) -> Tuple[float, float, float, float, bool]:
+        profile = self.profiles.get(unit.type_id)
+        if profile is None:
+            profile = (unit.ground_dps, unit.air_dps, max(unit.ground_range, unit.air_range), unit.movement_speed,
+                       unit.is_flying)
+            self.profiles[unit.type_id] = profile
+        return profile
+
+    def group(self, units: Iterable[Unit]) -> CombatGroup:
+        """
+        Zwraca grupę *CombatGroup* opisującą jednostki *units*.
+        """
+        rows = [(unit.health + unit.shield,) + self.profile(unit) for unit in units]
+        if not rows:
+            return CombatGroup.empty()
+        data = np.array(rows, dtype=np.float64)
+        return CombatGroup(data[:, 0], data[:, 1], data[:, 2], data[:, 3], data[:, 4], data[:, 5] > 0)
+
+
+class CombatPrediction:
+    """
+    Przewidywany wynik walki: zwycięzca, ułamek siły (obrażeń na sekundę) pozostałej każdej ze stron po walce,
+    pozostała siła zwycięzcy oraz przewidywany czas walki w sekundach. Atrybut *ratio* jest stosunkiem siły bojowej
+    (iloczynu obrażeń na sekundę i punktów życia) bota do siły bojowej przeciwnika.
+    """
+    __slots__ = ("winner", "friendly_remaining", "enemy_remaining", "remaining_strength", "duration", "ratio")
+
+    def __init__(self, winner: CombatWinner, friendly_remaining: float, enemy_remaining: float,
+                 remaining_strength: float, duration: float, ratio: float):
+        self.winner:                CombatWinner    = winner
+        self.friendly_remaining:    float           = friendly_remaining
+        self.enemy_remaining:       float           = enemy_remaining
+        self.remaining_strength:    float           = remaining_strength
+        self.duration:              float           = duration
+        self.ratio:                 float           = ratio
+
+
+def effective_dps(attackers: CombatGroup, targets: CombatGroup, target_hp: float) -> np.ndarray:
+    """
+    Zwraca obrażenia na sekundę każdej z jednostek *attackers* zadawane grupie *targets*: obrażenia zadawane
+    jednostkom naziemnym i powietrznym ważone są udziałem jednostek naziemnych i powietrznych w punktach życia celów.
+    """
+    if target_hp <= 0.:
+        return attackers.ground_dps
+    air_share = float(targets.hp[targets.is_flying].sum()) / target_hp
+    return attackers.ground_dps * (1. - air_share) + attackers.air_dps * air_share
+
+
+def approach_times(attackers: CombatGroup, targets: CombatGroup) -> np.ndarray:
+    """
+    Zwraca czas, jaki każda z jednostek *attackers* potrzebuje na zbliżenie się do celów na odległość swojego ataku,
+    jeśli cele mają większy zasięg (i mogą atakować jeszcze przed wejściem w zasięg atakującego).
+    """
+    if len(targets) == 0:
+        return np.zeros(len(attackers))
+    reach = float(targets.attack_range.max())
+    return np.maximum(reach - attackers.attack_range, 0.) / np.maximum(attackers.speed, 0.5)
+
+
+def lanchester(dps_a: float, hp_a: float, dps_b: float, hp_b: float) -> Tuple[float, float, float]:
+    """
+    Rozwiązuje model walki Lanchestera (prawo kwadratowe: każda ze stron zadaje obrażenia proporcjonalne do liczby
+    swoich żyjących jednostek) dla dwóch stron o łącznych obrażeniach na sekundę *dps* i punktach życia *hp*.
+
+    Returns
+    -------
+    out : Tuple[float, float, float]
+        ułamek sił pozostałych stronie a, ułamek sił pozostałych stronie b oraz czas walki w sekundach.
+    """
+    if hp_a <= 0. or hp_b <= 0.:
+        return float(hp_a > 0.), float(hp_b > 0.), 0.
+    if dps_a <= 0. or dps_b <= 0.:
+        # Strona, która nie zadaje obrażeń, nie zmniejsza sił przeciwnika.
+        if dps_a > 0.:
+            return 1., 0., hp_b / dps_a
+        if dps_b > 0.:
+            return 0., 1., hp_a / dps_b
+        return 1., 1., math.inf
+    strength_a, strength_b = dps_a * hp_a, dps_b * hp_b
+    rate = math.sqrt(dps_a * dps_b / (hp_a * hp_b))
+    if strength_a == strength_b:
+        return 0., 0., math.inf
+    if strength_a > strength_b:
+        ratio = strength_b / strength_a
+        return math.sqrt(1. - ratio), 0., math.atanh(math.sqrt(ratio)) / rate
+    ratio = strength_a / strength_b
+    return 0., math.sqrt(1. - ratio), math.atanh(math.sqrt(ratio)) / rate
+
+
+def predict_combat(friendly: CombatGroup, enemy: CombatGroup, enemy_scale: float = 1.,
+                   nominal_duration: float = 10.) -> CombatPrediction:
+    """
+    Przewiduje wynik walki grup *friendly* oraz *enemy* na podstawie modelu Lanchestera. Obrażenia na sekundę każdej
+    jednostki uwzględniają udział jednostek naziemnych i powietrznych w przeciwnej grupie oraz zmniejszane są
+    proporcjonalnie do czasu, przez który jednostka o mniejszym zasięgu zbliża się do przeciwnika, nie atakując
+    (względem czasu walki przewidywanego bez uwzględnienia zasięgu lub *nominal_duration*, jeśli walka nie zostałaby
+    rozstrzygnięta).
+
+    Parameters
+    ----------
+    friendly : CombatGroup
+        jednostki bota.
+    enemy : CombatGroup
+        jednostki przeciwnika.
+    enemy_scale : float
+        mnożnik obrażeń na sekundę i punktów życia przeciwnika (np. dla jednostek, które przeciwnik posiada, ale nie
+        są obecnie widoczne).
+    nominal_duration : float
+        czas walki używany do oceny wpływu zasięgu, jeśli nie da się go przewidzieć.
+
+    Returns
+    -------
+    out : CombatPrediction
+        przewidywany wynik walki.
+    """
+    hp_f, visible_hp_e = float(friendly.hp.sum()), float(enemy.hp.sum())
+    hp_e = visible_hp_e * enemy_scale
+    dps_f = effective_dps(friendly, enemy, visible_hp_e)
+    dps_e = effective_dps(enemy, friendly, hp_f) * enemy_scale
+
+    duration = lanchester(float(dps_f.sum()), hp_f, float(dps_e.sum()), hp_e)[2]
+    if not math.isfinite(duration) or duration <= 0.:
+        duration = nominal_duration
+    dps_f = dps_f * (duration / (duration + approach_times(friendly, enemy)))
+    dps_e = dps_e * (duration / (duration + approach_times(enemy, friendly)))
+
+    total_f, total_e = float(dps_f.sum()), float(dps_e.sum())
+    friendly_remaining, enemy_remaining, duration = lanchester(total_f, hp_f, total_e, hp_e)
+    strength_f, strength_e = total_f * hp_f, total_e * hp_e
+    ratio = strength_f / strength_e if strength_e > 0. else math.inf
+    if friendly_remaining > 0. and enemy_remaining == 0.:
+        winner, remaining = CombatWinner.Friendly, friendly_remaining * total_f
+    elif enemy_remaining > 0. and friendly_remaining == 0.:
+        winner, remaining = CombatWinner.Enemy, enemy_remaining * total_e
+    else:
+        winner, remaining = CombatWinner.Draw, 0.
+    return CombatPrediction(winner, friendly_remaining, enemy_remaining, remaining, duration, ratio)
@@ -0,0 +1,107 @@
+from sc2.unit import Unit
+from sc2.unit_command import UnitCommand
+from typing import Any, Dict, List, Tuple
+from itertools import groupby
+
+
+class CommandStats:
+    """
+    Statystyki rozkazów wydanych jednostkom w jednej klatce gry.
+    """
+    def __init__(self):
+        self.issued:        int = 0     # Liczba rozkazów wydanych przez kontrolery i bota.
+        self.duplicates:    int = 0     # Liczba odrzuconych rozkazów powtórzonych w tej samej klatce gry.
+        self.sent:          int = 0     # Liczba rozkazów przekazanych do gry.
+        self.raw_actions:   int = 0     # Liczba akcji w zapytaniu do gry po połączeniu identycznych rozkazów.
+
+    def add(self, other: "CommandStats"):
+        self.issued += other.issued
+        self.duplicates += other.duplicates
+        self.sent += other.sent
+        self.raw_actions += other.raw_actions
+
+
+class CommandBuffer:
+    """
+    Bufor rozkazów pośredniczący pomiędzy kontrolerami jednostek a klientem gry. Rozkazy wydawane w trakcie jednego
+    wywołania metody *on_step()* bota (np. *unit.move()* lub *unit.attack()*) trafiają do listy *bot.actions*, a przed
+    wysłaniem do gry przetwarzane są przez metodę *flush()*, która:
+
+    - odrzuca rozkazy powtórzone dla tej samej jednostki w tej samej klatce gry,
+    - ustawia obok siebie identyczne rozkazy różnych jednostek, tak aby klient gry połączył je w jedną akcję
+      obejmującą wiele jednostek (funkcja *combine_actions()* łączy jedynie sąsiadujące ze sobą rozkazy).
+
+    Kolejność rozkazów wydanych tej samej jednostce jest zachowywana. Rozkazy identyczne z rozkazem, który jednostka
+    już wykonuje, odrzuca klient gry (*BotAI.prevent_double_actions()* w *_do_actions()*).
+    """
+    def __init__(self):
+        self.last_frame:    CommandStats    = CommandStats()
+        self.total:         CommandStats    = CommandStats()
+        self.frames:        int             = 0
+
+    @staticmethod
+    def command_key(action: UnitCommand) -> Tuple[Any, ...]:
+        target = action.target.tag if isinstance(action.target, Unit) else action.target
+        return action.ability, target, action.queue
+
+    @staticmethod
+    def count_raw_actions(actions: List[UnitCommand]) -> int:
+        """
+        Zwraca liczbę akcji, które klient gry utworzy z podanej listy rozkazów.
+
+        Parameters
+        ----------
+        actions : List[UnitCommand]
+            lista rozkazów w kolejności wysyłania.
+
+        Returns
+        -------
+        out : int
+            liczba akcji.
+        """
+        count = 0
+        for (_, _, _, combineable), items in groupby(actions, key=lambda a: a.combining_tuple):
+            count += 1 if combineable else len(list(items))
+        return count
+
+    def flush(self, actions: List[UnitCommand]):
+        """
+        Przetwarza rozkazy wydane w obecnej klatce gry w sposób opisany w dokumentacji klasy oraz aktualizuje
+        statystyki. Lista *actions* jest modyfikowana w miejscu – po wywołaniu zawiera rozkazy, które powinny zostać
+        wysłane do gry.
+
+        Parameters
+        ----------
+        actions : List[UnitCommand]
+            rozkazy wydane w obecnej klatce gry.
+        """
+        stats = CommandStats()
+        stats.issued = len(actions)
+
+        per_unit: Dict[int, List[UnitCommand]] = {}
+        seen = set()
+        for action in actions:
+            key = (action.unit.tag,) + self.command_key(action)
+            if key in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(key)
+            per_unit.setdefault(action.unit.tag, []).append(action)
+
+        # Jednostki z pojedynczym rozkazem grupowane są według rozkazu, co pozwala połączyć je w jedną akcję. Jednostki
+        # z wieloma rozkazami (np. Blink i ruch) zachowują oryginalną kolejność.
+        groups: Dict[Tuple[Any, ...], List[UnitCommand]] = {}
+        sequences: List[UnitCommand] = []
+        for commands in per_unit.values():
+            if len(commands) == 1:
+                groups.setdefault(self.command_key(commands[0]), []).append(commands[0])
+            else:
+                sequences.extend(commands)
+        result = [action for group in groups.values() for action in group] + sequences
+
+        stats.sent = len(result)
+        stats.raw_actions = self.count_raw_actions(result)
+        self.last_frame = stats
+        self.total.add(stats)
+        self.frames += 1
+        actions[:] = result
@@ -0,0 +1,114 @@
+from unit_ai_data import UnitAiController
+from typing import Callable, Deque, Dict, Set
+from collections import deque
+import time
+
+
+class ControllerScheduler:
+    """
+    Planista wywołań kontrolerów jednostek (maszyn stanów lub drzew zachowań) ograniczający czas, jaki warstwa
+    sterowania jednostkami może zużyć w jednym wywołaniu metody *on_step()* bota.
+
+    W każdym kroku planista zawsze aktualizuje kontrolery pilne – jednostek, które walczą, zostały właśnie zranione
+    lub nie były jeszcze ani razu aktualizowane. Pozostałe kontrolery (jednostek przemieszczających się lub
+    bezczynnych) aktualizowane są po kolei (round-robin), dopóki nie zostanie przekroczony budżet czasu *budget*.
+    Kontrolery, na które nie starczyło czasu, są aktualizowane w pierwszej kolejności w następnych krokach.
+
+    Planista zbiera także statystyki: liczbę pominiętych aktualizacji, czas zużyty w ostatnim kroku oraz najdłuższy
+    czas oczekiwania kontrolera na aktualizację (liczony w krokach).
+    """
+    def __init__(self, budget: float = 0.02, min_idle_ticks: int = 4, clock: Callable[[], float] = time.perf_counter):
+        # Budżet czasu (w sekundach) przeznaczony na aktualizację kontrolerów w jednym kroku.
+        self.budget:            float               = budget
+
+        # Minimalna liczba niepilnych kontrolerów aktualizowanych w każdym kroku, nawet po przekroczeniu budżetu, tak
+        # aby żaden z nich nie czekał w nieskończoność.
+        self.min_idle_ticks:    int                 = min_idle_ticks
+        self.clock:             Callable[[], float] = clock
+
+        self.queue:             Deque[int]          = deque()
+        self.last_tick:         Dict[int, int]      = {}
+        self.step:              int                 = 0
+
+        # Statystyki.
+        self.ticked:            int                 = 0
+        self.skipped:           int                 = 0
+        self.total_ticked:      int                 = 0
+        self.total_skipped:     int                 = 0
+        self.elapsed:           float               = 0.
+        self.overruns:          int                 = 0
+        self.max_staleness:     int                 = 0
+
+    def staleness(self, tag: int) -> int:
+        """
+        Zwraca liczbę kroków, które upłynęły od ostatniej aktualizacji kontrolera jednostki o tagu *tag*.
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki.
+
+        Returns
+        -------
+        out : int
+            liczba kroków od ostatniej aktualizacji lub 0, jeśli kontroler nie jest znany planiście.
+        """
+        last_tick = self.last_tick.get(tag, -1)
+        return self.step - last_tick if last_tick >= 0 else 0
+
+    def tick_controller(self, tag: int, controller: UnitAiController):
+        self.max_staleness = max(self.max_staleness, self.staleness(tag))
+        controller.update()
+        self.last_tick[tag] = self.step
+        self.ticked += 1
+
+    def run(self, controllers: Dict[int, UnitAiController], is_urgent: Callable[[int, UnitAiController], bool]):
+        """
+        Aktualizuje kontrolery jednostek zgodnie z opisaną w dokumentacji klasy strategią.
+
+        Parameters
+        ----------
+        controllers : Dict[int, UnitAiController]
+            słownik kontrolerów jednostek, których kluczami są tagi jednostek.
+        is_urgent : Callable[[int, UnitAiController], bool]
+            funkcja zwracająca True dla kontrolerów, które muszą zostać zaktualizowane w obecnym kroku.
+        """
+        start = self.clock()
+        self.step += 1
+        self.ticked = 0
+
+        # Nowe kontrolery dołączają na koniec kolejki i są aktualizowane od razu jako pilne.
+        for tag in controllers:
+            if tag not in self.last_tick:
+                self.last_tick[tag] = -1
+                self.queue.append(tag)
+
+        ticked: Set[int] = set()
+        for tag, controller in controllers.items():
+            if self.last_tick[tag] < 0 or is_urgent(tag, controller):
+                self.tick_controller(tag, controller)
+                ticked.add(tag)
+
+        idle_ticks = 0
+        for _ in range(len(self.queue)):
+            if idle_ticks >= self.min_idle_ticks and self.clock() - start >= self.budget:
+                break
+            tag = self.queue.popleft()
+            queued = controllers.get(tag)
+            if queued is None:
+                # Jednostka przestała istnieć – zapomnij o jej kontrolerze.
+                self.last_tick.pop(tag, None)
+                continue
+            self.queue.append(tag)
+            if tag in ticked:
+                continue
+            self.tick_controller(tag, queued)
+            ticked.add(tag)
+            idle_ticks += 1
+
+        self.skipped = len(controllers) - len(ticked)
+        self.total_ticked += self.ticked
+        self.total_skipped += self.skipped
+        self.elapsed = self.clock() - start
+        if self.elapsed > self.budget:
+            self.overruns += 1
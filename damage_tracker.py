@@ -0,0 +1,180 @@
+from sc2.units import Units
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class DamageTracker:
+    """
+    Klasa śledząca utratę punktów życia oraz tarczy przez jednostki bota. Zamiast przechowywać pełne obiekty *Unit*
+    z poprzedniej klatki gry, każdej jednostce przydzielany jest indeks (slot) w tablicach NumPy, w których zapamiętane
+    są jej ostatnio widziane punkty życia i tarczy. W każdym wywołaniu metody *update()* maska jednostek, które
+    utraciły punkty życia lub tarczy, obliczana jest w sposób zwektoryzowany.
+
+    Dodatkowo, w tablicy o rozmiarze (*window*, liczba slotów) przechowywane są obrażenia otrzymane przez jednostki
+    w ostatnich *window* aktualizacjach, co pozwala sprawdzić ile obrażeń jednostka otrzymała w ostatnim czasie.
+    """
+    def __init__(self, window: int = 8, capacity: int = 64):
+        self.window:            int                 = window
+        self.slots:             Dict[int, int]      = {}
+        self.free_slots:        List[int]           = []
+        self.slot_tags:         np.ndarray          = np.zeros(capacity, dtype=np.int64)
+        self.health:            np.ndarray          = np.zeros(capacity, dtype=np.float32)
+        self.shield:            np.ndarray          = np.zeros(capacity, dtype=np.float32)
+        self.known:             np.ndarray          = np.zeros(capacity, dtype=bool)
+        self.damaged:           np.ndarray          = np.zeros(capacity, dtype=bool)
+        self.damage_history:    np.ndarray          = np.zeros((window, capacity), dtype=np.float32)
+        self.history_index:     int                 = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.health)
+
+    def grow(self):
+        """
+        Podwaja rozmiar tablic przechowujących dane jednostek.
+        """
+        capacity = self.capacity
+        self.slot_tags = np.concatenate([self.slot_tags, np.zeros(capacity, dtype=np.int64)])
+        self.health = np.concatenate([self.health, np.zeros(capacity, dtype=np.float32)])
+        self.shield = np.concatenate([self.shield, np.zeros(capacity, dtype=np.float32)])
+        self.known = np.concatenate([self.known, np.zeros(capacity, dtype=bool)])
+        self.damaged = np.concatenate([self.damaged, np.zeros(capacity, dtype=bool)])
+        self.damage_history = np.concatenate([self.damage_history,
+                                              np.zeros((self.window, capacity), dtype=np.float32)], axis=1)
+
+    def slot_of(self, tag: int) -> int:
+        """
+        Zwraca slot przydzielony jednostce o tagu *tag*, przydzielając nowy, jeśli jednostka nie posiada jeszcze slotu.
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki.
+
+        Returns
+        -------
+        out : int
+            indeks slotu jednostki.
+        """
+        slot = self.slots.get(tag)
+        if slot is None:
+            if self.free_slots:
+                slot = self.free_slots.pop()
+            else:
+                slot = len(self.slots)
+                if slot >= self.capacity:
+                    self.grow()
+            self.slots[tag] = slot
+            self.slot_tags[slot] = tag
+        return slot
+
+    def update(self, units: Units):
+        """
+        Porównuje punkty życia oraz tarczy podanych jednostek z wartościami zapamiętanymi przy poprzedniej aktualizacji
+        i zapamiętuje, które jednostki zostały zranione oraz ile obrażeń otrzymały. Metoda powinna być wywoływana raz
+        na każde wywołanie metody *on_step()* bota.
+
+        Parameters
+        ----------
+        units : Units
+            jednostki bota, których stan należy porównać.
+        """
+        count = len(units)
+        indices = np.empty(count, dtype=np.int64)
+        health = np.empty(count, dtype=np.float32)
+        shield = np.empty(count, dtype=np.float32)
+        for i, unit in enumerate(units):
+            indices[i] = self.slot_of(unit.tag)
+            health[i] = unit.health
+            shield[i] = unit.shield
+
+        known = self.known[indices]
+        health_lost = np.maximum(self.health[indices] - health, 0.) * known
+        shield_lost = np.maximum(self.shield[indices] - shield, 0.) * known
+
+        self.damaged[:] = False
+        self.damaged[indices] = (health_lost > 0) | (shield_lost > 0)
+
+        self.history_index = (self.history_index + 1) % self.window
+        self.damage_history[self.history_index] = 0.
+        self.damage_history[self.history_index, indices] = health_lost + shield_lost
+
+        self.health[indices] = health
+        self.shield[indices] = shield
+        self.known[indices] = True
+
+    def remove(self, tag: int):
+        """
+        Zapomina jednostkę o tagu *tag* (np. po jej zniszczeniu) oraz zwalnia jej slot.
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki.
+        """
+        slot = self.slots.pop(tag, None)
+        if slot is None:
+            return
+        self.known[slot] = False
+        self.damaged[slot] = False
+        self.damage_history[:, slot] = 0.
+        self.free_slots.append(slot)
+
+    def is_unit_attacked(self, tag: int) -> bool:
+        """
+        Zwraca True, jeśli jednostka o tagu *tag* utraciła punkty życia lub tarczy podczas ostatniej aktualizacji.
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki do sprawdzenia.
+
+        Returns
+        -------
+        out : bool
+            wartość opisanego wyżej sprawdzenia.
+        """
+        slot = self.slots.get(tag)
+        return slot is not None and bool(self.damaged[slot])
+
+    def damaged_count(self) -> int:
+        """
+        Zwraca liczbę jednostek, które utraciły punkty życia lub tarczy podczas ostatniej aktualizacji.
+        """
+        return int(np.count_nonzero(self.damaged))
+
+    def damage_taken(self, tag: int, updates: Optional[int] = None) -> float:
+        """
+        Zwraca sumę obrażeń (utraconych punktów życia oraz tarczy), które jednostka o tagu *tag* otrzymała w ciągu
+        ostatnich *updates* aktualizacji (domyślnie w całym oknie *window*).
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki.
+        updates : Optional[int]
+            liczba ostatnich aktualizacji, nie większa niż *window*.
+
+        Returns
+        -------
+        out : float
+            suma otrzymanych obrażeń.
+        """
+        slot = self.slots.get(tag)
+        if slot is None:
+            return 0.
+        updates = self.window if updates is None else min(updates, self.window)
+        rows = (self.history_index - np.arange(updates)) % self.window
+        return float(self.damage_history[rows, slot].sum())
+
+    @property
+    def damaged_tags(self) -> List[int]:
+        """
+        Zwraca tagi jednostek, które utraciły punkty życia lub tarczy podczas ostatniej aktualizacji.
+
+        Returns
+        -------
+        out : List[int]
+            lista tagów zranionych jednostek.
+        """
+        return self.slot_tags[np.flatnonzero(self.damaged)].tolist()
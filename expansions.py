@@ -0,0 +1,189 @@
+from sc2.position import Point2
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import hashlib
+import json
+import os
+
+
+class ExpansionTable:
+    """
+    Tablica lokacji z surowcami (wraz z lokacjami startowymi) oraz odległości pomiędzy każdą parą lokacji, mierzonych
+    długością ścieżki jednostki naziemnej. Tablica jest obliczana raz, na początku gry (jednym zapytaniem do gry
+    o wszystkie pary lokacji), a następnie zapisywana na dysku – kolejne gry na tej samej mapie wczytują ją z pliku,
+    którego nazwa zawiera nazwę mapy oraz skrót jej ukształtowania terenu i lokacji (metoda *cache_key()*).
+
+    Ponieważ przechowywane są odległości pomiędzy wszystkimi parami lokacji, ta sama tablica służy graczowi
+    rozpoczynającemu grę w dowolnej lokacji startowej. Kolejność lokacji według odległości od danej lokacji obliczana
+    jest raz i zapamiętywana.
+    """
+    def __init__(self, locations: List[Point2], distances: np.ndarray):
+        self.locations:     List[Point2]            = locations
+        self.distances:     np.ndarray              = distances
+        self.orders:        Dict[int, List[int]]    = {}
+
+    @staticmethod
+    def cache_key(map_name: str, terrain: Iterable[bytes], locations: Iterable[Point2]) -> str:
+        """
+        Zwraca nazwę pliku, pod którą zapisywana jest tablica dla mapy *map_name*.
+
+        Parameters
+        ----------
+        map_name : str
+            nazwa mapy.
+        terrain : Iterable[bytes]
+            dane opisujące ukształtowanie terenu mapy (np. mapa wysokości oraz siatka możliwych miejsc budowy).
+        locations : Iterable[Point2]
+            lokacje z surowcami.
+
+        Returns
+        -------
+        out : str
+            nazwa pliku.
+        """
+        digest = hashlib.sha1()
+        for data in terrain:
+            digest.update(data)
+        for location in sorted(locations):
+            digest.update("{:.2f},{:.2f};".format(location.x, location.y).encode())
+        name = "".join(character if character.isalnum() else "_" for character in map_name)
+        return "{}_{}.json".format(name, digest.hexdigest()[:16])
+
+    @classmethod
+    async def compute(cls, client, locations: List[Point2], start_locations: Sequence[Point2],
+                      map_center: Point2, start_offset: float = 4.) -> "ExpansionTable":
+        """
+        Oblicza tablicę odległości pomiędzy lokacjami jednym zapytaniem do gry o długości ścieżek.
+
+        Parameters
+        ----------
+        client
+            klient gry (obiekt udostępniający metodę *query_pathings()*).
+        locations : List[Point2]
+            lokacje z surowcami.
+        start_locations : Sequence[Point2]
+            lokacje startowe graczy. Środek lokacji startowej zajmuje główny budynek, więc ścieżki wyznaczane są od
+            punktu przesuniętego o *start_offset* w stronę środka mapy.
+        map_center : Point2
+            środek mapy.
+        start_offset : float
+            przesunięcie punktów, od których wyznaczane są ścieżki z lokacji startowych.
+
+        Returns
+        -------
+        out : ExpansionTable
+            obliczona tablica.
+        """
+        locations = sorted(locations)
+        points = [location.towards(map_center, start_offset)
+                  if any(location.distance_to_point2(start) < 1. for start in start_locations) else location
+                  for location in locations]
+
+        pairs = [(i, j) for i in range(len(points)) for j in range(i + 1, len(points))]
+        distances = np.zeros((len(points), len(points)))
+        if pairs:
+            results = await client.query_pathings([[points[i], points[j]] for i, j in pairs])
+            for (i, j), distance in zip(pairs, results):
+                # Gra zwraca 0, jeśli ścieżka nie istnieje – wtedy używana jest odległość w linii prostej.
+                if distance <= 0.:
+                    distance = locations[i].distance_to_point2(locations[j])
+                distances[i, j] = distances[j, i] = distance
+        return cls(locations, distances)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ExpansionTable"]:
+        """
+        Wczytuje tablicę z pliku *path* lub zwraca None, jeśli plik nie istnieje albo jest uszkodzony.
+        """
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+            locations = [Point2((x, y)) for x, y in data["locations"]]
+            distances = np.array(data["distances"], dtype=np.float64).reshape(len(locations), len(locations))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return cls(locations, distances)
+
+    def save(self, path: str):
+        """
+        Zapisuje tablicę do pliku *path*, tworząc w razie potrzeby katalog, w którym plik ma się znajdować.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"locations": [[location.x, location.y] for location in self.locations],
+                       "distances": self.distances.tolist()}, file)
+
+    def index_of(self, position: Point2) -> int:
+        """
+        Zwraca indeks lokacji najbliższej pozycji *position*.
+        """
+        return min(range(len(self.locations)), key=lambda i: self.locations[i].distance_to_point2(position))
+
+    def order_from(self, position: Point2) -> List[int]:
+        """
+        Zwraca indeksy lokacji uporządkowane według długości ścieżki od lokacji najbliższej pozycji *position*.
+        """
+        origin = self.index_of(position)
+        order = self.orders.get(origin)
+        if order is None:
+            order = np.argsort(self.distances[origin], kind="stable").tolist()
+            self.orders[origin] = order
+        return order
+
+    def nearest_free_expansion(self, origin: Point2, occupied: Iterable[Point2],
+                               occupied_radius: float = 3.) -> Optional[Point2]:
+        """
+        Zwraca najbliższą (według długości ścieżki) od *origin* lokację z surowcami, w której odległości mniejszej
+        niż *occupied_radius* nie znajduje się żadna z pozycji *occupied* (np. główne budynki graczy).
+
+        Parameters
+        ----------
+        origin : Point2
+            pozycja, od której liczone są odległości (np. lokacja startowa bota).
+        occupied : Iterable[Point2]
+            pozycje głównych budynków zajmujących lokacje.
+        occupied_radius : float
+            odległość od lokacji, w której główny budynek ją zajmuje.
+
+        Returns
+        -------
+        out : Optional[Point2]
+            wolna lokacja lub None, jeśli wszystkie lokacje są zajęte.
+        """
+        occupied = list(occupied)
+        for i in self.order_from(origin):
+            location = self.locations[i]
+            if all(location.distance_to_point2(position) >= occupied_radius for position in occupied):
+                return location
+        return None
+
+    def scouting_targets(self, enemy_start_locations: Sequence[Point2], origin: Point2) -> List[Point2]:
+        """
+        Zwraca kolejność, w jakiej należy odwiedzać lokacje w poszukiwaniu przeciwnika: najpierw lokacje startowe
+        przeciwnika (od najbliższej pozycji *origin*), a następnie pozostałe lokacje według długości ścieżki do
+        najbliższej lokacji startowej przeciwnika – w pierwszej kolejności te, które przeciwnik zajmie najwcześniej.
+
+        Parameters
+        ----------
+        enemy_start_locations : Sequence[Point2]
+            możliwe lokacje startowe przeciwnika.
+        origin : Point2
+            pozycja, od której rozpoczyna się poszukiwanie (np. lokacja startowa bota).
+
+        Returns
+        -------
+        out : List[Point2]
+            lokacje do odwiedzenia.
+        """
+        enemy_starts = {self.index_of(location) for location in enemy_start_locations}
+        from_origin = self.order_from(origin)
+        first = [i for i in from_origin if i in enemy_starts]
+        if not first:
+            return [self.locations[i] for i in from_origin]
+
+        rest = [i for i in range(len(self.locations)) if i not in enemy_starts]
+        to_enemy = {i: min(self.distances[i, start] for start in enemy_starts) for i in rest}
+        rest.sort(key=lambda i: to_enemy[i])
+        return [self.locations[i] for i in first + rest]
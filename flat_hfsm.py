@@ -0,0 +1,242 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+Handler = Callable[[], None]
+
+
+class FlatHfsmSpec:
+    """
+    Opis struktury hierarchicznej maszyny stanów (stany, ich hierarchia oraz przejścia), który metoda *compile()*
+    zamienia na tablice przejść indeksowane numerami stanów oraz zdarzeń. Stany i zdarzenia identyfikowane są liczbami
+    całkowitymi, a wszystkie decyzje, które biblioteka pysm podejmuje przy każdym wywołaniu *dispatch()* (wyszukanie
+    przejścia w stanach nadrzędnych, wyjście ze stanów aż do wspólnego przodka, wejście do stanu docelowego oraz jego
+    stanów początkowych), są obliczane raz, przy kompilacji.
+
+    Semantyka jest zgodna z pysm: zdarzenie trafia najpierw do procedury obsługi stanu-liścia (lub najbliższego
+    przodka, który ją posiada), a następnie wyszukiwane jest przejście, zaczynając od liścia w górę hierarchii. Przy
+    ponownym wejściu do stanu złożonego aktywny staje się jego stan początkowy.
+
+    Jeden skompilowany opis może być współdzielony przez wiele maszyn stanów *FlatHfsm*.
+    """
+    ENTER: str = "enter"
+    EXIT: str = "exit"
+
+    def __init__(self):
+        self.state_names:       List[str]                           = []
+        self.parents:           List[int]                           = []
+        self.initial_children:  Dict[int, int]                      = {}
+        self.event_names:       List[str]                           = []
+        self.event_ids:         Dict[str, int]                      = {}
+        self.transitions:       Dict[Tuple[int, int], int]          = {}
+
+        # Tablice wypełniane przez metodę compile(), indeksowane [stan-liść][zdarzenie].
+        self.targets:           List[List[int]]                     = []
+        self.exits:             List[List[Tuple[int, ...]]]         = []
+        self.enters:            List[List[Tuple[int, ...]]]         = []
+        self.initial_leaf:      int                                 = -1
+        self.compiled:          bool                                = False
+
+    def add_state(self, name: str, parent: Optional[int] = None, initial: bool = False) -> int:
+        """
+        Dodaje stan do maszyny stanów. Pierwszy dodany stan (bez rodzica) jest korzeniem hierarchii.
+
+        Parameters
+        ----------
+        name : str
+            nazwa stanu.
+        parent : Optional[int]
+            numer stanu nadrzędnego lub None dla korzenia.
+        initial : bool
+            determinuje, czy stan jest stanem początkowym swojego rodzica.
+
+        Returns
+        -------
+        out : int
+            numer dodanego stanu.
+        """
+        assert not self.compiled, "Cannot add states to a compiled FlatHfsmSpec."
+        assert parent is not None or not self.state_names, "Only the first state may be the root state."
+        state = len(self.state_names)
+        self.state_names.append(name)
+        self.parents.append(-1 if parent is None else parent)
+        if parent is not None and (initial or parent not in self.initial_children):
+            self.initial_children[parent] = state
+        return state
+
+    def event(self, name: str) -> int:
+        """
+        Zwraca numer zdarzenia o nazwie *name*, rejestrując je, jeśli nie było jeszcze znane.
+        """
+        event = self.event_ids.get(name)
+        if event is None:
+            assert not self.compiled, "Cannot add events to a compiled FlatHfsmSpec."
+            event = self.event_ids[name] = len(self.event_names)
+            self.event_names.append(name)
+        return event
+
+    def add_transition(self, from_state: int, to_state: int, events: Sequence[str]):
+        """
+        Dodaje przejście ze stanu *from_state* do stanu *to_state* wyzwalane przez podane zdarzenia. Oba stany muszą
+        mieć tego samego rodzica (tak jak w przypadku przejść dodawanych do maszyny stanów pysm).
+        """
+        assert self.parents[from_state] == self.parents[to_state], "Transition states must share a parent state."
+        for name in events:
+            self.transitions[(from_state, self.event(name))] = to_state
+
+    def ancestors(self, state: int) -> List[int]:
+        """
+        Zwraca listę zawierającą stan *state* oraz wszystkich jego przodków, aż do korzenia.
+        """
+        result = []
+        while state >= 0:
+            result.append(state)
+            state = self.parents[state]
+        return result
+
+    def leaf_of(self, state: int) -> int:
+        """
+        Zwraca stan-liść, który staje się aktywny po wejściu do stanu *state* (schodząc po stanach początkowych).
+        """
+        while state in self.initial_children:
+            state = self.initial_children[state]
+        return state
+
+    def compile(self) -> "FlatHfsmSpec":
+        """
+        Oblicza tablice przejść dla każdej pary (stan-liść, zdarzenie).
+
+        Returns
+        -------
+        out : FlatHfsmSpec
+            ten sam, skompilowany obiekt.
+        """
+        if self.compiled:
+            return self
+        self.event(self.ENTER)
+        self.event(self.EXIT)
+        states, events = len(self.state_names), len(self.event_names)
+        self.targets = [[-1] * events for _ in range(states)]
+        self.exits = [[()] * events for _ in range(states)]
+        self.enters = [[()] * events for _ in range(states)]
+        self.initial_leaf = self.leaf_of(0)
+
+        for leaf in range(states):
+            if leaf in self.initial_children:
+                continue
+            leaf_ancestors = self.ancestors(leaf)
+            for event in range(events):
+                from_state = to_state = -1
+                for state in leaf_ancestors:
+                    if (state, event) in self.transitions:
+                        from_state, to_state = state, self.transitions[(state, event)]
+                        break
+                if from_state < 0:
+                    continue
+
+                # Wyjście ze stanów od liścia w górę, aż do wspólnego przodka stanów *from_state* i *to_state*.
+                common = set(self.ancestors(from_state)) & set(self.ancestors(to_state))
+                exits = []
+                for state in leaf_ancestors:
+                    if state in common and not state == from_state == to_state:
+                        break
+                    exits.append(state)
+                top = self.parents[exits[-1]]
+
+                # Wejście do stanu docelowego oraz jego stanów początkowych, od góry hierarchii.
+                target = self.leaf_of(to_state)
+                enters = []
+                for state in self.ancestors(target):
+                    if state == top:
+                        break
+                    enters.append(state)
+
+                self.targets[leaf][event] = target
+                self.exits[leaf][event] = tuple(exits)
+                self.enters[leaf][event] = tuple(reversed(enters))
+        self.compiled = True
+        return self
+
+
+class FlatHfsm:
+    """
+    Maszyna stanów wykonująca skompilowany opis *FlatHfsmSpec*. Procedury obsługi zdarzeń są bezargumentowymi
+    funkcjami przypisanymi do par (stan, zdarzenie) przy tworzeniu maszyny, a wywołanie *dispatch()* sprowadza się do
+    odczytu kilku tablic – nie są tworzone żadne obiekty zdarzeń.
+    """
+    def __init__(self, spec: FlatHfsmSpec, handlers: Dict[Tuple[int, str], Handler]):
+        """
+        Parameters
+        ----------
+        spec : FlatHfsmSpec
+            opis maszyny stanów (kompilowany, jeśli nie był jeszcze skompilowany).
+        handlers : Dict[Tuple[int, str], Handler]
+            procedury obsługi zdarzeń, których kluczami są pary (numer stanu, nazwa zdarzenia). Zdarzenia "enter"
+            oraz "exit" wywoływane są przy wejściu do stanu oraz wyjściu z niego.
+        """
+        spec.compile()
+        self.spec:      FlatHfsmSpec                    = spec
+        self.leaf:      int                             = spec.initial_leaf
+        self.enter_handlers:    List[Optional[Handler]] = [None] * len(spec.state_names)
+        self.exit_handlers:     List[Optional[Handler]] = [None] * len(spec.state_names)
+
+        # Procedury obsługi zdarzeń dla każdej pary (stan-liść, zdarzenie). Jeśli liść nie obsługuje zdarzenia,
+        # zdarzenie obsługuje najbliższy przodek, który posiada odpowiednią procedurę (tak jak w pysm).
+        own: Dict[Tuple[int, int], Handler] = {}
+        for (state, name), handler in handlers.items():
+            if name == FlatHfsmSpec.ENTER:
+                self.enter_handlers[state] = handler
+            elif name == FlatHfsmSpec.EXIT:
+                self.exit_handlers[state] = handler
+            else:
+                own[(state, spec.event(name))] = handler
+        self.handlers:  List[List[Optional[Handler]]]   = []
+        for state in range(len(spec.state_names)):
+            row: List[Optional[Handler]] = []
+            for event in range(len(spec.event_names)):
+                found: Optional[Handler] = None
+                for ancestor in spec.ancestors(state):
+                    found = own.get((ancestor, event))
+                    if found is not None:
+                        break
+                row.append(found)
+            self.handlers.append(row)
+
+    def is_in(self, state: int) -> bool:
+        """
+        Zwraca True, jeśli stan *state* jest obecnym stanem-liściem lub jednym z jego przodków.
+        """
+        leaf = self.leaf
+        parents = self.spec.parents
+        while leaf >= 0:
+            if leaf == state:
+                return True
+            leaf = parents[leaf]
+        return False
+
+    @property
+    def state_name(self) -> str:
+        return self.spec.state_names[self.leaf]
+
+    def dispatch(self, event: int):
+        """
+        Przekazuje maszynie stanów zdarzenie o numerze *event* (numer zwrócony przez *FlatHfsmSpec.event()*).
+        """
+        leaf = self.leaf
+        handler = self.handlers[leaf][event]
+        if handler is not None:
+            handler()
+        spec = self.spec
+        target = spec.targets[leaf][event]
+        if target < 0:
+            return
+        exit_handlers = self.exit_handlers
+        for state in spec.exits[leaf][event]:
+            handler = exit_handlers[state]
+            if handler is not None:
+                handler()
+        self.leaf = target
+        enter_handlers = self.enter_handlers
+        for state in spec.enters[leaf][event]:
+            handler = enter_handlers[state]
+            if handler is not None:
+                handler()
@@ -0,0 +1,144 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+import inspect
+import math
+import time
+
+
+class Subsystem:
+    """
+    Podsystem bota wywoływany przez planistę *FrameScheduler* co *interval* klatek gry, wraz ze statystykami czasu
+    wykonania.
+    """
+    __slots__ = ("name", "callback", "interval", "phase", "next_frame", "calls", "total", "max_call", "last_call")
+
+    def __init__(self, name: str, callback: Callable[[], Union[None, Awaitable[None]]], interval: int, phase: int):
+        self.name:          str                                             = name
+        self.callback:      Callable[[], Union[None, Awaitable[None]]]      = callback
+        self.interval:      int                                             = interval
+        self.phase:         int                                             = phase
+        self.next_frame:    int                                             = phase
+
+        # Statystyki: liczba wywołań, łączny, najdłuższy oraz ostatni czas wykonania.
+        self.calls:         int                                             = 0
+        self.total:         float                                           = 0.
+        self.max_call:      float                                           = 0.
+        self.last_call:     float                                           = 0.
+
+    def due(self, frame: int) -> bool:
+        return frame >= self.next_frame
+
+    def advance(self, frame: int):
+        """
+        Wyznacza kolejną klatkę gry, w której podsystem powinien zostać wywołany. Jeśli od ostatniego wywołania upłynęło
+        kilka okresów (np. przy większej wartości *game_step*), pominięte wywołania nie są nadrabiane.
+        """
+        periods = (frame - self.next_frame) // self.interval + 1
+        self.next_frame += periods * self.interval
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"interval": self.interval, "phase": self.phase, "calls": self.calls, "total": self.total,
+                "mean": self.total / self.calls if self.calls else 0., "max_call": self.max_call}
+
+
+class FrameScheduler:
+    """
+    Planista podsystemów bota (sterowania jednostkami, armii, rozdziału robotników, budowy, szkolenia itp.), z których
+    każdy wywoływany jest z własną częstotliwością. Metoda *on_step()* bota wywoływana jest co *game_step* klatek gry,
+    ale np. decyzje o budowie budynków nie muszą być podejmowane tak często jak sterowanie jednostkami w walce.
+
+    Podsystem rejestrowany jest z okresem *interval* (w klatkach gry) oraz przesunięciem *phase* – wywoływany jest
+    w klatkach gry *phase*, *phase + interval*, *phase + 2 * interval* itd. (a dokładniej w pierwszym wywołaniu metody
+    *run()* w klatce nie wcześniejszej niż kolejna z nich). Okresy i przesunięcia wyrażone są w klatkach gry, a nie
+    w krokach, więc nie zależą od wartości *game_step*. Jeśli przesunięcie nie zostanie podane, planista wybiera je
+    tak, aby podsystemy o tych samych (lub współmiernych) okresach wywoływane były w różnych krokach, co rozkłada
+    obciążenie równomiernie pomiędzy kroki.
+    """
+    def __init__(self, granularity: int = 4, clock: Callable[[], float] = time.perf_counter):
+        # Odstęp (w klatkach gry) pomiędzy przesunięciami wybieranymi przez planistę – zwykle wartość *game_step*.
+        self.granularity:   int                     = granularity
+        self.clock:         Callable[[], float]     = clock
+        self.subsystems:    List[Subsystem]         = []
+
+        # Nazwy podsystemów wywołanych w ostatnim kroku oraz łączny czas ich wykonania.
+        self.last_run:      List[str]               = []
+        self.elapsed:       float                   = 0.
+
+    def choose_phase(self, interval: int) -> int:
+        """
+        Wybiera przesunięcie dla podsystemu o okresie *interval*, przy którym podsystem najrzadziej byłby wywoływany
+        w tych samych klatkach gry co zarejestrowane podsystemy (wywoływane rzadziej niż co krok). Każdy podsystem,
+        z którym wywołania mogą się pokrywać, liczy się z wagą odwrotnie proporcjonalną do swojego okresu.
+        """
+        if interval <= self.granularity:
+            return 0
+        candidates = range(0, interval, self.granularity)
+
+        def load(phase: int) -> float:
+            return sum(1. / subsystem.interval for subsystem in self.subsystems
+                       if subsystem.interval > self.granularity and
+                       (phase - subsystem.phase) % math.gcd(interval, subsystem.interval) == 0)
+        return min(candidates, key=load)
+
+    def register(self, name: str, callback: Callable[[], Union[None, Awaitable[None]]], interval: int = 1,
+                 phase: Optional[int] = None) -> Subsystem:
+        """
+        Rejestruje podsystem.
+
+        Parameters
+        ----------
+        name : str
+            nazwa podsystemu (używana w statystykach).
+        callback : Callable[[], Union[None, Awaitable[None]]]
+            funkcja lub korutyna wywoływana bez argumentów.
+        interval : int
+            okres wywołań podsystemu w klatkach gry (1 – w każdym kroku).
+        phase : Optional[int]
+            przesunięcie wywołań w klatkach gry lub None, jeśli powinno zostać wybrane przez planistę.
+
+        Returns
+        -------
+        out : Subsystem
+            zarejestrowany podsystem.
+        """
+        if interval < 1:
+            raise ValueError("Okres wywołań podsystemu musi być dodatni: {}".format(interval))
+        if phase is None:
+            phase = self.choose_phase(interval)
+        subsystem = Subsystem(name, callback, interval, phase % interval)
+        self.subsystems.append(subsystem)
+        return subsystem
+
+    async def run(self, frame: int):
+        """
+        Wywołuje (w kolejności rejestracji) podsystemy, które powinny zostać wywołane w klatce gry *frame*.
+        """
+        start = self.clock()
+        self.last_run = []
+        for subsystem in self.subsystems:
+            if not subsystem.due(frame):
+                continue
+            call_start = self.clock()
+            result = subsystem.callback()
+            if inspect.isawaitable(result):
+                await result
+            elapsed = self.clock() - call_start
+            subsystem.advance(frame)
+            subsystem.calls += 1
+            subsystem.total += elapsed
+            subsystem.max_call = max(subsystem.max_call, elapsed)
+            subsystem.last_call = elapsed
+            self.last_run.append(subsystem.name)
+        self.elapsed = self.clock() - start
+
+    def table(self) -> str:
+        """
+        Zwraca statystyki podsystemów w postaci tabeli posortowanej malejąco według łącznego czasu wykonania.
+        """
+        lines = ["{:<24} {:>9} {:>6} {:>9} {:>11} {:>10} {:>10}".format(
+            "subsystem", "interval", "phase", "calls", "total[ms]", "mean[us]", "max[us]")]
+        for subsystem in sorted(self.subsystems, key=lambda subsystem: -subsystem.total):
+            data = subsystem.to_dict()
+            lines.append("{:<24} {:>9} {:>6} {:>9} {:>11.2f} {:>10.2f} {:>10.2f}".format(
+                subsystem.name, data["interval"], data["phase"], data["calls"], data["total"] * 1e3,
+                data["mean"] * 1e6, data["max_call"] * 1e6))
+        return "\n".join(lines)
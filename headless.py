@@ -0,0 +1,670 @@
+import sc2
+from sc2.constants import IS_ATTACKING
+from sc2.data import Alliance, CloakState, DisplayType
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2, Size
+from sc2.unit import Unit, UnitOrder
+from sc2.unit_command import UnitCommand
+from sc2.units import Units
+from s2clientprotocol import raw_pb2
+from typing import Dict, List, Optional, Protocol, Tuple, Union
+from protoss_bot import ProtossBot
+from expansions import ExpansionTable
+import numpy as np
+import random
+import math
+import time
+
+
+class UnitStats:
+    """
+    Uproszczone parametry rodzaju jednostki lub budynku wykorzystywane przez symulator. Zastępują one dane gry
+    (*GameData*), które bez uruchomionego klienta StarCraft 2 nie są dostępne.
+    """
+    __slots__ = ("health", "shield", "radius", "sight_range", "ground_range", "air_range", "dps", "speed",
+                 "is_structure")
+
+    def __init__(self, health: float, shield: float, radius: float, sight_range: float, ground_range: float,
+                 air_range: float, dps: float, speed: float, is_structure: bool = False):
+        self.health:        float   = health
+        self.shield:        float   = shield
+        self.radius:        float   = radius
+        self.sight_range:   float   = sight_range
+        self.ground_range:  float   = ground_range
+        self.air_range:     float   = air_range
+        self.dps:           float   = dps
+        self.speed:         float   = speed
+        self.is_structure:  bool    = is_structure
+
+
+# Parametry jednostek odpowiadające w przybliżeniu wartościom z gry (prędkość poruszania się na szybkim tempie gry).
+UNIT_STATS: Dict[UnitTypeId, UnitStats] = {
+    UnitTypeId.PROBE:           UnitStats(20., 20., 0.375, 8., 0.1, 0., 4.7, 3.94),
+    UnitTypeId.ZEALOT:          UnitStats(100., 50., 0.5, 9., 0.1, 0., 18.6, 3.15),
+    UnitTypeId.STALKER:         UnitStats(80., 80., 0.625, 10., 6., 6., 9.7, 4.13),
+    UnitTypeId.SENTRY:          UnitStats(40., 40., 0.5, 10., 5., 5., 8.4, 3.15),
+    UnitTypeId.IMMORTAL:        UnitStats(200., 100., 0.75, 9., 6., 0., 19.2, 3.15),
+    UnitTypeId.NEXUS:           UnitStats(1000., 1000., 2.75, 11., 0., 0., 0., 0., is_structure=True),
+    UnitTypeId.PYLON:           UnitStats(200., 200., 1., 9., 0., 0., 0., 0., is_structure=True),
+    UnitTypeId.GATEWAY:         UnitStats(500., 500., 1.8125, 9., 0., 0., 0., 0., is_structure=True),
+    UnitTypeId.PHOTONCANNON:    UnitStats(150., 150., 1.125, 11., 7., 7., 22.4, 0., is_structure=True),
+}
+
+# Maksymalny dystans teleportacji zdolności Blink oraz czas jej odnowienia (w sekundach).
+BLINK_RANGE:    float = 8.
+BLINK_COOLDOWN: float = 7.
+
+
+class HeadlessAbility:
+    """
+    Zastępuje obiekt *AbilityData* w rozkazach jednostek symulatora.
+    """
+    __slots__ = ("id",)
+
+    def __init__(self, ability_id: AbilityId):
+        self.id: AbilityId = ability_id
+
+    @property
+    def exact_id(self) -> AbilityId:
+        return self.id
+
+
+class HeadlessUnit(Unit):
+    """
+    Jednostka przekazywana botowi przez symulator. Dane zapisane w komunikacie protobuf (pozycja, punkty życia, tarcza
+    itp.) obsługiwane są przez klasę bazową, natomiast właściwości, które w grze korzystają z danych gry, odczytywane
+    są z tablicy *UNIT_STATS*.
+    """
+    def __init__(self, proto_data, bot_object: sc2.BotAI, stats: UnitStats, type_id: UnitTypeId,
+                 orders: List[UnitOrder]):
+        super().__init__(proto_data, bot_object)
+        self.stats:             UnitStats       = stats
+        self.headless_type_id:  UnitTypeId      = type_id
+        self.headless_orders:   List[UnitOrder] = orders
+
+    @property
+    def type_id(self) -> UnitTypeId:
+        return self.headless_type_id
+
+    @property
+    def name(self) -> str:
+        return self.headless_type_id.name
+
+    @property
+    def is_structure(self) -> bool:
+        return self.stats.is_structure
+
+    @property
+    def sight_range(self) -> float:
+        return self.stats.sight_range
+
+    @property
+    def ground_range(self) -> float:
+        return self.stats.ground_range
+
+    @property
+    def air_range(self) -> float:
+        return self.stats.air_range
+
+    @property
+    def ground_dps(self) -> float:
+        return self.stats.dps if self.stats.ground_range > 0 else 0.
+
+    @property
+    def air_dps(self) -> float:
+        return self.stats.dps if self.stats.air_range > 0 else 0.
+
+    @property
+    def can_attack(self) -> bool:
+        return self.stats.dps > 0
+
+    @property
+    def can_attack_ground(self) -> bool:
+        return self.stats.ground_range > 0
+
+    @property
+    def can_attack_air(self) -> bool:
+        return self.stats.air_range > 0
+
+    @property
+    def can_attack_both(self) -> bool:
+        return self.can_attack_ground and self.can_attack_air
+
+    @property
+    def movement_speed(self) -> float:
+        return self.stats.speed
+
+    @property
+    def orders(self) -> List[UnitOrder]:
+        return self.headless_orders
+
+    @property
+    def order_target(self) -> Optional[Union[int, Point2]]:
+        return self.headless_orders[0].target if self.headless_orders else None
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.headless_orders
+
+    @property
+    def is_moving(self) -> bool:
+        return bool(self.headless_orders) and self.headless_orders[0].ability.id in {AbilityId.MOVE,
+                                                                                      AbilityId.MOVE_MOVE}
+
+    @property
+    def is_attacking(self) -> bool:
+        return bool(self.headless_orders) and self.headless_orders[0].ability.id in IS_ATTACKING
+
+
+class SimulatedUnit:
+    """
+    Stan pojedynczej jednostki lub budynku w symulatorze.
+    """
+    def __init__(self, tag: int, type_id: UnitTypeId, alliance: Alliance, position: Tuple[float, float]):
+        stats = UNIT_STATS[type_id]
+        self.tag:           int                                             = tag
+        self.type_id:       UnitTypeId                                      = type_id
+        self.alliance:      Alliance                                        = alliance
+        self.stats:         UnitStats                                       = stats
+        self.x:             float                                           = position[0]
+        self.y:             float                                           = position[1]
+        self.health:        float                                           = stats.health
+        self.shield:        float                                           = stats.shield
+        self.orders:        List[Tuple[AbilityId, Union[int, Point2]]]      = []
+        self.blink_ready:   float                                           = 0.
+
+    @property
+    def is_alive(self) -> bool:
+        return self.health > 0
+
+    def take_damage(self, damage: float):
+        absorbed = min(self.shield, damage)
+        self.shield -= absorbed
+        self.health -= damage - absorbed
+
+
+class GameWorld(Protocol):
+    """
+    Źródło obserwacji dla bota *HeadlessProtossBot* i pętli *HeadlessGame*: symulator *HeadlessWorld* lub odtwarzany
+    zapis obserwacji (*replay.ReplayWorld*).
+    """
+    map_size:               Tuple[float, float]
+    start_location:         Point2
+    enemy_start_location:   Point2
+    expansions:             List[Point2]
+
+    def outcome(self) -> Optional[bool]: ...
+
+    def advance(self, dt: float) -> List[int]: ...
+
+    def publish(self, bot: sc2.BotAI): ...
+
+    def apply(self, actions: List[UnitCommand]): ...
+
+
+class HeadlessWorld:
+    """
+    Prosty symulator rozgrywki pozwalający uruchomić bota bez klienta StarCraft 2. Symulowane jest poruszanie się
+    jednostek, atakowanie (obrażenia zadawane są w sposób ciągły na podstawie DPS, najpierw tarczy, potem punktom
+    życia) oraz zdolność Blink. Przeciwnik atakuje widoczne jednostki bota, a jeśli *enemy_aggressive* jest True, jego
+    bezczynne jednostki ruszają w kierunku bazy bota.
+
+    Symulator nie odwzorowuje ekonomii, budowania budynków ani szkolenia jednostek – takie rozkazy są ignorowane.
+    """
+    def __init__(self, map_size: Tuple[float, float] = (160., 160.), seed: int = 0, enemy_aggressive: bool = True):
+        self.map_size:              Tuple[float, float]         = map_size
+        self.random:                random.Random               = random.Random(seed)
+        self.enemy_aggressive:      bool                        = enemy_aggressive
+        self.units:                 Dict[int, SimulatedUnit]    = {}
+        self.next_tag:              int                         = 1
+        self.time:                  float                       = 0.
+        self.start_location:        Point2                      = Point2((20., 20.))
+        self.enemy_start_location:  Point2                      = Point2((map_size[0] - 20., map_size[1] - 20.))
+        self.expansions:            List[Point2]                = [self.start_location, self.enemy_start_location,
+                                                                   Point2((20., map_size[1] - 20.)),
+                                                                   Point2((map_size[0] - 20., 20.))]
+
+        # Statystyki.
+        self.ignored_commands:      int                         = 0
+
+    def spawn(self, type_id: UnitTypeId, alliance: Alliance, position: Tuple[float, float]) -> SimulatedUnit:
+        """
+        Tworzy nową jednostkę lub budynek.
+
+        Parameters
+        ----------
+        type_id : UnitTypeId
+            rodzaj jednostki (musi znajdować się w tablicy *UNIT_STATS*).
+        alliance : Alliance
+            Alliance.Self dla jednostek bota lub Alliance.Enemy dla jednostek przeciwnika.
+        position : Tuple[float, float]
+            pozycja jednostki.
+
+        Returns
+        -------
+        out : SimulatedUnit
+            utworzona jednostka.
+        """
+        unit = SimulatedUnit(self.next_tag, type_id, alliance, position)
+        self.units[unit.tag] = unit
+        self.next_tag += 1
+        return unit
+
+    def spawn_group(self, type_ids: List[UnitTypeId], alliance: Alliance, center: Point2, spread: float = 6.):
+        """
+        Tworzy jednostki podanych rodzajów rozmieszczone losowo w kwadracie o boku 2 * *spread* wokół punktu *center*.
+        """
+        for type_id in type_ids:
+            self.spawn(type_id, alliance, (center.x + self.random.uniform(-spread, spread),
+                                           center.y + self.random.uniform(-spread, spread)))
+
+    def side(self, alliance: Alliance, structures: bool) -> List[SimulatedUnit]:
+        return [unit for unit in self.units.values()
+                if unit.alliance == alliance and unit.stats.is_structure == structures]
+
+    def outcome(self) -> Optional[bool]:
+        """
+        Zwraca True, jeśli przeciwnik stracił wszystkie budynki, False, jeśli wszystkie budynki stracił bot, lub None,
+        jeśli rozgrywka wciąż trwa.
+        """
+        if not self.side(Alliance.Enemy, structures=True):
+            return True
+        if not self.side(Alliance.Self, structures=True):
+            return False
+        return None
+
+    def move_towards(self, unit: SimulatedUnit, target: Point2, distance: float) -> bool:
+        """
+        Przesuwa jednostkę o *distance* w kierunku punktu *target*. Zwraca True, jeśli jednostka dotarła do celu.
+        """
+        dx, dy = target.x - unit.x, target.y - unit.y
+        length = math.hypot(dx, dy)
+        if length <= distance:
+            unit.x, unit.y = target.x, target.y
+            return True
+        unit.x += dx / length * distance
+        unit.y += dy / length * distance
+        return False
+
+    @staticmethod
+    def attack_range(attacker: SimulatedUnit, target: SimulatedUnit) -> float:
+        return attacker.stats.radius + target.stats.radius + attacker.stats.ground_range
+
+    def advance(self, dt: float) -> List[int]:
+        """
+        Symuluje upływ *dt* sekund gry.
+
+        Parameters
+        ----------
+        dt : float
+            czas w sekundach.
+
+        Returns
+        -------
+        out : List[int]
+            tagi jednostek zniszczonych w tym czasie.
+        """
+        self.time += dt
+        units = list(self.units.values())
+        if not units:
+            return []
+
+        # Macierz odległości pomiędzy wszystkimi jednostkami liczona jest raz na krok symulacji. Jednostki
+        # przemieszczone w trakcie kroku korzystają z odległości z jego początku.
+        positions = np.array([(unit.x, unit.y) for unit in units])
+        delta = positions[:, None, :] - positions[None, :, :]
+        distances = np.sqrt(np.einsum("ijk,ijk->ij", delta, delta))
+        enemy_side = np.array([unit.alliance == Alliance.Enemy for unit in units])
+        opponents = enemy_side[:, None] != enemy_side[None, :]
+        index = {unit.tag: i for i, unit in enumerate(units)}
+
+        damage: Dict[int, float] = {}
+        for i, unit in enumerate(units):
+            stats = unit.stats
+            if stats.is_structure and stats.dps <= 0:
+                continue
+
+            opponent_distances = np.where(opponents[i], distances[i], np.inf)
+            if unit.alliance == Alliance.Enemy and not unit.orders and not stats.is_structure:
+                closest = int(np.argmin(opponent_distances))
+                if opponent_distances[closest] <= stats.sight_range:
+                    unit.orders.append((AbilityId.ATTACK, units[closest].tag))
+                elif self.enemy_aggressive:
+                    unit.orders.append((AbilityId.ATTACK, self.start_location))
+
+            if not unit.orders:
+                # Bezczynne jednostki (i działa fotonowe) atakują najbliższego przeciwnika w zasięgu ataku.
+                if stats.dps > 0:
+                    closest = int(np.argmin(opponent_distances))
+                    if opponent_distances[closest] <= self.attack_range(unit, units[closest]):
+                        damage[units[closest].tag] = damage.get(units[closest].tag, 0.) + stats.dps * dt
+                continue
+
+            ability, target = unit.orders[0]
+            if ability == AbilityId.MOVE_MOVE or ability == AbilityId.MOVE:
+                if isinstance(target, int):
+                    target_unit = self.units.get(target)
+                    if target_unit is None:
+                        unit.orders.pop(0)
+                        continue
+                    target = Point2((target_unit.x, target_unit.y))
+                if self.move_towards(unit, target, stats.speed * dt):
+                    unit.orders.pop(0)
+            elif ability == AbilityId.ATTACK:
+                if isinstance(target, int):
+                    target_unit = self.units.get(target)
+                    if target_unit is None:
+                        unit.orders.pop(0)
+                        continue
+                else:
+                    # Atak na punkt: zaatakuj najbliższego przeciwnika w zasięgu wzroku lub idź w kierunku punktu.
+                    closest = int(np.argmin(opponent_distances))
+                    if opponent_distances[closest] > stats.sight_range:
+                        if self.move_towards(unit, target, stats.speed * dt):
+                            unit.orders.pop(0)
+                        continue
+                    target_unit = units[closest]
+                if distances[i, index[target_unit.tag]] <= self.attack_range(unit, target_unit):
+                    damage[target_unit.tag] = damage.get(target_unit.tag, 0.) + stats.dps * dt
+                elif not stats.is_structure:
+                    self.move_towards(unit, Point2((target_unit.x, target_unit.y)), stats.speed * dt)
+            else:
+                unit.orders.pop(0)
+
+        for tag, amount in damage.items():
+            self.units[tag].take_damage(amount)
+        dead = [tag for tag, unit in self.units.items() if not unit.is_alive]
+        for tag in dead:
+            del self.units[tag]
+        return dead
+
+    def apply(self, actions: List[UnitCommand]):
+        """
+        Wykonuje rozkazy wydane przez bota jego jednostkom.
+
+        Parameters
+        ----------
+        actions : List[UnitCommand]
+            rozkazy wydane w ostatnim wywołaniu metody *on_step()* bota.
+        """
+        for action in actions:
+            unit = self.units.get(action.unit.tag)
+            if unit is None or unit.alliance != Alliance.Self:
+                continue
+            target: Union[int, Point2, None] = None
+            if isinstance(action.target, Unit):
+                target = action.target.tag
+            elif action.target is not None:
+                target = Point2((action.target.x, action.target.y))
+
+            if action.ability == AbilityId.EFFECT_BLINK_STALKER and isinstance(target, Point2):
+                if unit.blink_ready <= self.time:
+                    distance = math.hypot(target.x - unit.x, target.y - unit.y)
+                    self.move_towards(unit, target, min(distance, BLINK_RANGE))
+                    unit.blink_ready = self.time + BLINK_COOLDOWN
+                continue
+            if action.ability in {AbilityId.MOVE_MOVE, AbilityId.MOVE, AbilityId.ATTACK} and target is not None:
+                if not action.queue:
+                    unit.orders.clear()
+                unit.orders.append((action.ability, target))
+            elif action.ability in {AbilityId.STOP, AbilityId.HOLDPOSITION}:
+                unit.orders.clear()
+            else:
+                self.ignored_commands += 1
+
+    def materialize(self, bot: sc2.BotAI, unit: SimulatedUnit) -> HeadlessUnit:
+        """
+        Tworzy obiekt *Unit* odpowiadający obecnemu stanowi jednostki symulatora.
+        """
+        stats = unit.stats
+        proto = raw_pb2.Unit(tag=unit.tag, unit_type=unit.type_id.value, alliance=unit.alliance.value,
+                             owner=1 if unit.alliance == Alliance.Self else 2,
+                             display_type=DisplayType.Visible.value, cloak=CloakState.NotCloaked.value,
+                             radius=stats.radius, build_progress=1., health=unit.health, health_max=stats.health,
+                             shield=unit.shield, shield_max=stats.shield,
+                             ideal_harvesters=16 if unit.type_id == UnitTypeId.NEXUS else 0)
+        proto.pos.x, proto.pos.y = unit.x, unit.y
+        orders = [UnitOrder(HeadlessAbility(ability), target, 0.) for ability, target in unit.orders]
+        return HeadlessUnit(proto, bot, stats, unit.type_id, orders)
+
+    def publish(self, bot: sc2.BotAI):
+        """
+        Ustawia listy jednostek bota (*bot.units*, *bot.structures*, *bot.enemy_units* itp.) na podstawie obecnego
+        stanu symulatora, tak jak robi to klient gry po otrzymaniu obserwacji.
+        """
+        publish_units(bot, [self.materialize(bot, unit) for unit in self.units.values()])
+
+
+def publish_units(bot: sc2.BotAI, materialized: List[HeadlessUnit]):
+    """
+    Ustawia listy jednostek bota (*bot.units*, *bot.structures*, *bot.enemy_units* itp.), dzieląc jednostki
+    *materialized* według przynależności do gracza oraz tego, czy są budynkami.
+    """
+    units:              List[HeadlessUnit] = []
+    structures:         List[HeadlessUnit] = []
+    enemy_units:        List[HeadlessUnit] = []
+    enemy_structures:   List[HeadlessUnit] = []
+    for unit in materialized:
+        if unit.alliance == Alliance.Self.value:
+            (structures if unit.is_structure else units).append(unit)
+        else:
+            (enemy_structures if unit.is_structure else enemy_units).append(unit)
+    bot.units = Units(units, bot)
+    bot.structures = Units(structures, bot)
+    bot.workers = bot.units(UnitTypeId.PROBE)
+    bot.townhalls = bot.structures(UnitTypeId.NEXUS)
+    bot.enemy_units = Units(enemy_units, bot)
+    bot.enemy_structures = Units(enemy_structures, bot)
+    bot.all_units = Units(units + structures + enemy_units + enemy_structures, bot)
+    bot.supply_used = 2 * len(units)
+    bot.supply_cap = 200
+    bot.supply_left = bot.supply_cap - bot.supply_used
+
+
+def create_battle_world(friendly_count: int, enemy_count: int, seed: int = 0,
+                        enemy_aggressive: bool = True) -> HeadlessWorld:
+    """
+    Tworzy scenariusz bitwy: bot oraz przeciwnik posiadają nexus i armię złożoną ze Stalkerów, Zelotów, Immortali
+    oraz Sentry w proporcjach zbliżonych do tych, które buduje bot. Armie rozstawione są w połowie drogi pomiędzy
+    bazami, w odległości pozwalającej im szybko się dostrzec.
+
+    Parameters
+    ----------
+    friendly_count : int
+        liczba jednostek bojowych bota.
+    enemy_count : int
+        liczba jednostek bojowych przeciwnika.
+    seed : int
+        ziarno generatora liczb losowych.
+    enemy_aggressive : bool
+        determinuje, czy jednostki przeciwnika ruszają w kierunku bazy bota.
+
+    Returns
+    -------
+    out : HeadlessWorld
+        utworzony symulator.
+    """
+    world = HeadlessWorld(seed=seed, enemy_aggressive=enemy_aggressive)
+    composition = [UnitTypeId.STALKER] * 6 + [UnitTypeId.ZEALOT] * 2 + [UnitTypeId.IMMORTAL, UnitTypeId.SENTRY]
+
+    world.spawn(UnitTypeId.NEXUS, Alliance.Self, world.start_location)
+    world.spawn(UnitTypeId.PYLON, Alliance.Self, (world.start_location.x + 6., world.start_location.y))
+    world.spawn(UnitTypeId.NEXUS, Alliance.Enemy, world.enemy_start_location)
+    world.spawn(UnitTypeId.PHOTONCANNON, Alliance.Enemy, (world.enemy_start_location.x - 6.,
+                                                          world.enemy_start_location.y))
+
+    middle = (world.start_location + world.enemy_start_location) / 2
+    offset = Point2((8., 8.))
+    spread = 4. + math.sqrt(max(friendly_count, enemy_count))
+    world.spawn_group([composition[i % len(composition)] for i in range(friendly_count)], Alliance.Self,
+                      middle - offset, spread)
+    world.spawn_group([composition[i % len(composition)] for i in range(enemy_count)], Alliance.Enemy,
+                      middle + offset, spread)
+    return world
+
+
+class HeadlessClient:
+    """
+    Zastępuje obiekt *Client* – przechowuje *game_step*, ignoruje polecenia rysowania oraz odpowiada na zapytania
+    o długość ścieżek.
+    """
+    def __init__(self):
+        self.game_step: int = 8
+
+    def debug_sphere_out(self, *args, **kwargs):
+        pass
+
+    def debug_text_world(self, *args, **kwargs):
+        pass
+
+    async def query_pathings(self, zipped_list: List[List[Point2]]) -> List[float]:
+        # Symulator nie posiada przeszkód terenu, więc długość ścieżki jest odległością w linii prostej.
+        return [start.distance_to_point2(end) for start, end in zipped_list]
+
+
+class HeadlessVisibility:
+    """
+    Zastępuje mapę widoczności *PixelMap* – symulator nie posiada mgły wojny, więc każde pole mapy jest widoczne
+    (wartość 2), a jednostki przeciwnika nigdy nie są zapamiętanymi obrazami (*Unit.is_snapshot*).
+    """
+    def __init__(self, map_size: Tuple[float, float]):
+        self.data_numpy: np.ndarray = np.full((int(map_size[1]) + 1, int(map_size[0]) + 1), 2, dtype=np.uint8)
+
+
+class HeadlessState:
+    """
+    Zastępuje obiekt *GameState* – przechowuje numer klatki gry oraz mapę widoczności.
+    """
+    def __init__(self, map_size: Tuple[float, float] = (160., 160.)):
+        self.game_loop:     int                 = 0
+        self.visibility:    HeadlessVisibility  = HeadlessVisibility(map_size)
+
+
+class HeadlessGameInfo:
+    """
+    Zastępuje obiekt *GameInfo* – przechowuje nazwę oraz wymiary mapy.
+    """
+    def __init__(self, map_size: Tuple[float, float]):
+        self.map_name:      str     = "Headless"
+        self.map_size:      Size    = Size(map_size)
+        self.map_center:    Point2  = Point2((map_size[0] / 2, map_size[1] / 2))
+
+
+class HeadlessProtossBot(ProtossBot):
+    """
+    Bot *ProtossBot* przystosowany do działania w symulatorze *HeadlessWorld*. Metody klasy *BotAI*, które wymagają
+    połączenia z grą (np. budowanie budynków czy sprawdzanie dostępności zdolności), są zastępowane wersjami,
+    które nic nie robią. Decyzje dotyczące jednostek bojowych oraz armii podejmowane są bez zmian.
+    """
+    distance_calculation_method: int = 0
+
+    def __init__(self, world: GameWorld):
+        super().__init__()
+        self._initialize_variables()
+        self.world:         GameWorld           = world
+        self._client:       HeadlessClient      = HeadlessClient()
+        self.state:         HeadlessState       = HeadlessState(world.map_size)
+        self._game_info:    HeadlessGameInfo    = HeadlessGameInfo(world.map_size)
+        self._distances_override_functions(0)
+
+        # Symulator nie udostępnia danych gry, więc indeks produkcji nie zna zdolności tworzących jednostki.
+        self.production_index.creation_abilities = {}
+
+    @property
+    def start_location(self) -> Point2:
+        return self.world.start_location
+
+    @property
+    def enemy_start_locations(self) -> List[Point2]:
+        return [self.world.enemy_start_location]
+
+    @property
+    def expansion_locations_list(self) -> List[Point2]:
+        return list(self.world.expansions)
+
+    async def prepare_expansion_table(self):
+        self.expansion_table = await ExpansionTable.compute(self.client, self.expansion_locations_list,
+                                                            [self.start_location] + self.enemy_start_locations,
+                                                            self.game_info.map_center)
+
+    def already_pending(self, unit_type, all_units: bool = False) -> int:
+        return 0
+
+    def can_afford(self, item_id, check_supply_cost: bool = True) -> bool:
+        return False
+
+    def can_feed(self, unit_type) -> bool:
+        return False
+
+    async def can_cast(self, *args, **kwargs) -> bool:
+        return False
+
+    async def build(self, *args, **kwargs) -> bool:
+        return False
+
+    async def distribute_workers(self, *args, **kwargs):
+        pass
+
+
+class HeadlessGame:
+    """
+    Pętla gry łącząca bota z symulatorem. Kolejność operacji w każdym kroku odpowiada tej z funkcji *run_game()*:
+    symulator przesuwa się o *game_step* klatek, bot otrzymuje nową obserwację oraz zdarzenia o zniszczonych
+    jednostkach, po czym wywoływana jest metoda *on_step()*, a wydane rozkazy trafiają do symulatora.
+    """
+    def __init__(self, bot: HeadlessProtossBot, world: GameWorld):
+        self.bot:           HeadlessProtossBot  = bot
+        self.world:         GameWorld           = world
+        self.iteration:     int                 = 0
+        self.started:       bool                = False
+
+        # Czas (w sekundach) ostatniego wywołania metody *on_step()* bota.
+        self.step_time:     float               = 0.
+
+    async def start(self):
+        self.world.publish(self.bot)
+        await self.bot.on_start()
+        self.started = True
+
+    async def step(self) -> List[int]:
+        """
+        Wykonuje jeden krok gry, nie licząc wywołania *on_step()* bota, które należy wykonać metodą *act()*.
+
+        Returns
+        -------
+        out : List[int]
+            tagi jednostek zniszczonych w tym kroku.
+        """
+        if not self.started:
+            await self.start()
+        game_step = self.bot.client.game_step
+        self.bot.state.game_loop += game_step
+        dead = self.world.advance(game_step / self.bot.frames_per_second)
+        self.world.publish(self.bot)
+        for tag in dead:
+            await self.bot.on_unit_destroyed(tag)
+        return dead
+
+    async def act(self):
+        start = time.perf_counter()
+        await self.bot.on_step(self.iteration)
+        self.step_time = time.perf_counter() - start
+        self.world.apply(self.bot.actions)
+        self.bot.actions.clear()
+        self.bot.unit_tags_received_action.clear()
+        self.iteration += 1
+
+    async def run(self, frames: int) -> Optional[bool]:
+        """
+        Wykonuje kroki gry, dopóki nie upłynie *frames* klatek gry lub rozgrywka nie zostanie rozstrzygnięta.
+
+        Returns
+        -------
+        out : Optional[bool]
+            wynik rozgrywki w sposób opisany w metodzie *HeadlessWorld.outcome()*.
+        """
+        while self.bot.state.game_loop < frames and self.world.outcome() is None:
+            await self.step()
+            await self.act()
+        return self.world.outcome()
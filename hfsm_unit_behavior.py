@@ -3,7 +3,14 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.ability_id import AbilityId
 from sc2.position import Point2
 import pysm
+from perception import PerceptionCache
+from target_selection import BatchTargetSelector
+from unit_lookup import UnitLookup
+from ability_model import AbilityModel
+from profiling import NodeProfiler
+from flat_hfsm import FlatHfsm, FlatHfsmSpec
 from typing import Callable, Optional
+import functools
 from unit_ai_data import UnitAiOrder, UnitAiOrderType, UnitAiData, UnitAiController
 
 
@@ -18,7 +25,7 @@ class GroupMovement(pysm.StateMachine):
         self.ai_data: UnitAiData = unit_ai_data
 
     def update(self, state, event):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is not None and self.ai_data.unit_ai_order is not None:
             if self.ai_data.unit_ai_order.order is not None:
                 already_going = (unit.is_moving and isinstance(unit.order_target, Point2) and
@@ -44,34 +51,14 @@ class AttackBestTarget(pysm.StateMachine):
         self.ai_data: UnitAiData = unit_ai_data
 
     def update(self, state, event):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return False
 
-        # Wybierz jednostki oraz budynki wroga, które jednostka widzi
-        enemy_units = self.ai_data.bot.enemy_units.filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-        )
-        enemy_structures = self.ai_data.bot.enemy_structures.filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range
-        )
-
-        # Preferuj jednostki, które atakują oraz są blisko
-        visible_enemies = enemy_units + enemy_structures.filter(lambda enemy: enemy.can_attack)
-        visible_enemies.sort(key=lambda enemy: unit.distance_to(enemy))
-        enemies_in_range = visible_enemies.in_attack_range_of(unit, bonus_distance=unit.sight_range * 0.15)
-
-        enemies = visible_enemies
-        if len(enemies_in_range) > 0:
-            enemies = enemies_in_range
-
-        # Wybierz jednostkę, która jest najbardziej ranna. Jeśli wśród niebezpiecznych jednostek nikogo nie udało się
-        # znaleźć, zaatakuj inne, nie niebezpieczne cele.
-        best_target = min(enemies,
-                          key=lambda enemy: (enemy.health + enemy.shield) / (enemy.health_max + enemy.shield_max + self.ai_data.eps),
-                          default=None)
-        if best_target is None and enemy_structures.exists:
-            best_target = enemy_structures.closest_to(unit)
+        # Cele dla wszystkich jednostek wybierane są jednocześnie przez obiekt BatchTargetSelector. Preferowane są
+        # jednostki, które atakują oraz są blisko i spośród nich wybierana jest ta najbardziej ranna. Jeśli wśród
+        # niebezpiecznych jednostek nikogo nie udało się znaleźć, atakowane są inne, nie niebezpieczne cele.
+        best_target = self.ai_data.target_selector.target_for(unit)
 
         if best_target is not None:
             if not (unit.is_attacking and unit.order_target == best_target.tag):
@@ -106,24 +93,24 @@ class AvoidInjury(pysm.StateMachine):
     def enter(self, state, event):
         self.ready_to_act = False
         self.start_time = self.ai_data.bot.time
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is not None:
             # Zbierz jednostki, które mogą zagrozić naszej jednostce
-            visible_enemies = (self.ai_data.bot.enemy_units + self.ai_data.bot.enemy_structures).filter(
-                lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-            )
+            visible_enemies = self.ai_data.perception.visible_enemies(unit)
 
             # Jeśli takie jednostki istnieją, uciekaj (wykorzystując np. zdolność Blink, jeśli jest dostępna)
             if len(visible_enemies) > 0:
                 direction = unit.position - visible_enemies.center
                 if abs(direction) > 0:
                     self.escape_location = unit.position + direction
-                    if unit.type_id == UnitTypeId.STALKER:
+                    ability_model = self.ai_data.ability_model
+                    if unit.type_id == UnitTypeId.STALKER and ability_model.ready(unit, AbilityId.EFFECT_BLINK_STALKER):
                         unit(AbilityId.EFFECT_BLINK_STALKER, self.escape_location)
+                        ability_model.note_cast(unit, AbilityId.EFFECT_BLINK_STALKER)
                     unit.move(self.escape_location)
 
     def update(self, state, event):
-        unit = self.ai_data.bot.units.find_by_tag(self.ai_data.unit_tag)
+        unit = self.ai_data.unit()
         if unit is None:
             return
 
@@ -160,22 +147,36 @@ class UnitHfsmController(UnitAiController):
     otrzyma obrażenia, chwilowo wycofuje się, by pozwolić jednostkom przeciwnika skupić się na pozostałych towarzyszach.
     """
     def __init__(self,
-                 unit_tag:      int,
-                 bot:           sc2.BotAI,
-                 unit_attacked: Callable[[int], bool]):
+                 unit_tag:          int,
+                 bot:               sc2.BotAI,
+                 unit_attacked:     Callable[[int], bool],
+                 perception:        PerceptionCache,
+                 target_selector:   BatchTargetSelector,
+                 unit_lookup:       UnitLookup,
+                 ability_model:     AbilityModel):
         self.unit_tag:      int                     = unit_tag
         self.bot:           sc2.BotAI               = bot
         self.unit_attacked: Callable[[int], bool]   = unit_attacked
         self.unit_ai_data:  UnitAiData              = UnitAiData(bot=bot,
                                                                  unit_tag=unit_tag,
                                                                  unit_ai_order=None,
-                                                                 unit_attacked=self.unit_attacked)
+                                                                 unit_attacked=self.unit_attacked,
+                                                                 perception=perception,
+                                                                 target_selector=target_selector,
+                                                                 unit_lookup=unit_lookup,
+                                                                 ability_model=ability_model)
 
-        self.root               = pysm.StateMachine("Unit controller")
-        self.fight              = pysm.StateMachine("Fight")
         self.group_movement     = GroupMovement("Group movement", self.unit_ai_data)
         self.attack_best_target = AttackBestTarget("Attack best target", self.unit_ai_data)
         self.avoid_injury       = AvoidInjury("Avoid injury", self.unit_ai_data)
+        self.construct_state_machine()
+
+    def construct_state_machine(self):
+        """
+        Metoda łącząca utworzone wcześniej stany w hierarchiczną maszynę stanów.
+        """
+        self.root               = pysm.StateMachine("Unit controller")
+        self.fight              = pysm.StateMachine("Fight")
 
         self.root.add_state(self.group_movement, initial=True)
         self.root.add_state(self.fight)
@@ -194,7 +195,7 @@ class UnitHfsmController(UnitAiController):
         return self.root.leaf_state.name
 
     def should_fight(self):
-        unit = self.bot.units.find_by_tag(self.unit_tag)
+        unit = self.unit_ai_data.unit()
         if unit is None:
             return False
 
@@ -206,13 +207,10 @@ class UnitHfsmController(UnitAiController):
             elif self.unit_ai_data.unit_ai_order.order == UnitAiOrderType.Move:
                 return False
 
-        visible_enemies = (self.bot.enemy_units + self.bot.enemy_structures).filter(
-            lambda enemy: unit.distance_to(enemy) <= unit.sight_range and enemy.can_be_attacked
-        )
-        return len(visible_enemies) > 0
+        return self.unit_ai_data.perception.has_visible_enemies(unit)
 
     def is_in_danger(self):
-        unit = self.bot.units.find_by_tag(self.unit_tag)
+        unit = self.unit_ai_data.unit()
         if unit is None:
             return False
         return (unit.health + unit.shield) / (unit.health_max + unit.shield_max) < self.unit_ai_data.low_health and self.unit_attacked(unit.tag)
@@ -231,6 +229,15 @@ class UnitHfsmController(UnitAiController):
 
         self.root.dispatch(pysm.Event("update"))
 
+    def instrument(self, profiler: NodeProfiler):
+        profiler.instrument_state_machine(self.root, "unit_hfsm")
+        profiler.instrument_method(self, "should_fight", "unit_hfsm")
+        profiler.instrument_method(self, "is_in_danger", "unit_hfsm")
+
+    @property
+    def in_combat(self) -> bool:
+        return self.root.state is self.fight
+
     @property
     def order(self) -> Optional[UnitAiOrder]:
         return self.unit_ai_data.unit_ai_order
@@ -238,3 +245,80 @@ class UnitHfsmController(UnitAiController):
     @order.setter
     def order(self, new_order: Optional[UnitAiOrder]):
         self.unit_ai_data.unit_ai_order = new_order
+
+
+def construct_flat_state_machine_spec() -> FlatHfsmSpec:
+    """
+    Tworzy opis maszyny stanów o tej samej strukturze, co maszyna stanów pysm klasy *UnitHfsmController*.
+
+    Returns
+    -------
+    out : FlatHfsmSpec
+        skompilowany opis maszyny stanów.
+    """
+    spec = FlatHfsmSpec()
+    root                = spec.add_state("Unit controller")
+    group_movement      = spec.add_state("Group movement", parent=root, initial=True)
+    fight               = spec.add_state("Fight", parent=root)
+    attack_best_target  = spec.add_state("Attack best target", parent=fight, initial=True)
+    avoid_injury        = spec.add_state("Avoid injury", parent=fight)
+
+    spec.add_transition(group_movement,     fight,              events=["should fight"])
+    spec.add_transition(fight,              group_movement,     events=["should not fight"])
+    spec.add_transition(attack_best_target, avoid_injury,       events=["is in danger"])
+    spec.add_transition(avoid_injury,       attack_best_target, events=["is ready to act"])
+    spec.event("update")
+    return spec.compile()
+
+
+class UnitFlatHfsmController(UnitHfsmController):
+    """
+    Wariant klasy *UnitHfsmController*, w którym maszyna stanów pysm zastąpiona jest maszyną *FlatHfsm*. Stany oraz
+    ich logika (metody *update* i *enter*) są te same, natomiast opis maszyny stanów kompilowany jest raz dla
+    wszystkich jednostek, a zdarzenia są liczbami całkowitymi, dzięki czemu aktualizacja kontrolera nie tworzy
+    obiektów zdarzeń i nie korzysta z ogólnego mechanizmu przekazywania zdarzeń pysm.
+    """
+    spec:               FlatHfsmSpec    = construct_flat_state_machine_spec()
+    GROUP_MOVEMENT:     int             = spec.state_names.index("Group movement")
+    FIGHT:              int             = spec.state_names.index("Fight")
+    ATTACK_BEST_TARGET: int             = spec.state_names.index("Attack best target")
+    AVOID_INJURY:       int             = spec.state_names.index("Avoid injury")
+    SHOULD_FIGHT:       int             = spec.event("should fight")
+    SHOULD_NOT_FIGHT:   int             = spec.event("should not fight")
+    IS_IN_DANGER:       int             = spec.event("is in danger")
+    IS_READY_TO_ACT:    int             = spec.event("is ready to act")
+    UPDATE:             int             = spec.event("update")
+
+    def construct_state_machine(self):
+        # Procedury obsługi zdarzeń stanów pysm przyjmują argumenty (state, event), których nie wykorzystują.
+        self.machine = FlatHfsm(self.spec, {
+            (self.GROUP_MOVEMENT, "update"):        functools.partial(self.group_movement.update, None, None),
+            (self.ATTACK_BEST_TARGET, "update"):    functools.partial(self.attack_best_target.update, None, None),
+            (self.AVOID_INJURY, "update"):          functools.partial(self.avoid_injury.update, None, None),
+            (self.AVOID_INJURY, "enter"):           functools.partial(self.avoid_injury.enter, None, None),
+        })
+
+    @property
+    def state(self):
+        return self.machine.state_name
+
+    def update(self):
+        machine = self.machine
+        machine.dispatch(self.SHOULD_FIGHT if self.should_fight() else self.SHOULD_NOT_FIGHT)
+
+        if self.is_in_danger():
+            machine.dispatch(self.IS_IN_DANGER)
+
+        if self.avoid_injury.ready_to_act:
+            machine.dispatch(self.IS_READY_TO_ACT)
+
+        machine.dispatch(self.UPDATE)
+
+    def instrument(self, profiler: NodeProfiler):
+        profiler.instrument_flat_state_machine(self.machine, "unit_flat_hfsm")
+        profiler.instrument_method(self, "should_fight", "unit_flat_hfsm")
+        profiler.instrument_method(self, "is_in_danger", "unit_flat_hfsm")
+
+    @property
+    def in_combat(self) -> bool:
+        return self.machine.is_in(self.FIGHT)
@@ -0,0 +1,260 @@
+from sc2 import run_game, maps, Race, Difficulty, Result
+from sc2.player import Bot, Computer
+from headless import HeadlessGame, HeadlessProtossBot, create_battle_world
+from benchmark import AI_NAMES, AI_TYPES
+from protoss_bot import ProtossBot, UnitAiType
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import numpy as np
+import random
+import time
+import traceback
+
+
+# Wyniki gier w kolejności, w jakiej wypisywane są w podsumowaniu.
+OUTCOMES: Tuple[str, ...] = ("win", "loss", "tie", "error")
+
+DIFFICULTIES: Dict[str, Difficulty] = {difficulty.name.lower(): difficulty for difficulty in Difficulty}
+RACES: Dict[str, Race] = {race.name.lower(): race for race in Race}
+
+
+class TimedProtossBot(ProtossBot):
+    """
+    Bot *ProtossBot* mierzący czas każdego wywołania metody *on_step()*.
+    """
+    def __init__(self):
+        super().__init__()
+        self.step_times: List[float] = []
+
+    async def on_step(self, iteration: int):
+        start = time.perf_counter()
+        await super().on_step(iteration)
+        self.step_times.append(time.perf_counter() - start)
+
+
+class MatchSpec:
+    """
+    Opis jednej gry wykonywanej przez *run_match()*: w grze (*headless* równe False) bot gra na mapie *map_name*
+    przeciwko wbudowanemu AI gry *opponent* (w formacie "rasa:poziom", np. "protoss:medium"), a w symulatorze
+    *HeadlessWorld* (*headless* równe True) – *units* jednostek bota walczy z *enemies* jednostkami przeciwnika przez
+    co najwyżej *frames* klatek gry.
+    """
+    def __init__(self, index: int, ai_type: UnitAiType, seed: int, headless: bool, map_name: str = "",
+                 opponent: str = "", units: int = 0, enemies: int = 0, frames: int = 0):
+        self.index:     int         = index
+        self.ai_type:   UnitAiType  = ai_type
+        self.seed:      int         = seed
+        self.headless:  bool        = headless
+        self.map_name:  str         = map_name if not headless else "headless"
+        self.opponent:  str         = opponent if not headless else "{}v{}".format(units, enemies)
+        self.units:     int         = units
+        self.enemies:   int         = enemies
+        self.frames:    int         = frames
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "map": self.map_name, "opponent": self.opponent, "ai": AI_NAMES[self.ai_type],
+                "seed": self.seed, "headless": self.headless}
+
+
+def parse_opponent(opponent: str) -> Tuple[Race, Difficulty]:
+    """
+    Zamienia opis przeciwnika w formacie "rasa:poziom" (np. "zerg:hard") na rasę oraz poziom trudności AI gry.
+    """
+    race, _, difficulty = opponent.lower().partition(":")
+    if race not in RACES or difficulty not in DIFFICULTIES:
+        raise ValueError("Nieprawidłowy opis przeciwnika: {}".format(opponent))
+    return RACES[race], DIFFICULTIES[difficulty]
+
+
+def latency_stats(step_times: List[float]) -> Dict[str, float]:
+    """
+    Zwraca statystyki czasu wywołań metody *on_step()* (w milisekundach).
+    """
+    if not step_times:
+        return {"steps": 0, "mean_ms": 0., "p50_ms": 0., "p90_ms": 0., "p99_ms": 0., "max_ms": 0.}
+    times = np.asarray(step_times) * 1000
+    return {"steps": len(times), "mean_ms": float(np.mean(times)), "p50_ms": float(np.percentile(times, 50)),
+            "p90_ms": float(np.percentile(times, 90)), "p99_ms": float(np.percentile(times, 99)),
+            "max_ms": float(np.max(times))}
+
+
+def play_headless(spec: MatchSpec) -> Tuple[str, int, List[float]]:
+    world = create_battle_world(spec.units, spec.enemies, seed=spec.seed)
+    bot = HeadlessProtossBot(world)
+    bot.unit_ai_type = spec.ai_type
+    game = HeadlessGame(bot, world)
+    step_times: List[float] = []
+
+    async def run():
+        await game.start()
+        while bot.state.game_loop < spec.frames and world.outcome() is None and bot.townhalls.exists:
+            await game.step()
+            if not bot.townhalls.exists:
+                break
+            await game.act()
+            step_times.append(game.step_time)
+
+    asyncio.run(run())
+    outcome = world.outcome() if bot.townhalls.exists else False
+    return {True: "win", False: "loss", None: "tie"}[outcome], bot.state.game_loop, step_times
+
+
+def play_game(spec: MatchSpec) -> Tuple[str, int, List[float]]:
+    race, difficulty = parse_opponent(spec.opponent)
+    bot = TimedProtossBot()
+    bot.unit_ai_type = spec.ai_type
+    result = run_game(maps.get(spec.map_name), [Bot(Race.Protoss, bot), Computer(race, difficulty)], realtime=False)
+    outcomes = {Result.Victory: "win", Result.Defeat: "loss", Result.Tie: "tie"}
+    return outcomes.get(result, "error"), bot.state.game_loop, bot.step_times
+
+
+def run_match(spec: MatchSpec) -> Dict[str, Any]:
+    """
+    Wykonuje grę opisaną przez *spec* (w osobnym procesie puli) i zwraca jej wyniki: wynik gry, długość gry oraz
+    statystyki czasu wywołań metody *on_step()*. Wyjątek zgłoszony podczas gry zapisywany jest jako wynik "error".
+
+    Parameters
+    ----------
+    spec : MatchSpec
+        opis gry.
+
+    Returns
+    -------
+    out : Dict[str, Any]
+        wyniki gry (pole "step_times" zawiera czasy wszystkich wywołań *on_step()* w sekundach).
+    """
+    random.seed(spec.seed)
+    start = time.perf_counter()
+    result = spec.to_dict()
+    try:
+        outcome, game_loop, step_times = play_headless(spec) if spec.headless else play_game(spec)
+    except Exception:
+        outcome, game_loop, step_times = "error", 0, []
+        result["error"] = traceback.format_exc()
+    result.update({"result": outcome, "game_loop": game_loop, "game_time": game_loop / 22.4,
+                   "wall_time": time.perf_counter() - start, "step_times": step_times})
+    return result
+
+
+def summarize(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Agreguje wyniki gier w grupach o tej samej mapie, przeciwniku i typie AI: liczba wygranych, przegranych, remisów
+    oraz błędów, średnia długość gry oraz statystyki czasu wszystkich wywołań *on_step()* w grupie.
+    """
+    groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+    for result in results:
+        groups.setdefault((result["map"], result["opponent"], result["ai"]), []).append(result)
+
+    summary = []
+    for (map_name, opponent, ai), group in sorted(groups.items()):
+        counts = {outcome: sum(1 for result in group if result["result"] == outcome) for outcome in OUTCOMES}
+        played = [result for result in group if result["result"] != "error"]
+        decided = counts["win"] + counts["loss"] + counts["tie"]
+        entry = {"map": map_name, "opponent": opponent, "ai": ai, "games": len(group)}
+        entry.update(counts)
+        entry["win_rate"] = counts["win"] / decided if decided else 0.
+        entry["mean_game_time"] = float(np.mean([result["game_time"] for result in played])) if played else 0.
+        entry.update(latency_stats([t for result in played for t in result["step_times"]]))
+        summary.append(entry)
+    return summary
+
+
+def run_batch(specs: List[MatchSpec], workers: int, output: Optional[str] = None,
+              progress: bool = True) -> Dict[str, Any]:
+    """
+    Wykonuje gry *specs* w puli *workers* procesów, agreguje wyniki i (jeśli podano *output*) zapisuje je do pliku
+    JSON zawierającego wyniki każdej gry (pole "matches") oraz podsumowanie (pole "summary").
+
+    Parameters
+    ----------
+    specs : List[MatchSpec]
+        opisy gier.
+    workers : int
+        liczba procesów.
+    output : Optional[str]
+        ścieżka pliku wyników.
+    progress : bool
+        determinuje, czy wyniki kolejnych zakończonych gier są wypisywane.
+
+    Returns
+    -------
+    out : Dict[str, Any]
+        wyniki gier oraz podsumowanie.
+    """
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_match, spec) for spec in specs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress:
+                print("[{}/{}] {} {} {} seed {}: {} ({:.0f} s gry)".format(
+                    len(results), len(specs), result["map"], result["opponent"], result["ai"], result["seed"],
+                    result["result"], result["game_time"]))
+    results.sort(key=lambda result: result["index"])
+
+    summary = summarize(results)
+    matches = []
+    for result in results:
+        match = {key: value for key, value in result.items() if key != "step_times"}
+        match.update(latency_stats(result["step_times"]))
+        matches.append(match)
+    report = {"matches": matches, "summary": summary}
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Równoległe wykonanie wielu gier bota i agregacja wyników.")
+    parser.add_argument("--games", type=int, default=4, help="liczba gier dla każdej kombinacji mapy, przeciwnika "
+                                                              "i typu AI")
+    parser.add_argument("--maps", nargs="+", default=["EternalEmpireLE"], help="nazwy map")
+    parser.add_argument("--opponents", nargs="+", default=["protoss:medium"],
+                        help="przeciwnicy w formacie rasa:poziom (np. zerg:hard)")
+    parser.add_argument("--ai", choices=list(AI_TYPES) + ["all"], nargs="+", default=["bt"], help="typy AI jednostek")
+    parser.add_argument("--workers", type=int, default=2, help="liczba procesów")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno pierwszej gry (kolejne gry mają kolejne ziarna)")
+    parser.add_argument("--output", default="match_results.json", help="plik wyników")
+    parser.add_argument("--headless", action="store_true",
+                        help="zamiast gry używaj symulatora z headless.py (mapy i przeciwnicy są ignorowani)")
+    parser.add_argument("--units", type=int, nargs="+", default=[20],
+                        help="liczby jednostek bota w symulatorze")
+    parser.add_argument("--enemy-ratio", type=float, default=1.,
+                        help="liczba jednostek przeciwnika w symulatorze w stosunku do liczby jednostek bota")
+    parser.add_argument("--frames", type=int, default=4000, help="maksymalna liczba klatek gry w symulatorze")
+    args = parser.parse_args()
+
+    ai_types = list(AI_TYPES.values()) if "all" in args.ai else [AI_TYPES[name] for name in args.ai]
+    specs: List[MatchSpec] = []
+    if args.headless:
+        for units in args.units:
+            for ai_type in ai_types:
+                for game in range(args.games):
+                    specs.append(MatchSpec(len(specs), ai_type, args.seed + game, headless=True, units=units,
+                                           enemies=max(1, round(units * args.enemy_ratio)), frames=args.frames))
+    else:
+        for opponent in args.opponents:
+            parse_opponent(opponent)
+        for map_name in args.maps:
+            for opponent in args.opponents:
+                for ai_type in ai_types:
+                    for game in range(args.games):
+                        specs.append(MatchSpec(len(specs), ai_type, args.seed + game, headless=False,
+                                               map_name=map_name, opponent=opponent))
+
+    report = run_batch(specs, args.workers, args.output)
+    print("{:<20} {:<16} {:<6} {:>5} {:>4} {:>4} {:>4} {:>4} {:>6} {:>9} {:>8} {:>8}".format(
+        "map", "opponent", "ai", "games", "win", "loss", "tie", "err", "win%", "time[s]", "p50[ms]", "p99[ms]"))
+    for entry in report["summary"]:
+        print("{:<20} {:<16} {:<6} {:>5} {:>4} {:>4} {:>4} {:>4} {:>6.1f} {:>9.1f} {:>8.2f} {:>8.2f}".format(
+            entry["map"], entry["opponent"], entry["ai"], entry["games"], entry["win"], entry["loss"], entry["tie"],
+            entry["error"], entry["win_rate"] * 100, entry["mean_game_time"], entry["p50_ms"], entry["p99_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import sc2
+from sc2.unit import Unit
+from sc2.units import Units
+from spatial_index import EnemySpatialIndex
+from typing import Callable, Dict, Optional
+
+
+class UnitPerception:
+    """
+    Pomocnicza klasa przechowująca wyniki zapytań o otoczenie pojedynczej jednostki w obrębie jednej klatki gry.
+    Pola o wartości None nie zostały jeszcze w danej klatce obliczone.
+    """
+    __slots__ = ("visible_enemies", "visible_structures", "threats", "enemies_in_range", "closest_enemy",
+                 "closest_enemy_known")
+
+    def __init__(self):
+        self.visible_enemies:       Optional[Units] = None
+        self.visible_structures:    Optional[Units] = None
+        self.threats:               Optional[Units] = None
+        self.enemies_in_range:      Optional[Units] = None
+        self.closest_enemy:         Optional[Unit]  = None
+        self.closest_enemy_known:   bool            = False
+
+
+class PerceptionCache:
+    """
+    Pamięć podręczna wyników percepcji jednostek, ważna w obrębie jednej klatki gry. Węzły drzew zachowań, stany maszyn
+    stanów oraz drzewo zachowań armii wielokrotnie w trakcie jednego wywołania metody *on_step()* pytają o tych samych
+    przeciwników w pobliżu tej samej jednostki – dzięki tej klasie odpowiedź obliczana jest tylko raz.
+
+    Wyniki zapamiętywane są pod kluczem (klatka gry, tag jednostki). Gdy numer klatki gry (*bot.state.game_loop*)
+    zmieni się, cała zawartość pamięci jest automatycznie unieważniana. Liczniki *hits* oraz *misses* pozwalają ocenić,
+    ile zapytań udało się zaoszczędzić.
+
+    Zwracane grupy jednostek są współdzielone pomiędzy wywołaniami i nie powinny być modyfikowane.
+
+    Opcjonalna funkcja *sees_enemies* (np. metoda *SquadPerception.sees_enemies()*) pozwala metodzie
+    *has_visible_enemies()* odpowiedzieć bez wyszukiwania przeciwników w pobliżu jednostki. Powinna zwracać True lub
+    False, jeśli odpowiedź jest pewna, lub None w przeciwnym wypadku.
+    """
+    def __init__(self, bot: sc2.BotAI, enemy_index: EnemySpatialIndex,
+                 sees_enemies: Optional[Callable[[Unit], Optional[bool]]] = None):
+        self.bot:           sc2.BotAI                                   = bot
+        self.enemy_index:   EnemySpatialIndex                           = enemy_index
+        self.sees_enemies:  Optional[Callable[[Unit], Optional[bool]]]  = sees_enemies
+        self.frame:         int                                         = -1
+        self.entries:       Dict[int, UnitPerception]                   = {}
+        self.hits:          int                                         = 0
+        self.misses:        int                                         = 0
+
+    def entry(self, unit: Unit) -> UnitPerception:
+        """
+        Zwraca zapamiętane dane percepcji jednostki *unit* w obecnej klatce gry. Jeśli od ostatniego zapytania klatka
+        gry uległa zmianie, pamięć jest wcześniej czyszczona.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, której dotyczy zapytanie.
+
+        Returns
+        -------
+        out : UnitPerception
+            dane percepcji jednostki.
+        """
+        frame = self.bot.state.game_loop
+        if frame != self.frame:
+            self.frame = frame
+            self.entries.clear()
+
+        perception = self.entries.get(unit.tag)
+        if perception is None:
+            perception = UnitPerception()
+            self.entries[unit.tag] = perception
+        return perception
+
+    def visible_enemies(self, unit: Unit) -> Units:
+        """
+        Zwraca jednostki oraz budynki przeciwnika w zasięgu wzroku jednostki *unit*, które mogą zostać zaatakowane.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć widocznych przeciwników.
+
+        Returns
+        -------
+        out : Units
+            grupa widocznych przeciwników.
+        """
+        perception = self.entry(unit)
+        if perception.visible_enemies is None:
+            self.misses += 1
+            perception.visible_enemies = self.enemy_index.visible_enemies(unit)
+        else:
+            self.hits += 1
+        return perception.visible_enemies
+
+    def has_visible_enemies(self, unit: Unit) -> bool:
+        """
+        Sprawdza, czy w zasięgu wzroku jednostki *unit* są jednostki lub budynki przeciwnika, które mogą zostać
+        zaatakowane. Wynik jest taki sam jak *len(visible_enemies(unit)) > 0*, ale jeśli funkcja *sees_enemies* zna
+        odpowiedź, grupa widocznych przeciwników nie jest wyznaczana.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której wykonywane jest sprawdzenie.
+
+        Returns
+        -------
+        out : bool
+            wartość opisanego wyżej sprawdzenia.
+        """
+        perception = self.entry(unit)
+        if perception.visible_enemies is None and self.sees_enemies is not None:
+            sees_enemies = self.sees_enemies(unit)
+            if sees_enemies is not None:
+                self.hits += 1
+                if not sees_enemies:
+                    # Pusta grupa jest dokładnym wynikiem, więc można ją od razu zapamiętać.
+                    perception.visible_enemies = Units([], self.bot)
+                return sees_enemies
+        return len(self.visible_enemies(unit)) > 0
+
+    def visible_structures(self, unit: Unit) -> Units:
+        """
+        Zwraca wszystkie budynki przeciwnika w zasięgu wzroku jednostki *unit*.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć widoczne budynki.
+
+        Returns
+        -------
+        out : Units
+            grupa widocznych budynków przeciwnika.
+        """
+        perception = self.entry(unit)
+        if perception.visible_structures is None:
+            self.misses += 1
+            perception.visible_structures = self.enemy_index.query(unit.position, unit.sight_range, units=False)
+        else:
+            self.hits += 1
+        return perception.visible_structures
+
+    def threats(self, unit: Unit) -> Units:
+        """
+        Zwraca widoczne jednostki przeciwnika oraz widoczne budynki zdolne do ataku, posortowane rosnąco według
+        odległości od jednostki *unit*.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć zagrożenia.
+
+        Returns
+        -------
+        out : Units
+            posortowana grupa zagrażających jednostce przeciwników.
+        """
+        perception = self.entry(unit)
+        if perception.threats is None:
+            self.misses += 1
+            threats = (self.visible_enemies(unit).filter(lambda enemy: not enemy.is_structure) +
+                       self.visible_structures(unit).filter(lambda enemy: enemy.can_attack))
+            threats.sort(key=lambda enemy: unit.distance_to(enemy))
+            perception.threats = threats
+        else:
+            self.hits += 1
+        return perception.threats
+
+    def enemies_in_range(self, unit: Unit) -> Units:
+        """
+        Zwraca te spośród zagrożeń (patrz *threats()*), które znajdują się w zasięgu ataku jednostki *unit*,
+        powiększonym o 15% jej zasięgu wzroku.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć przeciwników w zasięgu ataku.
+
+        Returns
+        -------
+        out : Units
+            posortowana według odległości grupa przeciwników w zasięgu ataku.
+        """
+        perception = self.entry(unit)
+        if perception.enemies_in_range is None:
+            self.misses += 1
+            perception.enemies_in_range = self.threats(unit).in_attack_range_of(
+                unit, bonus_distance=unit.sight_range * 0.15)
+        else:
+            self.hits += 1
+        return perception.enemies_in_range
+
+    def closest_enemy(self, unit: Unit) -> Optional[Unit]:
+        """
+        Zwraca najbliższego z widocznych przeciwników (patrz *visible_enemies()*) lub None, jeśli jednostka nie widzi
+        żadnego przeciwnika.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć najbliższego przeciwnika.
+
+        Returns
+        -------
+        out : Optional[Unit]
+            najbliższy przeciwnik lub None.
+        """
+        perception = self.entry(unit)
+        if not perception.closest_enemy_known:
+            self.misses += 1
+            visible_enemies = self.visible_enemies(unit)
+            perception.closest_enemy = visible_enemies.closest_to(unit) if visible_enemies.exists else None
+            perception.closest_enemy_known = True
+        else:
+            self.hits += 1
+        return perception.closest_enemy
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Zwraca odsetek zapytań, na które odpowiedziano z pamięci podręcznej.
+
+        Returns
+        -------
+        out : float
+            wartość z przedziału [0, 1].
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
@@ -0,0 +1,267 @@
+import sc2
+from sc2.game_data import Cost
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import Unit
+from s2clientprotocol import common_pb2 as common_pb
+from s2clientprotocol import query_pb2 as query_pb
+from typing import Dict, List, Optional, Set, Tuple, Union
+import numpy as np
+import random
+
+
+class PlacementRequest:
+    """
+    Prośba o zbudowanie budynku w pobliżu punktu *near*, oczekująca na rozwiązanie przez *BuildingPlacement*. Pozycje
+    sprawdzane są na kolejnych pierścieniach wokół punktu *near*, w tej samej kolejności co w metodzie
+    *BotAI.find_placement()*.
+    """
+    __slots__ = ("building", "ability_id", "near", "placement_step", "random_alternative", "cost", "distances",
+                 "next_ring", "position")
+
+    def __init__(self, building: UnitTypeId, ability_id: int, near: Point2, max_distance: int, placement_step: int,
+                 random_alternative: bool, cost: Cost):
+        self.building:              UnitTypeId          = building
+        self.ability_id:            int                 = ability_id
+        self.near:                  Point2              = near
+        self.placement_step:        int                 = placement_step
+        self.random_alternative:    bool                = random_alternative
+        self.cost:                  Cost                = cost
+
+        # Promienie kolejnych pierścieni oraz indeks pierwszego niesprawdzonego z nich.
+        self.distances:             List[int]           = [0]
+        self.distances.extend(range(placement_step, max_distance, placement_step))
+        self.next_ring:             int                 = 0
+        self.position:              Optional[Point2]    = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.next_ring >= len(self.distances)
+
+    def ring(self, distance: int) -> List[Point2]:
+        """
+        Zwraca pozycje leżące na pierścieniu o promieniu *distance* wokół punktu *near*. Pierścień o promieniu 0
+        zawiera tylko punkt *near*.
+        """
+        if distance == 0:
+            return [self.near]
+        steps = range(-distance, distance + 1, self.placement_step)
+        offsets = ([(dx, -distance) for dx in steps] + [(dx, distance) for dx in steps] +
+                   [(-distance, dy) for dy in steps] + [(distance, dy) for dy in steps])
+        return [Point2((self.near.x + dx, self.near.y + dy)) for dx, dy in offsets]
+
+    def next_rings(self, count: int) -> List[List[Point2]]:
+        """
+        Zwraca co najwyżej *count* kolejnych niesprawdzonych pierścieni i oznacza je jako sprawdzone.
+        """
+        distances = self.distances[self.next_ring:self.next_ring + count]
+        self.next_ring += len(distances)
+        return [self.ring(distance) for distance in distances]
+
+    def choose(self, positions: List[Point2]) -> Point2:
+        if self.random_alternative:
+            return random.choice(positions)
+        return min(positions, key=lambda position: position.distance_to_point2(self.near))
+
+
+class BuildingPlacement:
+    """
+    Podsystem wyszukujący miejsca dla budynków. Metoda *BotAI.build()* wysyła do gry osobne zapytanie dla każdego
+    sprawdzanego pierścienia pozycji każdego budynku, czekając na odpowiedź przed wysłaniem kolejnego. Zamiast tego
+    prośby zgłaszane w trakcie jednego wywołania *on_step()* metodą *request()* rozwiązywane są wspólnie w metodzie
+    *flush()*: pozycje z *rings_per_query* kolejnych pierścieni wszystkich próśb sprawdzane są jednym zapytaniem do gry
+    (zapytanie może zawierać pozycje dla różnych rodzajów budynków). Następne zapytanie wysyłane jest tylko dla próśb,
+    dla których nie znaleziono jeszcze miejsca.
+
+    Wyniki zapytań (znane poprawne i niepoprawne pozycje) zapamiętywane są na *max_age* sekund. Pozycje budynków
+    wymagających zasilania, leżące poza polem zasilania gotowych pylonów, odrzucane są bez pytania gry. Zapamiętane
+    wyniki w pobliżu budynku są unieważniane, gdy budynek zaczyna być budowany, zostaje ukończony lub zniszczony
+    (metoda *invalidate_structure()*), a w przypadku pylonu – w całym obszarze jego pola zasilania.
+    """
+    # Budynki, które nie wymagają zasilania pylonu.
+    unpowered_buildings: Set[UnitTypeId] = {UnitTypeId.NEXUS, UnitTypeId.PYLON, UnitTypeId.ASSIMILATOR}
+
+    def __init__(self, bot: sc2.BotAI, power_radius: float = 6.5, rings_per_query: int = 3, max_age: float = 20.):
+        self.bot:               sc2.BotAI                                       = bot
+        self.power_radius:      float                                           = power_radius
+        self.rings_per_query:   int                                             = rings_per_query
+        self.max_age:           float                                           = max_age
+        self.requests:          List[PlacementRequest]                          = []
+
+        # Połowa boku największego budynku (nexusa) – zmiana w odległości większej niż promień budynku powiększony
+        # o tę wartość nie wpływa na możliwość postawienia żadnego budynku.
+        self.footprint_margin:  float                                           = 2.5
+
+        # Wyniki zapytań: kluczem jest (identyfikator zdolności budowy, 2x, 2y), wartością para (wynik, czas gry).
+        self.cache:             Dict[Tuple[int, int, int], Tuple[bool, float]]  = {}
+
+        # Statystyki.
+        self.round_trips:       int                                             = 0
+        self.queried:           int                                             = 0
+        self.cache_hits:        int                                             = 0
+        self.unpowered:         int                                             = 0
+
+    @staticmethod
+    def key(ability_id: int, position: Point2) -> Tuple[int, int, int]:
+        return ability_id, int(round(position.x * 2)), int(round(position.y * 2))
+
+    def request(self, building: UnitTypeId, near: Union[Unit, Point2], max_distance: int = 20,
+                placement_step: int = 2, random_alternative: bool = True) -> bool:
+        """
+        Zgłasza prośbę o zbudowanie budynku *building* w pobliżu *near*. Parametry mają takie samo znaczenie jak
+        w metodzie *BotAI.build()*. Koszt budynku jest od razu rezerwowany (odejmowany od surowców bota), dzięki czemu
+        kolejne sprawdzenia *can_afford()* w tej samej klatce gry uwzględniają zgłoszone budynki.
+
+        Returns
+        -------
+        out : bool
+            False, jeśli bota nie stać na budynek, True w przeciwnym wypadku.
+        """
+        assert building != UnitTypeId.ASSIMILATOR, "Asymilatory budowane są na gejzerach, a nie na pozycjach."
+        if not self.bot.can_afford(building):
+            return False
+        near = near.position.to2 if isinstance(near, Unit) else near.to2
+        cost = self.bot.calculate_cost(building)
+        self.bot.minerals -= cost.minerals
+        self.bot.vespene -= cost.vespene
+        ability_id = self.bot.game_data.units[building.value].creation_ability.id.value
+        self.requests.append(PlacementRequest(building, ability_id, near, max_distance, placement_step,
+                                              random_alternative, cost))
+        return True
+
+    def powered(self, positions: List[Point2]) -> np.ndarray:
+        """
+        Zwraca maskę pozycji leżących w polu zasilania któregoś z gotowych pylonów bota.
+        """
+        pylons = self.bot.structures(UnitTypeId.PYLON).ready
+        if not pylons:
+            return np.zeros(len(positions), dtype=bool)
+        centers = np.array([pylon.position_tuple for pylon in pylons])
+        points = np.array([(position.x, position.y) for position in positions]).reshape(-1, 2)
+        distances = np.sum((points[:, None, :] - centers[None, :, :]) ** 2, axis=2)
+        return np.any(distances <= self.power_radius ** 2, axis=1)
+
+    def cached(self, key: Tuple[int, int, int]) -> Optional[bool]:
+        """
+        Zwraca zapamiętany wynik sprawdzenia pozycji lub None, jeśli wynik nie jest znany lub jest zbyt stary.
+        """
+        entry = self.cache.get(key)
+        if entry is None or self.bot.time - entry[1] > self.max_age:
+            return None
+        return entry[0]
+
+    async def query(self, pending: List[Tuple[int, Point2]]) -> List[bool]:
+        """
+        Sprawdza jednym zapytaniem do gry, czy budynki mogą zostać postawione na podanych pozycjach.
+
+        Parameters
+        ----------
+        pending : List[Tuple[int, Point2]]
+            pary (identyfikator zdolności budowy, pozycja).
+
+        Returns
+        -------
+        out : List[bool]
+            wyniki sprawdzenia dla kolejnych par.
+        """
+        self.round_trips += 1
+        self.queried += len(pending)
+        result = await self.bot.client._execute(query=query_pb.RequestQuery(
+            placements=[query_pb.RequestQueryBuildingPlacement(ability_id=ability_id,
+                                                               target_pos=common_pb.Point2D(x=position.x, y=position.y))
+                        for ability_id, position in pending],
+            ignore_resource_requirements=True))
+        return [placement.result == 1 for placement in result.query.placements]
+
+    async def resolve(self):
+        """
+        Wyszukuje pozycje dla wszystkich zgłoszonych próśb. W każdej rundzie dla każdej nierozwiązanej prośby
+        sprawdzanych jest *rings_per_query* kolejnych pierścieni, a pozycje, których wyniku nie ma w pamięci
+        podręcznej, sprawdzane są jednym zapytaniem do gry. Pozycja wybierana jest z pierwszego pierścienia
+        zawierającego poprawne pozycje, tak jak w metodzie *BotAI.find_placement()*.
+        """
+        unresolved = [request for request in self.requests if not request.exhausted]
+        while unresolved:
+            rounds: List[Tuple[PlacementRequest, List[List[Point2]]]] = []
+            pending: Dict[Tuple[int, int, int], Tuple[int, Point2]] = {}
+            known: Dict[Tuple[int, int, int], bool] = {}
+            for request in unresolved:
+                rings = request.next_rings(self.rings_per_query)
+                rounds.append((request, rings))
+                positions = [position for ring in rings for position in ring]
+                if request.building in self.unpowered_buildings:
+                    powered = np.ones(len(positions), dtype=bool)
+                else:
+                    powered = self.powered(positions)
+                for position, is_powered in zip(positions, powered.tolist()):
+                    key = self.key(request.ability_id, position)
+                    if key in known or key in pending:
+                        continue
+                    if not is_powered:
+                        self.unpowered += 1
+                        known[key] = False
+                        continue
+                    valid = self.cached(key)
+                    if valid is None:
+                        pending[key] = (request.ability_id, position)
+                    else:
+                        self.cache_hits += 1
+                        known[key] = valid
+
+            if pending:
+                results = await self.query(list(pending.values()))
+                for key, valid in zip(pending.keys(), results):
+                    self.cache[key] = (valid, self.bot.time)
+                    known[key] = valid
+
+            for request, rings in rounds:
+                for ring in rings:
+                    valid_positions = [position for position in ring if known[self.key(request.ability_id, position)]]
+                    if valid_positions:
+                        request.position = request.choose(valid_positions)
+                        break
+            unresolved = [request for request, _ in rounds if request.position is None and not request.exhausted]
+
+    async def flush(self):
+        """
+        Rozwiązuje wszystkie prośby zgłoszone w obecnej klatce gry i wydaje rozkazy budowy robotnikom. Rezerwacja
+        kosztu każdej prośby jest zwalniana – rozkaz budowy sam odejmuje koszt budynku od surowców bota. Metoda
+        powinna być wywoływana raz na każde wywołanie metody *on_step()* bota, po podjęciu wszystkich decyzji.
+        """
+        if not self.requests:
+            return
+        await self.resolve()
+        requests, self.requests = self.requests, []
+        for request in requests:
+            self.bot.minerals += request.cost.minerals
+            self.bot.vespene += request.cost.vespene
+            if request.position is None:
+                continue
+            builder = self.bot.select_build_worker(request.position)
+            if builder is not None:
+                self.bot.do(builder.build(request.building, request.position), subtract_cost=True, ignore_warning=True)
+        self.prune()
+
+    def prune(self):
+        """
+        Usuwa z pamięci podręcznej przestarzałe wyniki.
+        """
+        time = self.bot.time
+        self.cache = {key: entry for key, entry in self.cache.items() if time - entry[1] <= self.max_age}
+
+    def invalidate_around(self, position: Point2, radius: float):
+        """
+        Usuwa z pamięci podręcznej wyniki dla pozycji odległych od *position* o mniej niż *radius*.
+        """
+        x, y = int(round(position.x * 2)), int(round(position.y * 2))
+        limit = (radius * 2) ** 2
+        self.cache = {key: entry for key, entry in self.cache.items()
+                      if (key[1] - x) ** 2 + (key[2] - y) ** 2 >= limit}
+
+    def invalidate_structure(self, structure: Unit):
+        """
+        Unieważnia wyniki, na które mógł wpłynąć budynek *structure*, który zaczął być budowany, został ukończony lub
+        zniszczony. W przypadku pylonu unieważniany jest cały obszar jego pola zasilania.
+        """
+        radius = self.power_radius if structure.type_id == UnitTypeId.PYLON else structure.radius
+        self.invalidate_around(structure.position, radius + self.footprint_margin)
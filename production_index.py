@@ -0,0 +1,122 @@
+import sc2
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+from sc2.units import Units
+from typing import Counter, Dict, List, Optional
+
+
+class ProductionIndex:
+    """
+    Indeks liczności jednostek i budynków bota według ich rodzaju, budowany w jednym przejściu po jednostkach raz
+    na każde wywołanie metody *on_step()* bota. Wywołania *BotAI.units(type)*, *BotAI.structures(type)* oraz właściwości
+    *Units.ready* i *Units.idle* filtrują za każdym razem wszystkie jednostki bota, a sprawdzenia kolejności budowy
+    i szkolenia wykonują ich kilkadziesiąt w jednej klatce gry. Indeks przechowuje:
+
+    - liczbę gotowych oraz budowanych (szkolonych, przywoływanych) jednostek i budynków każdego rodzaju,
+    - liczbę rozkazów każdej zdolności wydanych jednostkom i budynkom bota (rozkazy budowy robotników, kolejki
+      szkolenia budynków),
+    - gotowe i niezajęte budynki każdego rodzaju,
+    - liczbę robotników z rozkazem każdej ze zdolności.
+
+    Liczba jednostek oczekujących na stworzenie (metoda *pending()*) odpowiada wartości zwracanej przez
+    *BotAI.already_pending()*.
+    """
+    def __init__(self, bot: sc2.BotAI, creation_abilities: Optional[Dict[UnitTypeId, AbilityId]] = None):
+        self.bot:                   sc2.BotAI                               = bot
+
+        # Zdolności tworzące jednostki każdego rodzaju. Jeśli nie zostały podane, tablica budowana jest na podstawie
+        # danych gry przy pierwszym użyciu.
+        self.creation_abilities:    Optional[Dict[UnitTypeId, AbilityId]]   = creation_abilities
+
+        self.groups:                Dict[UnitTypeId, List[Unit]]            = {}
+        self.ready_counts:          Counter[UnitTypeId]                     = Counter()
+        self.in_progress_counts:    Counter[UnitTypeId]                     = Counter()
+        self.order_counts:          Counter[AbilityId]                      = Counter()
+        self.idle_structures:       Dict[UnitTypeId, List[Unit]]            = {}
+        self.worker_orders:         Counter[AbilityId]                      = Counter()
+
+    def rebuild(self):
+        """
+        Buduje indeks od nowa na podstawie obecnego stanu gry. Metoda powinna być wywoływana raz na początku każdego
+        wywołania metody *on_step()* bota.
+        """
+        self.groups = {}
+        self.ready_counts = Counter()
+        self.in_progress_counts = Counter()
+        self.order_counts = Counter()
+        self.idle_structures = {}
+        self.worker_orders = Counter()
+
+        for unit in self.bot.units:
+            self.add(unit)
+            if unit.type_id == UnitTypeId.PROBE:
+                for order in unit.orders:
+                    self.worker_orders[order.ability.id] += 1
+        for structure in self.bot.structures:
+            self.add(structure)
+            if structure.is_ready and structure.is_idle:
+                self.idle_structures.setdefault(structure.type_id, []).append(structure)
+
+    def add(self, unit: Unit):
+        self.groups.setdefault(unit.type_id, []).append(unit)
+        if unit.is_ready:
+            self.ready_counts[unit.type_id] += 1
+        else:
+            self.in_progress_counts[unit.type_id] += 1
+        for order in unit.orders:
+            self.order_counts[order.ability.id] += 1
+
+    def creation_ability(self, unit_type: UnitTypeId) -> Optional[AbilityId]:
+        """
+        Zwraca zdolność tworzącą jednostkę lub budynek rodzaju *unit_type* lub None, jeśli taka zdolność nie istnieje.
+        """
+        if self.creation_abilities is None:
+            self.creation_abilities = {}
+            for type_id, unit_data in self.bot.game_data.units.items():
+                if unit_data.creation_ability is not None:
+                    self.creation_abilities[UnitTypeId(type_id)] = unit_data.creation_ability.id
+        return self.creation_abilities.get(unit_type)
+
+    def amount(self, unit_type: UnitTypeId) -> int:
+        """
+        Zwraca liczbę wszystkich (gotowych oraz budowanych) jednostek i budynków rodzaju *unit_type*.
+        """
+        return self.ready_counts[unit_type] + self.in_progress_counts[unit_type]
+
+    def ready_amount(self, unit_type: UnitTypeId) -> int:
+        """
+        Zwraca liczbę gotowych jednostek i budynków rodzaju *unit_type*.
+        """
+        return self.ready_counts[unit_type]
+
+    def pending(self, unit_type: UnitTypeId) -> int:
+        """
+        Zwraca liczbę jednostek lub budynków rodzaju *unit_type*, które są budowane, szkolone lub przywoływane albo
+        zostaną zbudowane przez robotnika z rozkazem ich budowy (tak jak *BotAI.already_pending()*).
+        """
+        return self.order_counts[self.creation_ability(unit_type)] + self.in_progress_counts[unit_type]
+
+    def en_route(self, unit_type: UnitTypeId) -> int:
+        """
+        Zwraca liczbę robotników z rozkazem budowy budynku rodzaju *unit_type*.
+        """
+        return self.worker_orders[self.creation_ability(unit_type)]
+
+    def of_type(self, unit_type: UnitTypeId) -> Units:
+        """
+        Zwraca wszystkie jednostki i budynki rodzaju *unit_type* (w kolejności, w jakiej występują w obserwacji).
+        """
+        return Units(self.groups.get(unit_type, []), self.bot)
+
+    def ready(self, unit_type: UnitTypeId) -> Units:
+        """
+        Zwraca gotowe jednostki i budynki rodzaju *unit_type*.
+        """
+        return Units([unit for unit in self.groups.get(unit_type, []) if unit.is_ready], self.bot)
+
+    def idle(self, unit_type: UnitTypeId) -> Units:
+        """
+        Zwraca gotowe budynki rodzaju *unit_type*, które nie wykonują żadnej czynności (np. szkolenia jednostki).
+        """
+        return Units(self.idle_structures.get(unit_type, []), self.bot)
@@ -0,0 +1,174 @@
+from py_trees.behaviour import Behaviour
+from flat_hfsm import FlatHfsm
+from typing import Any, Callable, Dict, List, Optional
+import functools
+import json
+import pysm
+import time
+
+
+class NodeStats:
+    """
+    Zagregowane statystyki czasu wykonania jednego rodzaju węzła drzewa zachowań, procedury obsługi zdarzenia maszyny
+    stanów lub metody kontrolera.
+    """
+    __slots__ = ("calls", "total", "max_call", "frame", "frame_total", "max_frame")
+
+    def __init__(self):
+        self.calls:         int     = 0
+        self.total:         float   = 0.
+        self.max_call:      float   = 0.
+        self.frame:         int     = -1
+        self.frame_total:   float   = 0.    # Czas zużyty w klatce gry *frame*.
+        self.max_frame:     float   = 0.    # Największy czas zużyty w jednej klatce gry.
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "total": self.total, "mean": self.total / self.calls if self.calls else 0.,
+                "max_call": self.max_call, "max_frame": max(self.max_frame, self.frame_total)}
+
+
+class NodeProfiler:
+    """
+    Opcjonalny profiler węzłów drzew zachowań (metody *update()* oraz *initialise()* węzłów py_trees) oraz maszyn
+    stanów (procedury obsługi zdarzeń pysm oraz metoda *dispatch()*). Czasy wywołań sumowane są dla wszystkich
+    instancji węzła o tej samej klasie i nazwie w danej grupie (np. wszystkie węzły "Attack best target" drzew
+    jednostek).
+
+    Pomiar odbywa się poprzez podmianę metod w instancjach węzłów, dlatego wyłączony profiler nie wprowadza żadnego
+    narzutu – metody *instrument_...()* nie powinny być wtedy wywoływane.
+    """
+    def __init__(self, enabled: bool = False, clock: Callable[[], float] = time.perf_counter):
+        self.enabled:   bool                    = enabled
+        self.clock:     Callable[[], float]     = clock
+        self.frame:     int                     = 0
+        self.stats:     Dict[str, NodeStats]    = {}
+
+    def begin_frame(self, frame: int):
+        """
+        Ustawia numer obecnej klatki gry, względem której liczony jest czas zużyty w jednej klatce.
+        """
+        self.frame = frame
+
+    def record(self, key: str, elapsed: float):
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = NodeStats()
+        stats.calls += 1
+        stats.total += elapsed
+        stats.max_call = max(stats.max_call, elapsed)
+        if stats.frame != self.frame:
+            stats.max_frame = max(stats.max_frame, stats.frame_total)
+            stats.frame = self.frame
+            stats.frame_total = 0.
+        stats.frame_total += elapsed
+
+    def wrap(self, key: str, function: Callable) -> Callable:
+        """
+        Zwraca funkcję wywołującą *function* i zapisującą czas jej wykonania pod kluczem *key*.
+        """
+        clock = self.clock
+        record = self.record
+
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(key, clock() - start)
+        return profiled
+
+    def instrument_method(self, obj: Any, method: str, group: str):
+        """
+        Podmienia metodę *method* obiektu *obj* na wersję mierzącą czas wykonania.
+        """
+        setattr(obj, method, self.wrap("{}/{}".format(group, method), getattr(obj, method)))
+
+    def instrument_tree(self, root: Behaviour, group: str):
+        """
+        Podmienia metody *update()* wszystkich węzłów drzewa zachowań o korzeniu *root* oraz metody *initialise()*
+        węzłów, które ją przeciążają.
+
+        Parameters
+        ----------
+        root : Behaviour
+            korzeń drzewa zachowań.
+        group : str
+            nazwa grupy (np. "unit_bt"), poprzedzająca nazwy węzłów w statystykach.
+        """
+        for node in root.iterate():
+            # Nazwy węzłów nie są unikalne (np. sekwencja i węzeł "Group movement"), dlatego klucz zawiera też klasę.
+            name = "{}/{}:{}".format(group, type(node).__name__, node.name.replace("\n", " "))
+            node.update = self.wrap(name + ".update", node.update)
+            if type(node).initialise is not Behaviour.initialise:
+                node.initialise = self.wrap(name + ".initialise", node.initialise)
+
+    def instrument_state_machine(self, root: pysm.StateMachine, group: str):
+        """
+        Podmienia procedury obsługi zdarzeń wszystkich stanów maszyny stanów *root* oraz jej metodę *dispatch()*.
+        Różnica pomiędzy czasem *dispatch* a sumą czasów procedur obsługi zdarzeń to narzut samej biblioteki pysm.
+
+        Parameters
+        ----------
+        root : pysm.StateMachine
+            korzeń hierarchicznej maszyny stanów.
+        group : str
+            nazwa grupy (np. "unit_hfsm"), poprzedzająca nazwy stanów w statystykach.
+        """
+        states: List[pysm.State] = [root]
+        while states:
+            state = states.pop()
+            for event, handler in state.handlers.items():
+                state.handlers[event] = self.wrap("{}/{}.{}".format(group, state.name, event), handler)
+            if isinstance(state, pysm.StateMachine):
+                states.extend(state.states)
+        self.instrument_method(root, "dispatch", group)
+
+    def instrument_flat_state_machine(self, machine: FlatHfsm, group: str):
+        """
+        Podmienia procedury obsługi zdarzeń maszyny stanów *FlatHfsm* oraz jej metodę *dispatch()*.
+
+        Parameters
+        ----------
+        machine : FlatHfsm
+            maszyna stanów.
+        group : str
+            nazwa grupy (np. "unit_flat_hfsm"), poprzedzająca nazwy stanów w statystykach.
+        """
+        spec = machine.spec
+        wrapped: Dict[int, Callable] = {}
+
+        def wrap_handler(handler: Optional[Callable], state: int, event: str) -> Optional[Callable]:
+            # Ta sama procedura może obsługiwać zdarzenie w wielu stanach (np. odziedziczona po przodku).
+            if handler is None:
+                return None
+            if id(handler) not in wrapped:
+                wrapped[id(handler)] = self.wrap("{}/{}.{}".format(group, spec.state_names[state], event), handler)
+            return wrapped[id(handler)]
+
+        for state in range(len(spec.state_names)):
+            machine.enter_handlers[state] = wrap_handler(machine.enter_handlers[state], state, spec.ENTER)
+            machine.exit_handlers[state] = wrap_handler(machine.exit_handlers[state], state, spec.EXIT)
+            for event, handler in enumerate(machine.handlers[state]):
+                machine.handlers[state][event] = wrap_handler(handler, state, spec.event_names[event])
+        self.instrument_method(machine, "dispatch", group)
+
+    def table(self) -> str:
+        """
+        Zwraca statystyki w postaci tabeli posortowanej malejąco według łącznego czasu wykonania.
+        """
+        lines = ["{:<72} {:>9} {:>11} {:>10} {:>10} {:>12}".format(
+            "node", "calls", "total[ms]", "mean[us]", "max[us]", "frame[ms]")]
+        for key, stats in sorted(self.stats.items(), key=lambda item: -item[1].total):
+            data = stats.to_dict()
+            lines.append("{:<72} {:>9} {:>11.2f} {:>10.2f} {:>10.2f} {:>12.3f}".format(
+                key, data["calls"], data["total"] * 1e3, data["mean"] * 1e6, data["max_call"] * 1e6,
+                data["max_frame"] * 1e3))
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        """
+        Zapisuje statystyki do pliku JSON *path* (czasy w sekundach).
+        """
+        with open(path, "w") as file:
+            json.dump({key: stats.to_dict() for key, stats in self.stats.items()}, file, indent=2)
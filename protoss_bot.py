@@ -3,21 +3,44 @@ from sc2.ids.unit_typeid import UnitTypeId
 from sc2.ids.ability_id import AbilityId
 from sc2.ids.buff_id import BuffId
 from sc2.unit import Unit
-from sc2.units import UnitSelection, Units
+from sc2.units import Units
 from sc2.position import Point2, Point3
-from typing import List, Optional, Dict, Union, cast
+from sc2.data import race_townhalls
+from typing import Optional, Dict, Union, cast
 import random
 from enum import Enum
 from unit_ai_data import UnitAiController
-from hfsm_unit_behavior import UnitHfsmController
-from bht_unit_behavior import UnitBhtController
+from hfsm_unit_behavior import UnitHfsmController, UnitFlatHfsmController
+from bht_unit_behavior import UnitBhtController, SharedUnitBht, SharedUnitBhtController
 from army_bht import ArmyBht
+from army_manager import ArmyManager
+from spatial_index import EnemySpatialIndex
+from perception import PerceptionCache
+from squads import SquadPerception
+from target_selection import BatchTargetSelector
+from unit_lookup import UnitLookup
+from damage_tracker import DamageTracker
+from strength_ledger import EnemyStrengthLedger
+from command_buffer import CommandBuffer
+from placement import BuildingPlacement
+from expansions import ExpansionTable
+from ability_model import AbilityModel
+from production_index import ProductionIndex
+from frame_scheduler import FrameScheduler
+from step_controller import GameStepController
+from controller_scheduler import ControllerScheduler
+from profiling import NodeProfiler
+from recording import ObservationRecorder
 import py_trees
+import numpy as np
+import os
 
 
 class UnitAiType(Enum):
     HierarchicalStateMachine = 0
     BehaviorTree = 1
+    FlatStateMachine = 2
+    SharedBehaviorTree = 3
 
 
 class ProtossBot(sc2.BotAI):
@@ -28,34 +51,130 @@ class ProtossBot(sc2.BotAI):
         # Określa ile ramek gry przypada na 1 sekundę.
         self.frames_per_second:         float               = 22.4
 
-        # Słownik zawiera dane jednostek, które od ostatniego wywołania metody self.on_step() utraciły punkty życia lub
-        # tarczy pod kluczami będącymi tagami tych jednostek. Lista self.damaged_units przechowuje tagi tych jednostek.
-        self.damaged_units:             List[int]           = []
-        self.remembered_friendly_units: Dict[int, Unit]     = {}
-
-        # Drzewo zachowań sterujące logiką armii bota.
-        self.army_bht:                  ArmyBht             = ArmyBht(self,
-                                                                      get_unit_ai=self.get_unit_ai,
-                                                                      delta_time=self.delta_time)
+        # Obiekt zapamiętujący punkty życia oraz tarczy jednostek bota, pozwalający sprawdzić, które z nich od
+        # ostatniego wywołania metody self.on_step() utraciły punkty życia lub tarczy.
+        self.damage_tracker:            DamageTracker       = DamageTracker()
+
+        # Słowniki pozwalające szybko odnaleźć jednostki bota oraz przeciwnika po ich tagach, budowane od nowa w każdym
+        # wywołaniu self.on_step().
+        self.unit_lookup:               UnitLookup          = UnitLookup(self)
+
+        # Indeks przestrzenny jednostek i budynków przeciwnika, budowany od nowa w każdym wywołaniu self.on_step().
+        # Węzły drzew zachowań oraz stany maszyn stanów korzystają z niego, by szybko znaleźć pobliskich wrogów.
+        self.enemy_index:               EnemySpatialIndex   = EnemySpatialIndex(self)
+
+        # Podział jednostek bojowych na oddziały (według rozkazu i położenia), budowany od nowa w każdym wywołaniu
+        # self.on_step(). Pozwala sprawdzić, czy jednostka widzi przeciwników, raz dla całego oddziału.
+        self.squads:                    SquadPerception     = SquadPerception(self, self.enemy_index)
+
+        # Pamięć podręczna wyników percepcji jednostek (widoczni przeciwnicy, przeciwnicy w zasięgu ataku itp.),
+        # unieważniana automatycznie w każdej kolejnej klatce gry.
+        self.perception:                PerceptionCache     = PerceptionCache(self, self.enemy_index,
+                                                                              sees_enemies=self.squads.sees_enemies)
+
+        # Obiekt wybierający jednocześnie cele ataku dla wszystkich jednostek bojowych bota.
+        self.target_selector:           BatchTargetSelector = BatchTargetSelector(self)
+
+        # Rejestr siły zauważonych jednostek przeciwnika (również tych, które zniknęły we mgle wojny), aktualizowany
+        # w każdym wywołaniu self.on_step() oraz po zniszczeniu jednostki.
+        self.enemy_ledger:              EnemyStrengthLedger = EnemyStrengthLedger()
+
+        # Armie bota – skupiska jednostek bojowych wyznaczane w każdym wywołaniu self.on_step(), z których każde
+        # sterowane jest przez własne drzewo zachowań ArmyBht tworzone metodą self.create_army_bht().
+        self.armies:                    ArmyManager         = ArmyManager(create_army=self.create_army_bht)
+
+        # Bufor rozkazów wydanych jednostkom w obecnej klatce gry. Odrzuca zbędne rozkazy i grupuje identyczne rozkazy
+        # wielu jednostek przed wysłaniem ich do gry.
+        self.command_buffer:            CommandBuffer       = CommandBuffer()
+
+        # Podsystem wyszukujący miejsca dla budynków. Budynki zgłoszone w trakcie jednego wywołania self.on_step() są
+        # rozmieszczane wspólnie (jednym zapytaniem do gry na kilka pierścieni pozycji), a wyniki zapytań są
+        # zapamiętywane do czasu zmiany budynków w okolicy.
+        self.placement:                 BuildingPlacement   = BuildingPlacement(self)
+
+        # Tablica lokacji z surowcami oraz długości ścieżek pomiędzy nimi, przygotowywana w self.on_start(). Tablica
+        # jest zapisywana w katalogu self.expansion_cache_dir (jeśli nie jest None), a w kolejnych grach na tej samej
+        # mapie – wczytywana z dysku.
+        self.expansion_table:           ExpansionTable      = ExpansionTable([], np.zeros((0, 0)))
+        self.expansion_cache_dir:       Optional[str]       = "expansion_cache"
+
+        # Lokalny model dostępności zdolności (energia nexusów, czasy odnowienia, badania) oraz tablica czasów trwania
+        # zdolności. Pozwala uniknąć zapytań self.can_cast() w każdym wywołaniu self.on_step().
+        self.ability_model:             AbilityModel        = AbilityModel(self, self.unit_lookup)
+
+        # Indeks liczby jednostek i budynków według rodzaju (gotowych, budowanych, oczekujących) oraz niezajętych
+        # budynków, budowany raz na każde wywołanie self.on_step() na potrzeby decyzji o budowie i szkoleniu.
+        self.production_index:          ProductionIndex     = ProductionIndex(self)
+
+        # Planista aktualizacji kontrolerów jednostek, który ogranicza czas zużywany na sterowanie jednostkami w jednym
+        # wywołaniu self.on_step(). Jednostki walczące lub zranione są aktualizowane zawsze, pozostałe – po kolei.
+        self.controller_scheduler:      ControllerScheduler = ControllerScheduler()
+
+        # Determinuje, czy drzewa zachowań jednostek oraz armii wykonywane są w wersji skompilowanej (moduł
+        # bt_compiler), czy przez metodę tick_once() biblioteki py_trees. Obie wersje podejmują te same decyzje.
+        self.compiled_behavior_trees:   bool                = True
+
+        # Drzewo zachowań współdzielone przez wszystkie jednostki bojowe, jeśli typem AI jest
+        # UnitAiType.SharedBehaviorTree. Stan drzewa dla każdej jednostki przechowywany jest w jego tablicach.
+        self.shared_unit_bht:           SharedUnitBht       = SharedUnitBht(self,
+                                                                            unit_attacked=self.is_unit_attacked,
+                                                                            perception=self.perception,
+                                                                            target_selector=self.target_selector,
+                                                                            unit_lookup=self.unit_lookup,
+                                                                            ability_model=self.ability_model)
+
+        # Opcjonalny profiler węzłów drzew zachowań oraz maszyn stanów. Musi zostać włączony przed rozpoczęciem gry;
+        # wyniki zapisywane są na końcu gry do pliku self.profiler_output.
+        self.profiler:                  NodeProfiler        = NodeProfiler(enabled=False)
+        self.profiler_output:           str                 = "node_profile.json"
+
+        # Opcjonalny rejestrator obserwacji oraz rozkazów bota (np. ObservationRecorder("recording")), który musi
+        # zostać ustawiony przed rozpoczęciem gry. Zapis można odtworzyć bez gry za pomocą modułu replay.
+        self.recorder:                  Optional[ObservationRecorder] = None
 
         # Słownik przechowujący maszynę stanów lub drzewo zachowań dla każdej jednostki bojowej. Kluczem są tagi
         # jednostek.
         self.unit_controllers:          Dict[int, UnitAiController]   = {}
 
         # Determinuje typ AI, który jest wykorzystany do sterowania jednostkami (drzewa zachowań lub hierarchiczne
-        # maszyny stanów).
+        # maszyny stanów w wersji pysm albo skompilowanej FlatHfsm).
         self.unit_ai_type:              UnitAiType                      = UnitAiType.BehaviorTree
 
+        # Determinuje, czy bot zbiera surowce na budowę nexusa w nowej lokacji (lub budynków w jej pobliżu) – wtedy
+        # jednostki bojowe nie są szkolone.
+        self.saving_resources:          bool                            = False
+
+        # Planista podsystemów bota. Jednostki oraz armia sterowane są w każdym wywołaniu self.on_step(), natomiast
+        # decyzje ekonomiczne podejmowane są rzadziej (okresy podane są w klatkach gry), w różnych krokach.
+        self.frame_scheduler:           FrameScheduler                  = FrameScheduler()
+        self.frame_scheduler.register("units", self.control_units)
+        self.frame_scheduler.register("army", self.manage_army_units)
+        self.frame_scheduler.register("distribute_workers", self.distribute_workers, interval=16)
+        self.frame_scheduler.register("train_workers", self.train_workers, interval=8)
+        self.frame_scheduler.register("research", self.research_upgrades, interval=32)
+        self.frame_scheduler.register("chronoboost", self.use_chronoboost, interval=16)
+        build = self.frame_scheduler.register("build", self.build_structures, interval=8)
+
+        # Jednostki bojowe szkolone są w tych samych krokach co budowa budynków, po niej – tak jak wcześniej, budynki
+        # mają pierwszeństwo w wydawaniu surowców (a self.saving_resources jest aktualne).
+        self.frame_scheduler.register("train_army", self.train_army, interval=8, phase=build.phase)
+
+        # Regulator wartości game_step: podczas walki self.on_step() wywoływana jest co 4 klatki gry, poza walką – co 8
+        # klatek, chyba że czas wykonania kroków wymaga rzadszych wywołań.
+        self.step_controller:           GameStepController              = GameStepController(
+            frames_per_second=self.frames_per_second)
+
     def delta_time(self) -> float:
         """
-        Zwraca czas pomiędzy kolejnymi wywołaniami metody self.on_step().
+        Zwraca czas (w sekundach gry), który upłynął pomiędzy poprzednim a obecnym wywołaniem metody self.on_step().
+        Wartość game_step zmienia się w trakcie gry, dlatego czas liczony jest na podstawie numerów klatek gry.
 
         Returns
         -------
         out : float
             wartość czasu.
         """
-        return self._client.game_step / self.frames_per_second
+        return self.step_controller.step_frames / self.frames_per_second
 
     def get_unit_ai(self, unit_tag: int) -> Optional[UnitAiController]:
         """
@@ -77,19 +196,10 @@ class ProtossBot(sc2.BotAI):
 
     def remember_damaged_units(self):
         """
-        Metoda służąca do zapamiętania w słowniku self.remembered_friendly_units wszystkie takie jednostki,
-        które od ostatniego wywołania metody self.on_step() utraciły punkty życia lub tarczy. Słownik przechowuje
-        dane jednostek w postaci obiektów Unit pod kluczami będącymi tagami tych jednostek.
+        Metoda służąca do zapamiętania w obiekcie self.damage_tracker wszystkich takich jednostek, które od ostatniego
+        wywołania metody self.on_step() utraciły punkty życia lub tarczy.
         """
-        self.damaged_units.clear()
-        for unit in self.units:
-            if unit.tag in self.remembered_friendly_units:
-                old_health = self.remembered_friendly_units[unit.tag].health
-                old_shield = self.remembered_friendly_units[unit.tag].shield
-
-                if unit.health < old_health or unit.shield < old_shield:
-                    self.damaged_units.append(unit.tag)
-            self.remembered_friendly_units[unit.tag] = unit
+        self.damage_tracker.update(self.units)
 
     def is_unit_attacked(self, unit_tag: int) -> bool:
         """
@@ -107,7 +217,26 @@ class ProtossBot(sc2.BotAI):
         out : bool
             wartość sprawdzenia opisanego wyżej.
         """
-        return unit_tag in self.damaged_units
+        return self.damage_tracker.is_unit_attacked(unit_tag)
+
+    def is_controller_urgent(self, unit_tag: int, controller: UnitAiController) -> bool:
+        """
+        Zwraca True, jeśli kontroler jednostki o tagu *unit_tag* musi zostać zaktualizowany w obecnym wywołaniu metody
+        self.on_step(), tzn. jednostka walczy lub właśnie została zraniona.
+
+        Parameters
+        ----------
+        unit_tag : int
+            tag jednostki.
+        controller : UnitAiController
+            kontroler jednostki.
+
+        Returns
+        -------
+        out : bool
+            wartość opisanego wyżej sprawdzenia.
+        """
+        return controller.in_combat or self.is_unit_attacked(unit_tag)
 
     def is_less_than(self, unit: UnitTypeId, count: int) -> bool:
         """
@@ -127,7 +256,7 @@ class ProtossBot(sc2.BotAI):
         out : bool
             wartość opisanego powyżej testu.
         """
-        return (self.units(unit) + self.structures(unit)).ready.amount + self.already_pending(unit) < count
+        return self.production_index.ready_amount(unit) + self.production_index.pending(unit) < count
 
     def can_train(self, unit: UnitTypeId, max_amount: int = 200) -> bool:
         """
@@ -214,7 +343,7 @@ class ProtossBot(sc2.BotAI):
             ale również lokalizacją tego budynku.
         """
         for gas in self.vespene_geyser.closer_than(10, nexus):
-            if self.structures(UnitTypeId.ASSIMILATOR).closer_than(1.0, gas).empty:
+            if self.production_index.of_type(UnitTypeId.ASSIMILATOR).closer_than(1.0, gas).empty:
                 worker = self.select_build_worker(gas.position, force=True)
                 mineral = self.mineral_field.closest_to(nexus)
                 worker.build(UnitTypeId.ASSIMILATOR, gas)
@@ -239,7 +368,7 @@ class ProtossBot(sc2.BotAI):
             zwraca losowy pylon, jeśli w danym dystancie jakieś występują, lub zwraca budynek *building* w przeciwnym
             wypadku.
         """
-        pylons = self.structures(UnitTypeId.PYLON).closer_than(distance, building)
+        pylons = self.production_index.of_type(UnitTypeId.PYLON).closer_than(distance, building)
         return pylons.random if pylons.exists else building
 
     def workers_needed(self) -> int:
@@ -253,14 +382,14 @@ class ProtossBot(sc2.BotAI):
             liczba wymaganych robotników.
         """
         count = -self.workers.amount
-        for nexus in self.structures(UnitTypeId.NEXUS):
+        for nexus in self.production_index.of_type(UnitTypeId.NEXUS):
             if nexus.is_ready:
                 count += nexus.ideal_harvesters
             else:
                 count += 16
 
         # 1 robotnik przebywa w każdym z budynków, w którym wydobywany jest vespan
-        for assimilator in self.structures(UnitTypeId.ASSIMILATOR):
+        for assimilator in self.production_index.of_type(UnitTypeId.ASSIMILATOR):
             if assimilator.is_ready:
                 count += assimilator.ideal_harvesters - 1
             else:
@@ -268,213 +397,390 @@ class ProtossBot(sc2.BotAI):
 
         return count
 
-    def manage_army_units(self):
+    def create_army_bht(self) -> ArmyBht:
         """
-        Metoda zarządzająca jednostkami należącymi do armii bota. Każda jednostka niebędąca robotnikiem w pobliżu
-        centrum armii (w dystancie 10 jednostek) jest przyłączana do armii, natomiast wszystkie pozostałe jednostki,
-        jeśli nie mają żadnego innego rozkazu, dostają rozkaz przemieszczenia się w kierunku armii.
+        Tworzy drzewo zachowań dla nowej armii bota.
 
-        Jeśli gracz nie posiada żadnej jednostki w swojej armii, wybierana jest losowa jednostka bojowa, która staje się
-        pierwszą jednostką armii bota.
+        Returns
+        -------
+        out : ArmyBht
+            drzewo zachowań armii.
+        """
+        army_bht = ArmyBht(self,
+                           get_unit_ai=self.get_unit_ai,
+                           delta_time=self.delta_time,
+                           perception=self.perception,
+                           unit_lookup=self.unit_lookup,
+                           enemy_ledger=self.enemy_ledger,
+                           expansion_table=self.expansion_table)
+        army_bht.compiled = self.compiled_behavior_trees
+        if self.profiler.enabled:
+            army_bht.instrument(self.profiler)
+        return army_bht
 
-        Następnie, podjęta zostaje decyzja dla armii gracza w oparciu o drzewo zachowań armii.
+    def manage_army_units(self):
         """
-        battle_capable_units: Units = Units([unit for unit in self.units if unit.type_id != UnitTypeId.PROBE], self)
-        if len(self.army_bht.army.units) > 0:
-            army_units: Units = self.units.tags_in(self.army_bht.army.units)
-            additional_units: Units = Units(
-                [unit for unit in battle_capable_units if unit.distance_to(army_units.center) < 10 and
-                 unit not in army_units], self)
-            self.army_bht.army.units = [unit.tag for unit in army_units + additional_units]
+        Metoda zarządzająca jednostkami należącymi do armii bota. Jednostki niebędące robotnikami dzielone są na
+        skupiska (jednostki leżące w sąsiednich komórkach siatki należą do jednego skupiska), a każde dostatecznie
+        liczne skupisko tworzy osobną armię. Oddalone od siebie grupy jednostek działają więc niezależnie – np. słaba,
+        odłączona grupa wycofuje się do bazy, gdzie łączy się z pozostałymi jednostkami. Nieliczne skupiska (np. nowo
+        wyszkolone jednostki) dołączają do największej armii.
 
-            remaining_units: Units = Units([unit for unit in battle_capable_units if unit not in army_units and
-                                            unit not in additional_units], self)
-            for unit in remaining_units:
-                if unit.is_idle:
-                    unit.move(army_units.center)
-        else:
-            if battle_capable_units.exists:
-                self.army_bht.army.units = [battle_capable_units.random.tag]
-        self.army_bht.update()
+        Następnie, podjęta zostaje decyzja dla każdej armii gracza w oparciu o jej drzewo zachowań.
+        """
+        battle_capable_units: Units = self.units.filter(lambda unit: unit.type_id != UnitTypeId.PROBE)
+        self.armies.update(battle_capable_units)
 
     async def on_start(self):
         # Zmienna *game_step* określa co ile klatek gry wywoływana jest metoda self.on_step(). Domyślnie wartość ta
         # wynosi 8, ale ponieważ bot steruje jednostkami indywidualnie, zwiększenie częstotliwości podejmowania decyzji
-        # pozwala na osiągnięcie lepszej szybkości reakcji w przypadku np. bitew.
-        self._client.game_step = 4
+        # pozwala na osiągnięcie lepszej szybkości reakcji w przypadku np. bitew. W trakcie gry wartość dobiera
+        # regulator self.step_controller.
+        self.step_controller.realtime = self.realtime
+        self._client.game_step = self.step_controller.step
+
+        await self.prepare_expansion_table()
+        if self.recorder is not None:
+            self.recorder.start(self)
+
+        self.shared_unit_bht.compiled = self.compiled_behavior_trees
+        if self.profiler.enabled:
+            self.armies.instrument(self.profiler)
+            self.profiler.instrument_method(self.enemy_ledger, "observe", "enemy_ledger")
+
+    async def prepare_expansion_table(self):
+        """
+        Przygotowuje tablicę lokacji z surowcami: wczytuje ją z dysku, jeśli była już obliczona dla obecnej mapy,
+        a w przeciwnym wypadku oblicza ją (jednym zapytaniem do gry o długości ścieżek) i zapisuje na dysku.
+        """
+        locations = self.expansion_locations_list
+        path: Optional[str] = None
+        if self.expansion_cache_dir is not None:
+            terrain = [self.game_info.terrain_height.data_numpy.tobytes(),
+                       self.game_info.placement_grid.data_numpy.tobytes()]
+            path = os.path.join(self.expansion_cache_dir,
+                                ExpansionTable.cache_key(self.game_info.map_name, terrain, locations))
+            table = ExpansionTable.load(path)
+            if table is not None:
+                self.expansion_table = table
+                return
+        self.expansion_table = await ExpansionTable.compute(self.client, locations,
+                                                            [self.start_location] + self.enemy_start_locations,
+                                                            self.game_info.map_center)
+        if path is not None:
+            self.expansion_table.save(path)
+
+    async def on_end(self, game_result):
+        # Zapisz statystyki profilera węzłów drzew zachowań oraz maszyn stanów, jeśli był włączony, oraz wypisz czasy
+        # wykonania podsystemów bota.
+        if self.profiler.enabled:
+            print(self.profiler.table())
+            print(self.frame_scheduler.table())
+            self.profiler.dump(self.profiler_output)
+        if self.recorder is not None:
+            self.recorder.close()
 
     async def on_unit_destroyed(self, unit_tag):
         # Usuń zniszczoną jednostkę o tagu *unit_tag* ze słownika, który przechowuje maszyny stanów jednostek, jeśli
-        # jest to jedna z jednostek należących do bota oraz ze słownika zapamiętującego jednostki zranione od ostatniego
-        # wywołania self.on_step(). Jednostka powinna być także usunięta z listy self.damaged_units.
+        # jest to jedna z jednostek należących do bota oraz z obiektu zapamiętującego jednostki zranione od ostatniego
+        # wywołania self.on_step().
         self.unit_controllers.pop(unit_tag, None)
-        self.remembered_friendly_units.pop(unit_tag, None)
-        if unit_tag in self.damaged_units:
-            self.damaged_units.remove(unit_tag)
-
-        # Należy jeszcze usunąć jednostkę z listy jednostek sterowanych przez drzewo zachowań dla armii posiadanej przez
-        # bota.
-        if unit_tag in self.army_bht.army.units:
-            self.army_bht.army.units.remove(unit_tag)
+        self.shared_unit_bht.remove(unit_tag)
+        self.damage_tracker.remove(unit_tag)
+        self.enemy_ledger.remove(unit_tag)
+        self.ability_model.remove(unit_tag)
+        if self.recorder is not None:
+            self.recorder.unit_destroyed(unit_tag)
+
+        # Zniszczenie budynku bota zmienia możliwe miejsca budowy w jego okolicy. Słowniki tagów pochodzą jeszcze
+        # z poprzedniej klatki gry, więc zawierają zniszczony budynek.
+        structure = self.unit_lookup.friendly(unit_tag)
+        if structure is not None and structure.is_structure:
+            self.placement.invalidate_structure(structure)
+
+        # Należy jeszcze usunąć jednostkę ze zbioru jednostek armii, do której należała.
+        self.armies.discard(unit_tag)
+
+    async def on_building_construction_started(self, unit: Unit):
+        self.placement.invalidate_structure(unit)
+
+    async def on_building_construction_complete(self, unit: Unit):
+        # Ukończony pylon zasila budynki w swojej okolicy.
+        if unit.type_id == UnitTypeId.PYLON:
+            self.placement.invalidate_structure(unit)
 
     async def on_step(self, iteration: int):
+        self.step_controller.begin_step(self.state.game_loop)
+        if self.profiler.enabled:
+            self.profiler.begin_frame(self.state.game_loop)
+        if self.recorder is not None:
+            self.recorder.capture(self)
+        await self.make_decisions(iteration)
+
+        # Rozmieść budynki zgłoszone w tej klatce gry i wydaj rozkazy ich budowy.
+        await self.placement.flush()
+
+        # Przetwórz rozkazy wydane w tej klatce gry przed wysłaniem ich do gry.
+        self.command_buffer.flush(self.actions)
+        if self.recorder is not None:
+            self.recorder.record_commands(self.state.game_loop, self.actions)
+
+        # Dobierz wartość game_step dla kolejnego kroku na podstawie czasu wykonania kroku oraz intensywności walki.
+        game_step = self.step_controller.end_step(self.time, self.damage_tracker.damaged_count(),
+                                                  self.enemy_units.amount)
+        if self.step_controller.enabled:
+            self._client.game_step = game_step
+
+    async def make_decisions(self, iteration: int):
+        """
+        Metoda podejmująca wszystkie decyzje bota w obecnej klatce gry: sterowanie jednostkami bojowymi oraz armią,
+        zarządzanie robotnikami, budowanie budynków oraz szkolenie jednostek.
+
+        Parameters
+        ----------
+        iteration : int
+            numer kolejnego wywołania metody self.on_step().
+        """
         # Zapamiętaj wszystkie takie jednostki, które od ostatniego wywołania metody self.on_step() utraciły punkty
         # życia lub tarczy.
         self.remember_damaged_units()
 
+        # Zbuduj słowniki tagów jednostek, indeks przestrzenny jednostek przeciwnika widocznych w obecnej klatce gry
+        # oraz indeks liczby jednostek i budynków bota według rodzaju.
+        self.unit_lookup.rebuild()
+        self.enemy_index.rebuild()
+        self.production_index.rebuild()
+
+        # Zapamiętaj siłę jednostek przeciwnika, które pojawiły się w zasięgu wzroku lub z niego zniknęły.
+        self.enemy_ledger.observe(self.enemy_units, self.time)
+
+        # Usuń rezerwacje energii zdolności, których efekt widać już w obserwacji.
+        self.ability_model.observe(self.time)
+
+        # Wywołaj podsystemy bota, które powinny zostać wywołane w obecnej klatce gry.
+        await self.frame_scheduler.run(self.state.game_loop)
+
+    def control_units(self):
+        """
+        Podsystem sterujący jednostkami bojowymi: tworzy kontrolery (maszyny stanów lub drzewa zachowań) nowych
+        jednostek, dzieli jednostki na oddziały oraz aktualizuje kontrolery w ramach budżetu czasu planisty.
+        """
         # Jeśli któraś z jednostek niebędących robotnikiem nie posiada swojej maszyny stanów lub drzewa zachowań,
         # należy je utworzyć oraz zapamiętać.
         for unit in self.units:
             if unit.type_id != UnitTypeId.PROBE:
                 if unit.tag not in self.unit_controllers.keys():
+                    controller: UnitAiController
                     if self.unit_ai_type == UnitAiType.HierarchicalStateMachine:
-                        self.unit_controllers[unit.tag] = UnitHfsmController(unit_tag=unit.tag,
-                                                                             bot=self,
-                                                                             unit_attacked=self.is_unit_attacked)
+                        controller = UnitHfsmController(unit_tag=unit.tag,
+                                                        bot=self,
+                                                        unit_attacked=self.is_unit_attacked,
+                                                        perception=self.perception,
+                                                        target_selector=self.target_selector,
+                                                        unit_lookup=self.unit_lookup,
+                                                        ability_model=self.ability_model)
+                    elif self.unit_ai_type == UnitAiType.FlatStateMachine:
+                        controller = UnitFlatHfsmController(unit_tag=unit.tag,
+                                                            bot=self,
+                                                            unit_attacked=self.is_unit_attacked,
+                                                            perception=self.perception,
+                                                            target_selector=self.target_selector,
+                                                            unit_lookup=self.unit_lookup,
+                                                            ability_model=self.ability_model)
+                    elif self.unit_ai_type == UnitAiType.SharedBehaviorTree:
+                        controller = SharedUnitBhtController(unit_tag=unit.tag, shared_tree=self.shared_unit_bht)
                     else:
-                        self.unit_controllers[unit.tag] = UnitBhtController(unit_tag=unit.tag,
-                                                                            bot=self,
-                                                                            unit_attacked=self.is_unit_attacked)
-
-                # Podejmij decyzję dla jednostek w oparciu o ich maszynę stanów.
-                self.unit_controllers[unit.tag].update()
+                        controller = UnitBhtController(unit_tag=unit.tag,
+                                                       bot=self,
+                                                       unit_attacked=self.is_unit_attacked,
+                                                       perception=self.perception,
+                                                       target_selector=self.target_selector,
+                                                       unit_lookup=self.unit_lookup,
+                                                       ability_model=self.ability_model,
+                                                       compiled=self.compiled_behavior_trees)
+                    if self.profiler.enabled:
+                        controller.instrument(self.profiler)
+                    self.unit_controllers[unit.tag] = controller
+
+        # Podziel jednostki bojowe na oddziały na potrzeby percepcji.
+        self.squads.rebuild(self.unit_controllers, self.unit_lookup)
+
+        # Podejmij decyzję dla jednostek w oparciu o ich maszynę stanów w ramach budżetu czasu planisty.
+        self.controller_scheduler.run(self.unit_controllers, is_urgent=self.is_controller_urgent)
 
         # Przykład pokazujący rysowanie schematu drzewa zachowań dla AI armii bota w 1. iteracji rozgrywki
         # if iteration == 0:
-        #     py_trees.display.render_dot_tree(self.army_bht.behavior_tree)
-
-            controllers = list(self.unit_controllers.values())
-            if len(controllers) > 0 and self.unit_ai_type == UnitAiType.BehaviorTree:
-                cast(UnitBhtController, controllers[0]).render_tree()
-
-        # Zarządzanie jednostkami bojowymi oraz armią bota.
-        self.manage_army_units()
+        #     py_trees.display.render_dot_tree(self.create_army_bht().behavior_tree)
 
-        # Rozdysponowanie robotników do optymalnego wybodywania złóż minerałów oraz vespanu.
-        await self.distribute_workers()
+        controllers = list(self.unit_controllers.values())
+        if len(controllers) > 0 and self.unit_ai_type == UnitAiType.BehaviorTree:
+            cast(UnitBhtController, controllers[0]).render_tree()
 
+    def train_workers(self):
+        """
+        Podsystem szkolący robotników, jeśli jest ich mniej niż potrzeba do optymalnego wydobywania surowców.
+        """
         # Jeśli potrzebna jest większa ilość robotników, bot powinien wyszkolić kolejnych robotników.
-        nexuses: UnitSelection = self.structures(UnitTypeId.NEXUS)
+        nexuses: Units = self.production_index.of_type(UnitTypeId.NEXUS)
         needed_workers_count = self.workers_needed()
         if needed_workers_count > 0 and nexuses.exists:
             for i in range(min(nexuses.amount, needed_workers_count)):
                 self.train_if_can(UnitTypeId.PROBE, nexuses[i])
 
+    async def research_upgrades(self):
+        """
+        Podsystem odkrywający ulepszenia.
+        """
         # Bot powinien odkryć ulepszenie pozwalające jednostkom typu Stalker używanie zdolności Blink, jeśli posiada
         # zbudowany budynek Twilight Council oraz ma odpowiednią ilość surowców do odkrycia ulepszenia.
-        tc = self.structures(UnitTypeId.TWILIGHTCOUNCIL).ready.idle
-        if tc.exists and await self.can_cast(tc.first, AbilityId.RESEARCH_BLINK):
+        tc = self.production_index.idle(UnitTypeId.TWILIGHTCOUNCIL)
+        if tc.exists and await self.ability_model.can_cast(tc.first, AbilityId.RESEARCH_BLINK):
             if self.can_afford(AbilityId.RESEARCH_BLINK):
                 tc.first(AbilityId.RESEARCH_BLINK)
+                self.ability_model.note_cast(tc.first, AbilityId.RESEARCH_BLINK)
 
+    async def use_chronoboost(self):
+        """
+        Podsystem używający zdolności Chronoboost nexusów.
+        """
         # Bot powinien użyć zdolności Chronoboost każdego z posiadanych przez siebie głównych budynków (Nexusów),
         # tak aby inne budynki mogły szybciej szkolić jednostki lub odkrywać ulepszenia. Zdolność powinna być użyta
         # na budynkach, które właśnie szkolą jednostkę lub odkrywają ulepszenie oraz pozostały czas wykonywania tej
         # czynności jest większy lub równy 10 sekund.
-        for nexus in nexuses.ready:
-            if await self.can_cast(nexus, AbilityId.EFFECT_CHRONOBOOSTENERGYCOST, only_check_energy_and_cooldown=True):
+        for nexus in self.production_index.ready(UnitTypeId.NEXUS):
+            if await self.ability_model.can_cast(nexus, AbilityId.EFFECT_CHRONOBOOSTENERGYCOST,
+                                                 only_check_energy_and_cooldown=True):
                 for building in self.structures.of_type([UnitTypeId.CYBERNETICSCORE, UnitTypeId.FORGE,
                                                          UnitTypeId.NEXUS, UnitTypeId.TWILIGHTCOUNCIL]).ready:
                     if not building.is_idle and not building.has_buff(BuffId.CHRONOBOOSTENERGYCOST):
-                        time = self.game_data.abilities[building.orders[0].ability.id.value].cost.time
+                        time = self.ability_model.duration(building.orders[0].ability.id)
                         if not time:  # nie udało się uzyskać czasu trwania wykonywnia czynności.
                             continue
                         if (1 - building.orders[0].progress) * time / self.frames_per_second < 10:
                             continue  # nie używaj zdolności Chronoboost, jeśli czynność będzie wykonywana za krótko.
                         nexus(AbilityId.EFFECT_CHRONOBOOSTENERGYCOST, building)
+                        self.ability_model.note_cast(nexus, AbilityId.EFFECT_CHRONOBOOSTENERGYCOST)
                         break
 
+    def build_structures(self):
+        """
+        Podsystem planujący budowę budynków. Jeśli bot zbiera surowce na budowę nexusa w nowej lokacji (lub pylonu
+        i dział fotonowych w jej pobliżu), pozostałe budynki nie są budowane, a jednostki nie są szkolone do czasu
+        kolejnego wywołania podsystemu.
+        """
+        production = self.production_index
+        nexuses: Units = production.of_type(UnitTypeId.NEXUS)
+        self.saving_resources = False
+
         # =========================
         # ===== Budowanie budynków
         # ===== ZADANIE 1
         # Uzupełnij kod, tak aby bot budował nexus w najbliższej lokacji z surowcami. Bot powinien wykonać tę akcję, gdy
         # ma więcej niż 16 robotników oraz tylko 1 nexus. Dodatkowo, powinien zbudować w pobliżu nexusa 1 pylon oraz
         # 2 działa fotonowe.
-        nexuses_amount = nexuses.amount + self.already_pending(UnitTypeId.NEXUS)
+        nexuses_amount = nexuses.amount + production.pending(UnitTypeId.NEXUS)
         if self.workers.amount > 16 and nexuses_amount < 2:
-            expansions: List[Point2] = self.expansion_locations_list
-            if self.start_location in expansions:
-                expansions.remove(self.start_location)
-
-            if len(expansions) > 0:
-                expansions.sort(key=lambda x: nexus.distance_to(x))
-
+            # Najbliższa (według długości ścieżki od lokacji startowej) lokacja, w której nie stoi główny budynek bota
+            # ani znany główny budynek przeciwnika.
+            townhall_types = race_townhalls[self.enemy_race]
+            occupied = [townhall.position for townhall in self.townhalls]
+            occupied.extend(structure.position for structure in self.enemy_structures
+                            if structure.type_id in townhall_types)
+            expansion = self.expansion_table.nearest_free_expansion(self.start_location, occupied)
+
+            if expansion is not None:
                 if self.can_afford(UnitTypeId.NEXUS):
-                    await self.build(UnitTypeId.NEXUS, near=expansions[0])
+                    self.placement.request(UnitTypeId.NEXUS, near=expansion)
                 else:
+                    self.saving_resources = True
                     return
 
         for nexus in nexuses:
             self.client.debug_sphere_out(nexus, 10.)
             if nexus.distance_to(self.start_location) > 5.:
-                pending_pylons_count = self.already_pending(UnitTypeId.PYLON)
-                nearby_pylons = self.structures.of_type(UnitTypeId.PYLON).closer_than(5, nexus)
+                pending_pylons_count = production.pending(UnitTypeId.PYLON)
+                nearby_pylons = production.of_type(UnitTypeId.PYLON).closer_than(5, nexus)
 
                 if nearby_pylons.amount + pending_pylons_count < 1:
                     if self.can_afford(UnitTypeId.PYLON):
-                        await self.build(UnitTypeId.PYLON, near=nexus)
+                        self.placement.request(UnitTypeId.PYLON, near=nexus)
                     else:
+                        self.saving_resources = True
                         return
 
-                pending_cannons_count = self.already_pending(UnitTypeId.PHOTONCANNON)
-                nearby_cannons = self.structures.of_type(UnitTypeId.PHOTONCANNON).closer_than(10, nexus)
+                pending_cannons_count = production.pending(UnitTypeId.PHOTONCANNON)
+                nearby_cannons = production.of_type(UnitTypeId.PHOTONCANNON).closer_than(10, nexus)
                 if nearby_pylons.amount > 0 and nearby_cannons.amount + pending_cannons_count < 2:
                     if self.can_afford(UnitTypeId.PHOTONCANNON):
-                        await self.build(UnitTypeId.PHOTONCANNON, near=nearby_pylons.random)
+                        self.placement.request(UnitTypeId.PHOTONCANNON, near=nearby_pylons.random)
                     else:
+                        self.saving_resources = True
                         return
 
         # Bot powinien zbudować pylon w pobliżu głównego budynku (lub jakiegoś pylonu w jego okolicy), jeśli liczba
         # zużywanego zaopatrzenia zbliża się liczbie dostępnego zaopatrzenia.
-        if random.choice([True, False]) or self.structures(UnitTypeId.PYLON).ready.empty:
+        if random.choice([True, False]) or production.ready_amount(UnitTypeId.PYLON) == 0:
             target = self.townhalls.first
         else:
             target = self.pylon_near_building(self.townhalls.first)
         if (self.supply_left < 6 + self.supply_used / 10 and self.can_afford(UnitTypeId.PYLON) and
-                self.already_pending(UnitTypeId.PYLON) < self.supply_used / 50 and self.supply_cap < 200):
-            await self.build(UnitTypeId.PYLON, target, placement_step=5)
+                production.pending(UnitTypeId.PYLON) < self.supply_used / 50 and self.supply_cap < 200):
+            self.placement.request(UnitTypeId.PYLON, target, placement_step=5)
 
-        if (self.structures(UnitTypeId.CYBERNETICSCORE).ready.exists and
+        if (production.ready_amount(UnitTypeId.CYBERNETICSCORE) > 0 and
                 self.can_afford(UnitTypeId.TWILIGHTCOUNCIL) and self.is_less_than(UnitTypeId.TWILIGHTCOUNCIL, 1)):
-            await self.build(UnitTypeId.TWILIGHTCOUNCIL, self.pylon_near_building(self.townhalls.first), placement_step=2)
+            self.placement.request(UnitTypeId.TWILIGHTCOUNCIL, self.pylon_near_building(self.townhalls.first),
+                                   placement_step=2)
 
-        if (self.structures.of_type([UnitTypeId.GATEWAY, UnitTypeId.WARPGATE]).ready.exists and
+        gates_ready = production.ready_amount(UnitTypeId.GATEWAY) + production.ready_amount(UnitTypeId.WARPGATE) > 0
+        if (gates_ready and
                 self.can_afford(UnitTypeId.CYBERNETICSCORE) and self.is_less_than(UnitTypeId.CYBERNETICSCORE, 1)):
-            await self.build(UnitTypeId.CYBERNETICSCORE, self.pylon_near_building(self.townhalls.first), placement_step=2)
+            self.placement.request(UnitTypeId.CYBERNETICSCORE, self.pylon_near_building(self.townhalls.first),
+                                   placement_step=2)
 
-        if (self.structures.of_type([UnitTypeId.GATEWAY, UnitTypeId.WARPGATE]).ready.exists and
+        if (gates_ready and
                 self.can_afford(UnitTypeId.FORGE) and self.is_less_than(UnitTypeId.FORGE, 1)):
-            await self.build(UnitTypeId.FORGE, self.pylon_near_building(self.townhalls.first), placement_step=2)
+            self.placement.request(UnitTypeId.FORGE, self.pylon_near_building(self.townhalls.first), placement_step=2)
 
-        gates_amount = sum(self.structures(gate).ready.amount + self.already_pending(gate) for gate in
+        gates_amount = sum(production.ready_amount(gate) + production.pending(gate) for gate in
                            [UnitTypeId.GATEWAY, UnitTypeId.WARPGATE])
-        if self.structures(UnitTypeId.PYLON).ready.exists and self.can_afford(UnitTypeId.GATEWAY) and gates_amount < 3:
-            await self.build(UnitTypeId.GATEWAY, self.pylon_near_building(self.townhalls.first), placement_step=2)
+        if production.ready_amount(UnitTypeId.PYLON) > 0 and self.can_afford(UnitTypeId.GATEWAY) and gates_amount < 3:
+            self.placement.request(UnitTypeId.GATEWAY, self.pylon_near_building(self.townhalls.first), placement_step=2)
 
-        if (self.structures(UnitTypeId.CYBERNETICSCORE).ready.exists and self.can_afford(UnitTypeId.ROBOTICSFACILITY) and
+        if (production.ready_amount(UnitTypeId.CYBERNETICSCORE) > 0 and self.can_afford(UnitTypeId.ROBOTICSFACILITY) and
                 self.is_less_than(UnitTypeId.ROBOTICSFACILITY, 1)):
-            await self.build(UnitTypeId.ROBOTICSFACILITY, self.pylon_near_building(self.townhalls.first), placement_step=2)
+            self.placement.request(UnitTypeId.ROBOTICSFACILITY, self.pylon_near_building(self.townhalls.first),
+                                   placement_step=2)
 
-        pylons_count = self.structures(UnitTypeId.PYLON).ready.amount + self.already_pending(UnitTypeId.PYLON)
-        cannons_count = self.structures(UnitTypeId.PHOTONCANNON).ready.amount + self.already_pending(UnitTypeId.PHOTONCANNON)
+        pylons_count = production.ready_amount(UnitTypeId.PYLON) + production.pending(UnitTypeId.PYLON)
+        cannons_count = production.ready_amount(UnitTypeId.PHOTONCANNON) + production.pending(UnitTypeId.PHOTONCANNON)
         if pylons_count > 4 and self.can_afford(UnitTypeId.PHOTONCANNON) and cannons_count / pylons_count < 0.25:
-            await self.build(UnitTypeId.PHOTONCANNON, self.pylon_near_building(self.townhalls.first), placement_step=4)
+            self.placement.request(UnitTypeId.PHOTONCANNON, self.pylon_near_building(self.townhalls.first),
+                                   placement_step=4)
 
         # Bot powinien zbudować budynki do wydobywania vespanu, gdy posiada odpowiednio dużą liczbę robotników.
         if (self.workers.amount >= 14 and self.can_afford(UnitTypeId.ASSIMILATOR) and
-                self.already_pending(UnitTypeId.ASSIMILATOR) == 0):
+                production.pending(UnitTypeId.ASSIMILATOR) == 0):
             for nexus in nexuses:
                 self.build_assimilator(nexus)
 
+    def train_army(self):
+        """
+        Podsystem szkolący jednostki bojowe w proporcjach zależnych od liczby posiadanych jednostek każdego rodzaju.
+        """
+        if self.saving_resources:
+            return
+
+        production = self.production_index
         # =========================
         # ===== Szkolenie jednostek
-        stalkers_amount = self.units(UnitTypeId.STALKER).amount + self.already_pending(UnitTypeId.STALKER)
-        immortals_amount = self.units(UnitTypeId.IMMORTAL).amount + self.already_pending(UnitTypeId.IMMORTAL)
-        zealots_amount = self.units(UnitTypeId.ZEALOT).amount + self.already_pending(UnitTypeId.ZEALOT)
+        stalkers_amount = production.amount(UnitTypeId.STALKER) + production.pending(UnitTypeId.STALKER)
+        immortals_amount = production.amount(UnitTypeId.IMMORTAL) + production.pending(UnitTypeId.IMMORTAL)
+        zealots_amount = production.amount(UnitTypeId.ZEALOT) + production.pending(UnitTypeId.ZEALOT)
 
         # Bot powinien zbudować proporcjonalnie dużą liczbę jednostek typu Immortal do liczby Stalkerów oraz nie
         # próbować budować innych jednostek, jeśli liczba Immortalów jest zbyt mała.
-        robotic_facilities = self.structures(UnitTypeId.ROBOTICSFACILITY).ready.idle
+        robotic_facilities = production.idle(UnitTypeId.ROBOTICSFACILITY)
         if robotic_facilities.exists:
             if immortals_amount / (stalkers_amount + self.eps) < 0.25:
                 self.train_if_can(UnitTypeId.IMMORTAL, robotic_facilities.random)
@@ -482,7 +788,7 @@ class ProtossBot(sc2.BotAI):
 
         # Podobnie jak w przypadku Immortali, należy wyszkolić proporcjonalną liczbę Zelotów. Jeśli proporcje są
         # zachowane, bot powinien szkolić tyle Stalkerów, ile jest to możliwe.
-        gates = self.structures(UnitTypeId.GATEWAY).ready.idle
+        gates = production.idle(UnitTypeId.GATEWAY)
         if gates.exists:
             if zealots_amount / (stalkers_amount + self.eps) < 0.15:
                 self.train_if_can(UnitTypeId.ZEALOT, gates.random)
@@ -0,0 +1,219 @@
+import sc2
+from sc2.unit import Unit
+from sc2.unit_command import UnitCommand
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import json
+import os
+
+
+# Format zapisu obserwacji. Każdy z plików jest ciągiem rekordów o stałym rozmiarze, więc może zostać odczytany (również
+# w trakcie zapisu) za pomocą np.memmap bez wczytywania całego pliku do pamięci.
+RECORDING_VERSION: int = 1
+
+# Stan jednostki lub budynku w jednej klatce gry (jedynie pierwszy rozkaz jednostki).
+UNIT_DTYPE: np.dtype = np.dtype([
+    ("tag", "<u8"), ("type_id", "<u4"), ("alliance", "u1"), ("display_type", "u1"), ("cloak", "u1"),
+    ("is_flying", "u1"), ("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("facing", "<f4"), ("radius", "<f4"),
+    ("build_progress", "<f4"), ("health", "<f4"), ("health_max", "<f4"), ("shield", "<f4"), ("shield_max", "<f4"),
+    ("energy", "<f4"), ("weapon_cooldown", "<f4"), ("order_ability", "<u4"), ("order_target_tag", "<u8"),
+    ("order_target_x", "<f4"), ("order_target_y", "<f4"),
+])
+
+# Klatka gry: numer klatki oraz zakresy rekordów jednostek i tagów jednostek zniszczonych przed tą klatką.
+FRAME_DTYPE: np.dtype = np.dtype([
+    ("game_loop", "<u4"), ("unit_start", "<u8"), ("unit_count", "<u4"), ("dead_start", "<u8"), ("dead_count", "<u4"),
+])
+
+# Parametry rodzaju jednostki, które w grze pochodzą z danych gry (GameData), niedostępnych podczas odtwarzania.
+TYPE_DTYPE: np.dtype = np.dtype([
+    ("type_id", "<u4"), ("sight_range", "<f4"), ("ground_range", "<f4"), ("air_range", "<f4"),
+    ("ground_dps", "<f4"), ("air_dps", "<f4"), ("movement_speed", "<f4"), ("is_structure", "u1"),
+])
+
+# Rozkaz wydany jednostce w klatce gry *game_loop*.
+COMMAND_DTYPE: np.dtype = np.dtype([
+    ("game_loop", "<u4"), ("tag", "<u8"), ("ability", "<u4"), ("target_tag", "<u8"), ("target_x", "<f4"),
+    ("target_y", "<f4"), ("queue", "u1"),
+])
+
+DEAD_DTYPE: np.dtype = np.dtype("<u8")
+
+# Pola rekordu rozkazu, według których sortowane są zapisy rozkazów przed porównaniem.
+COMMAND_FIELDS: List[str] = list(COMMAND_DTYPE.names or ())
+
+
+def command_rows(game_loop: int, actions: Iterable[UnitCommand]) -> np.ndarray:
+    """
+    Zamienia rozkazy wydane w klatce gry *game_loop* na rekordy w formacie *COMMAND_DTYPE*.
+    """
+    rows: List[Tuple] = []
+    for action in actions:
+        target_tag, target_x, target_y = 0, 0., 0.
+        if isinstance(action.target, Unit):
+            target_tag = action.target.tag
+        elif action.target is not None:
+            target_x, target_y = action.target.x, action.target.y
+        rows.append((game_loop, action.unit.tag, action.ability.value, target_tag, target_x, target_y, action.queue))
+    return np.array(rows, dtype=COMMAND_DTYPE)
+
+
+def load_array(path: str, dtype: np.dtype) -> np.ndarray:
+    """
+    Odwzorowuje plik rekordów *path* w pamięci (np.memmap). Pusty lub nieistniejący plik daje pustą tablicę.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(os.path.getsize(path) // dtype.itemsize,))
+
+
+def compare_commands(a: np.ndarray, b: np.ndarray) -> Optional[int]:
+    """
+    Porównuje dwa zapisy rozkazów (kolejność rozkazów w obrębie jednej klatki gry nie ma znaczenia).
+
+    Returns
+    -------
+    out : Optional[int]
+        numer pierwszej klatki gry, w której rozkazy się różnią, lub None, jeśli zapisy są identyczne.
+    """
+    a = np.sort(np.asarray(a), order=COMMAND_FIELDS)
+    b = np.sort(np.asarray(b), order=COMMAND_FIELDS)
+    length = min(len(a), len(b))
+    different = np.flatnonzero(a[:length] != b[:length])
+    if len(different) > 0:
+        return int(min(a[different[0]]["game_loop"], b[different[0]]["game_loop"]))
+    if len(a) != len(b):
+        return int((a if len(a) > len(b) else b)[length]["game_loop"])
+    return None
+
+
+class ObservationRecorder:
+    """
+    Rejestrator obserwacji, na podstawie których bot podejmuje decyzje: w każdym wywołaniu metody *on_step()*
+    zapisywany jest stan jednostek i budynków bota oraz przeciwnika (wraz z pierwszym rozkazem każdej jednostki),
+    tagi jednostek zniszczonych od poprzedniej klatki oraz wydane rozkazy. Dane zapisywane są na bieżąco do plików
+    binarnych w katalogu *directory* (bufory plików opróżniane są po każdym zapisie, więc dane są kompletne także
+    wtedy, gdy metoda *close()* nie zostanie wywołana, np. w grach symulatora *headless*):
+
+    - ``frames.bin``, ``units.bin``, ``dead.bin``, ``types.bin`` – obserwacje (formaty *FRAME_DTYPE*, *UNIT_DTYPE*,
+      *DEAD_DTYPE* oraz *TYPE_DTYPE*),
+    - ``commands.bin`` – rozkazy wydane przez bota (*COMMAND_DTYPE*),
+    - ``meta.json`` – lokacje startowe, lokacje z surowcami oraz rozmiar mapy.
+
+    Zapis można odtworzyć bez gry za pomocą modułu *replay*.
+    """
+    def __init__(self, directory: str):
+        self.directory:     str                         = directory
+        self.files:         Dict[str, BinaryIO]         = {}
+        self.types:         Dict[int, None]             = {}
+        self.dead:          List[int]                   = []
+        self.unit_count:    int                         = 0
+        self.dead_count:    int                         = 0
+        self.frames:        int                         = 0
+
+    def start(self, bot: sc2.BotAI):
+        """
+        Tworzy pliki zapisu oraz zapisuje dane mapy. Metoda powinna być wywołana w metodzie *on_start()* bota.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for name in ("frames", "units", "dead", "types", "commands"):
+            self.files[name] = open(os.path.join(self.directory, name + ".bin"), "wb")
+        meta = {
+            "version": RECORDING_VERSION,
+            "start_location": list(bot.start_location),
+            "enemy_start_locations": [list(location) for location in bot.enemy_start_locations],
+            "expansions": [list(location) for location in bot.expansion_locations_list],
+            "map_size": [bot.game_info.map_size.width, bot.game_info.map_size.height],
+        }
+        with open(os.path.join(self.directory, "meta.json"), "w") as file:
+            json.dump(meta, file)
+
+    def unit_destroyed(self, tag: int):
+        self.dead.append(tag)
+
+    def unit_row(self, unit: Unit) -> Tuple:
+        proto = unit._proto
+        order_ability, target_tag, target_x, target_y = 0, 0, 0., 0.
+        if unit.orders:
+            order = unit.orders[0]
+            order_ability = order.ability.id.value
+            if isinstance(order.target, int):
+                target_tag = order.target
+            elif order.target is not None:
+                target_x, target_y = order.target.x, order.target.y
+        return (unit.tag, unit.type_id.value, proto.alliance, proto.display_type, proto.cloak, proto.is_flying,
+                proto.pos.x, proto.pos.y, proto.pos.z, proto.facing, proto.radius, proto.build_progress,
+                proto.health, proto.health_max, proto.shield, proto.shield_max, proto.energy, proto.weapon_cooldown,
+                order_ability, target_tag, target_x, target_y)
+
+    def type_row(self, unit: Unit) -> Tuple:
+        return (unit.type_id.value, unit.sight_range, unit.ground_range, unit.air_range, unit.ground_dps,
+                unit.air_dps, unit.movement_speed, unit.is_structure)
+
+    def capture(self, bot: sc2.BotAI):
+        """
+        Zapisuje obserwację obecnej klatki gry. Metoda powinna być wywoływana na początku metody *on_step()* bota.
+        """
+        observed = [bot.units, bot.structures, bot.enemy_units, bot.enemy_structures]
+        units = [unit for group in observed for unit in group]
+        new_types = []
+        for unit in units:
+            if unit.type_id.value not in self.types:
+                self.types[unit.type_id.value] = None
+                new_types.append(self.type_row(unit))
+        if new_types:
+            self.files["types"].write(np.array(new_types, dtype=TYPE_DTYPE).tobytes())
+
+        self.files["units"].write(np.array([self.unit_row(unit) for unit in units], dtype=UNIT_DTYPE).tobytes())
+        self.files["dead"].write(np.array(self.dead, dtype=DEAD_DTYPE).tobytes())
+        frame = (bot.state.game_loop, self.unit_count, len(units), self.dead_count, len(self.dead))
+        self.files["frames"].write(np.array([frame], dtype=FRAME_DTYPE).tobytes())
+        self.unit_count += len(units)
+        self.dead_count += len(self.dead)
+        self.dead = []
+        self.frames += 1
+        self.flush("types", "units", "dead", "frames")
+
+    def record_commands(self, game_loop: int, actions: List[UnitCommand]):
+        """
+        Zapisuje rozkazy wydane w klatce gry *game_loop*. Metoda powinna być wywoływana na końcu metody *on_step()*.
+        """
+        self.files["commands"].write(command_rows(game_loop, actions).tobytes())
+        self.flush("commands")
+
+    def flush(self, *names: str):
+        for name in names:
+            self.files[name].flush()
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+
+class Recording:
+    """
+    Zapis obserwacji utworzony przez *ObservationRecorder*, odwzorowany w pamięci. Rekordy jednostek z danej klatki
+    gry są widokiem na fragment pliku, więc otwarcie nawet bardzo długiego zapisu nie wymaga jego wczytania.
+    """
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), "r") as file:
+            self.meta:      dict        = json.load(file)
+        if self.meta.get("version") != RECORDING_VERSION:
+            raise ValueError("Nieobsługiwana wersja zapisu: {}".format(self.meta.get("version")))
+        self.frames:        np.ndarray  = load_array(os.path.join(directory, "frames.bin"), FRAME_DTYPE)
+        self.units:         np.ndarray  = load_array(os.path.join(directory, "units.bin"), UNIT_DTYPE)
+        self.dead:          np.ndarray  = load_array(os.path.join(directory, "dead.bin"), DEAD_DTYPE)
+        self.types:         np.ndarray  = load_array(os.path.join(directory, "types.bin"), TYPE_DTYPE)
+        self.commands:      np.ndarray  = load_array(os.path.join(directory, "commands.bin"), COMMAND_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def frame_units(self, index: int) -> np.ndarray:
+        frame = self.frames[index]
+        return self.units[int(frame["unit_start"]):int(frame["unit_start"]) + int(frame["unit_count"])]
+
+    def frame_dead(self, index: int) -> np.ndarray:
+        frame = self.frames[index]
+        return self.dead[int(frame["dead_start"]):int(frame["dead_start"]) + int(frame["dead_count"])]
@@ -0,0 +1,196 @@
+import sc2
+from sc2.data import Alliance
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+from sc2.unit import UnitOrder
+from sc2.unit_command import UnitCommand
+from s2clientprotocol import raw_pb2
+from headless import HeadlessAbility, HeadlessGame, HeadlessProtossBot, HeadlessUnit, UnitStats, publish_units
+from benchmark import AI_NAMES, AI_TYPES
+from protoss_bot import UnitAiType
+from recording import Recording, command_rows, compare_commands, load_array, COMMAND_DTYPE, UNIT_DTYPE
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import numpy as np
+import random
+
+
+class ReplayUnit(HeadlessUnit):
+    """
+    Jednostka odtworzona z zapisu. Obrażenia na sekundę odczytywane są z zapisanych parametrów rodzaju jednostki.
+    """
+    def __init__(self, proto_data, bot_object: sc2.BotAI, stats: UnitStats, type_id: UnitTypeId,
+                 orders: List[UnitOrder], dps: Tuple[float, float]):
+        super().__init__(proto_data, bot_object, stats, type_id, orders)
+        self.dps: Tuple[float, float] = dps
+
+    @property
+    def ground_dps(self) -> float:
+        return self.dps[0]
+
+    @property
+    def air_dps(self) -> float:
+        return self.dps[1]
+
+
+class ReplayWorld:
+    """
+    Zastępuje symulator *HeadlessWorld* – zamiast symulować rozgrywkę, w każdym kroku przekazuje botowi kolejną
+    zapisaną obserwację. Rozkazy bota nie wpływają na przebieg zapisu; są jedynie zapamiętywane (w formacie
+    *COMMAND_DTYPE*), co pozwala porównać decyzje różnych wersji bota podejmowane na podstawie tych samych obserwacji.
+    """
+    def __init__(self, recording: Recording):
+        meta = recording.meta
+        self.recording:             Recording                   = recording
+        self.map_size:              Tuple[float, float]         = tuple(meta["map_size"])
+        self.start_location:        Point2                      = Point2(meta["start_location"])
+        self.enemy_start_location:  Point2                      = Point2(meta["enemy_start_locations"][0])
+        self.expansions:            List[Point2]                = [Point2(location) for location in meta["expansions"]]
+        self.index:                 int                         = -1
+        self.commands:              List[np.ndarray]            = []
+
+        # Parametry rodzajów jednostek: obiekt UnitStats oraz obrażenia na sekundę (naziemne, powietrzne).
+        self.stats:                 Dict[int, Tuple[UnitStats, Tuple[float, float]]] = {}
+        for row in recording.types:
+            stats = UnitStats(0., 0., 0., float(row["sight_range"]), float(row["ground_range"]),
+                              float(row["air_range"]), float(max(row["ground_dps"], row["air_dps"])),
+                              float(row["movement_speed"]), bool(row["is_structure"]))
+            self.stats[int(row["type_id"])] = (stats, (float(row["ground_dps"]), float(row["air_dps"])))
+
+    def has_next(self) -> bool:
+        return self.index + 1 < len(self.recording)
+
+    def outcome(self) -> Optional[bool]:
+        # Zapis obserwacji nie zawiera wyniku gry.
+        return None
+
+    @property
+    def game_loop(self) -> int:
+        return int(self.recording.frames[self.index]["game_loop"]) if self.index >= 0 else 0
+
+    def advance(self, dt: float) -> List[int]:
+        """
+        Przechodzi do kolejnej zapisanej klatki gry i zwraca tagi jednostek zniszczonych przed tą klatką.
+        """
+        self.index += 1
+        return [int(tag) for tag in self.recording.frame_dead(self.index)]
+
+    def materialize(self, bot: sc2.BotAI, row: np.void) -> ReplayUnit:
+        stats, dps = self.stats[int(row["type_id"])]
+        proto = raw_pb2.Unit(tag=int(row["tag"]), unit_type=int(row["type_id"]), alliance=int(row["alliance"]),
+                             owner=1 if row["alliance"] == Alliance.Self.value else 2,
+                             display_type=int(row["display_type"]), cloak=int(row["cloak"]),
+                             is_flying=bool(row["is_flying"]), facing=float(row["facing"]),
+                             radius=float(row["radius"]), build_progress=float(row["build_progress"]),
+                             health=float(row["health"]), health_max=float(row["health_max"]),
+                             shield=float(row["shield"]), shield_max=float(row["shield_max"]),
+                             energy=float(row["energy"]), weapon_cooldown=float(row["weapon_cooldown"]))
+        proto.pos.x, proto.pos.y, proto.pos.z = float(row["x"]), float(row["y"]), float(row["z"])
+        orders = []
+        if row["order_ability"] != 0:
+            target = (int(row["order_target_tag"]) if row["order_target_tag"] != 0 else
+                      Point2((float(row["order_target_x"]), float(row["order_target_y"]))))
+            orders.append(UnitOrder(HeadlessAbility(AbilityId(int(row["order_ability"]))), target, 0.))
+        type_id = UnitTypeId(int(row["type_id"]))
+        return ReplayUnit(proto, bot, stats, type_id, orders, dps)
+
+    def publish(self, bot: sc2.BotAI):
+        """
+        Ustawia listy jednostek bota na podstawie obecnej klatki zapisu oraz numer klatki gry.
+        """
+        rows = self.recording.frame_units(self.index) if self.index >= 0 else np.zeros(0, dtype=UNIT_DTYPE)
+        publish_units(bot, [self.materialize(bot, row) for row in rows])
+        bot.state.game_loop = self.game_loop
+
+    def apply(self, actions: List[UnitCommand]):
+        self.commands.append(command_rows(self.game_loop, actions))
+
+
+class ReplayResult:
+    """
+    Wyniki odtworzenia zapisu: czasy wywołań metody *on_step()* oraz rozkazy wydane przez bota.
+    """
+    def __init__(self, ai_type: UnitAiType):
+        self.ai_type:       UnitAiType  = ai_type
+        self.step_times:    List[float] = []
+        self.commands:      np.ndarray  = np.zeros(0, dtype=COMMAND_DTYPE)
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.step_times, q)) * 1000 if self.step_times else 0.
+
+
+def run_replay(recording: Recording, ai_type: UnitAiType, seed: int = 0, compiled: bool = True) -> ReplayResult:
+    """
+    Odtwarza zapis *recording*: przekazuje kolejne obserwacje botowi, którego jednostki sterowane są przez AI typu
+    *ai_type*, i zapamiętuje wydane rozkazy.
+
+    Parameters
+    ----------
+    recording : Recording
+        zapis obserwacji.
+    ai_type : UnitAiType
+        typ AI sterującego jednostkami.
+    seed : int
+        ziarno generatora liczb losowych (powinno być takie samo jak podczas nagrywania, jeśli rozkazy mają być
+        porównywane z zapisanymi).
+    compiled : bool
+        determinuje, czy drzewa zachowań wykonywane są w wersji skompilowanej, czy przez bibliotekę py_trees.
+
+    Returns
+    -------
+    out : ReplayResult
+        wyniki odtworzenia.
+    """
+    random.seed(seed)
+    world = ReplayWorld(recording)
+    bot = HeadlessProtossBot(world)
+    bot.unit_ai_type = ai_type
+    bot.compiled_behavior_trees = compiled
+    game = HeadlessGame(bot, world)
+    result = ReplayResult(ai_type)
+
+    async def run():
+        await game.start()
+        while world.has_next():
+            await game.step()
+            await game.act()
+            result.step_times.append(game.step_time)
+
+    asyncio.run(run())
+    if world.commands:
+        result.commands = np.concatenate(world.commands)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtworzenie zapisu obserwacji bez gry i porównanie decyzji bota.")
+    parser.add_argument("recording", help="katalog zapisu utworzonego przez ObservationRecorder")
+    parser.add_argument("--ai", choices=list(AI_TYPES) + ["all"], default="bt", help="typ AI jednostek")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno generatora liczb losowych")
+    parser.add_argument("--interpreted", action="store_true",
+                        help="wykonuj drzewa zachowań metodą tick_once() py_trees zamiast wersji skompilowanej")
+    parser.add_argument("--against", help="plik rozkazów, z którym porównywane są decyzje (domyślnie rozkazy "
+                                          "zapisane podczas nagrywania)")
+    parser.add_argument("--save", help="plik, do którego zapisywane są rozkazy wydane podczas odtworzenia (dla "
+                                       "--ai all – rozkazy ostatniego typu AI)")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    reference = load_array(args.against, COMMAND_DTYPE) if args.against else recording.commands
+    ai_types = list(AI_TYPES.values()) if args.ai == "all" else [AI_TYPES[args.ai]]
+    print("{:<6} {:>6} {:>8} {:>8} {:>8} {:>9} {:>12}".format(
+        "ai", "steps", "p50[ms]", "p99[ms]", "max[ms]", "commands", "first diff"))
+    for ai_type in ai_types:
+        result = run_replay(recording, ai_type, seed=args.seed, compiled=not args.interpreted)
+        difference: Optional[int] = compare_commands(result.commands, reference)
+        print("{:<6} {:>6} {:>8.2f} {:>8.2f} {:>8.2f} {:>9} {:>12}".format(
+            AI_NAMES[ai_type], len(result.step_times), result.percentile(50), result.percentile(99),
+            result.percentile(100), len(result.commands), "-" if difference is None else difference))
+        if args.save:
+            result.commands.tofile(args.save)
+
+
+if __name__ == "__main__":
+    main()
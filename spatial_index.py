@@ -0,0 +1,115 @@
+import sc2
+from sc2.unit import Unit
+from sc2.units import Units
+from sc2.position import Point2
+from typing import Dict, List, Tuple
+import math
+
+
+class EnemySpatialIndex:
+    """
+    Indeks przestrzenny jednostek oraz budynków przeciwnika w postaci jednorodnej siatki. Indeks budowany jest raz na
+    każde wywołanie metody *on_step()* bota, a następnie współdzielony przez węzły drzew zachowań oraz stany maszyn
+    stanów, dzięki czemu zapytania o pobliskich wrogów nie wymagają przeglądania wszystkich jednostek przeciwnika.
+
+    Każda komórka siatki o boku *cell_size* przechowuje listę wrogich jednostek, których środek znajduje się w jej
+    obszarze. Zapytanie o wrogów w danym promieniu sprawdza jedynie komórki nachodzące na okrąg zapytania.
+    """
+    def __init__(self, bot: sc2.BotAI, cell_size: float = 8.):
+        self.bot:           sc2.BotAI                               = bot
+        self.cell_size:     float                                   = cell_size
+        self.cells:         Dict[Tuple[int, int], List[Unit]]       = {}
+        self.enemy_count:   int                                     = 0
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Zwraca współrzędne komórki siatki, w której znajduje się punkt (*x*, *y*).
+
+        Parameters
+        ----------
+        x : float
+            współrzędna x punktu.
+        y : float
+            współrzędna y punktu.
+
+        Returns
+        -------
+        out : Tuple[int, int]
+            współrzędne komórki siatki.
+        """
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def rebuild(self):
+        """
+        Buduje indeks od nowa na podstawie jednostek oraz budynków przeciwnika widocznych w obecnej klatce gry.
+        Metoda powinna być wywoływana raz na początku każdego wywołania metody *on_step()* bota.
+        """
+        self.cells.clear()
+        self.enemy_count = 0
+        for enemies in (self.bot.enemy_units, self.bot.enemy_structures):
+            for enemy in enemies:
+                x, y = enemy.position_tuple
+                self.cells.setdefault(self.cell_of(x, y), []).append(enemy)
+                self.enemy_count += 1
+
+    def query(self, position: Point2, radius: float, units: bool = True, structures: bool = True) -> Units:
+        """
+        Zwraca wszystkie jednostki (lub budynki) przeciwnika, których odległość od punktu *position* jest mniejsza lub
+        równa *radius*. Odległość mierzona jest pomiędzy środkami obiektów, tak jak w metodzie *Unit.distance_to()*.
+
+        Parameters
+        ----------
+        position : Point2
+            środek okręgu zapytania.
+        radius : float
+            promień okręgu zapytania.
+        units : bool
+            czy w wyniku powinny znaleźć się jednostki przeciwnika.
+        structures : bool
+            czy w wyniku powinny znaleźć się budynki przeciwnika.
+
+        Returns
+        -------
+        out : Units
+            grupa wrogich jednostek w podanym promieniu.
+        """
+        result: List[Unit] = []
+        if self.enemy_count == 0:
+            return Units(result, self.bot)
+
+        px, py = position.x, position.y
+        radius_squared = radius * radius
+        min_x, min_y = self.cell_of(px - radius, py - radius)
+        max_x, max_y = self.cell_of(px + radius, py + radius)
+        for cx in range(min_x, max_x + 1):
+            for cy in range(min_y, max_y + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is None:
+                    continue
+                for enemy in cell:
+                    if enemy.is_structure:
+                        if not structures:
+                            continue
+                    elif not units:
+                        continue
+                    ex, ey = enemy.position_tuple
+                    if (ex - px) ** 2 + (ey - py) ** 2 <= radius_squared:
+                        result.append(enemy)
+        return Units(result, self.bot)
+
+    def visible_enemies(self, unit: Unit) -> Units:
+        """
+        Zwraca wrogie jednostki oraz budynki, które znajdują się w zasięgu wzroku jednostki *unit* i mogą zostać
+        zaatakowane (tzn. nie są np. zamaskowane lub zakopane).
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której należy znaleźć widocznych przeciwników.
+
+        Returns
+        -------
+        out : Units
+            grupa widocznych przeciwników.
+        """
+        return self.query(unit.position, unit.sight_range).filter(lambda enemy: enemy.can_be_attacked)
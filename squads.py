@@ -0,0 +1,149 @@
+import sc2
+from sc2.unit import Unit
+from sc2.position import Point2
+from spatial_index import EnemySpatialIndex
+from unit_ai_data import UnitAiController
+from unit_lookup import UnitLookup
+from typing import Dict, Hashable, List, Optional, Tuple
+import math
+
+
+class Squad:
+    """
+    Grupa jednostek bota wykonujących ten sam rozkaz i znajdujących się blisko siebie. Przechowuje środek grupy,
+    jej promień (największą odległość jednostki od środka) oraz – obliczaną leniwie – odległość od środka do
+    najbliższego przeciwnika, którego może zobaczyć którakolwiek z jednostek grupy.
+    """
+    __slots__ = ("key", "tags", "center", "radius", "max_sight", "nearest_enemy", "nearest_enemy_known")
+
+    def __init__(self, key: Hashable):
+        self.key:                   Hashable    = key
+        self.tags:                  List[int]   = []
+        self.center:                Point2      = Point2((0., 0.))
+        self.radius:                float       = 0.
+        self.max_sight:             float       = 0.
+        self.nearest_enemy:         float       = math.inf
+        self.nearest_enemy_known:   bool        = False
+
+
+class SquadPerception:
+    """
+    Grupowanie jednostek bojowych bota w oddziały (*Squad*) na potrzeby percepcji. W każdej klatce gry jednostki są
+    dzielone według rozkazu (typ i cel) oraz komórki siatki o boku *cell_size*. Następnie, dla każdego oddziału raz
+    wyszukiwani są przeciwnicy w promieniu (promień oddziału + największy zasięg wzroku jednostek oddziału) od jego
+    środka – żaden przeciwnik widoczny dla jednostki oddziału nie może znajdować się dalej.
+
+    Na podstawie odległości *e* od środka oddziału do najbliższego takiego przeciwnika, dla jednostki odległej o *d*
+    od środka, o zasięgu wzroku *s*, metoda *sees_enemies()* odpowiada bez przeszukiwania indeksu przestrzennego:
+    - jeśli *e* > *d* + *s*, jednostka nie widzi żadnego przeciwnika,
+    - jeśli *e* + *d* <= *s*, jednostka widzi co najmniej najbliższego przeciwnika.
+    Odpowiedź jest dokładna; jedynie jednostki na skraju oddziału (gdy żaden z warunków nie zachodzi) wymagają
+    osobnego zapytania. Podczas przemieszczania się armii z dala od przeciwników koszt percepcji jest więc
+    proporcjonalny do liczby oddziałów, a nie jednostek.
+    """
+    def __init__(self, bot: sc2.BotAI, enemy_index: EnemySpatialIndex, cell_size: float = 8.):
+        self.bot:           sc2.BotAI                           = bot
+        self.enemy_index:   EnemySpatialIndex                   = enemy_index
+        self.cell_size:     float                               = cell_size
+        self.eps:           float                               = 0.0001
+        self.squads:        List[Squad]                         = []
+        self.members:       Dict[int, Tuple[Squad, float]]      = {}
+
+        # Statystyki: liczba odpowiedzi udzielonych na poziomie oddziału oraz liczba jednostek wymagających
+        # osobnego zapytania.
+        self.decided:       int                                 = 0
+        self.fallbacks:     int                                 = 0
+
+    @staticmethod
+    def order_key(controller: UnitAiController) -> Hashable:
+        """
+        Zwraca klucz rozkazu kontrolera – jednostki o tym samym kluczu mogą należeć do jednego oddziału. Armia tworzy
+        w każdej klatce nowe obiekty rozkazów, dlatego porównywany jest typ rozkazu oraz jego cel, a nie tożsamość.
+        """
+        order = controller.order
+        if order is None:
+            return None
+        target = order.arguments.get("target")
+        return order.order, tuple(target) if target is not None else None
+
+    def rebuild(self, controllers: Dict[int, UnitAiController], unit_lookup: UnitLookup):
+        """
+        Dzieli jednostki sterowane przez kontrolery *controllers* na oddziały. Metoda powinna być wywoływana raz na
+        każde wywołanie metody *on_step()* bota, po przebudowaniu indeksu przestrzennego przeciwników.
+
+        Parameters
+        ----------
+        controllers : Dict[int, UnitAiController]
+            słownik kontrolerów jednostek, których kluczami są tagi jednostek.
+        unit_lookup : UnitLookup
+            słowniki jednostek bota w obecnej klatce gry.
+        """
+        self.members.clear()
+        groups: Dict[Tuple[Hashable, int, int], List[Tuple[int, float, float, float]]] = {}
+        cell_size = self.cell_size
+        for tag, controller in controllers.items():
+            unit = unit_lookup.friendly(tag)
+            if unit is None:
+                continue
+            x, y = unit.position_tuple
+            key = (self.order_key(controller), int(math.floor(x / cell_size)), int(math.floor(y / cell_size)))
+            groups.setdefault(key, []).append((tag, x, y, unit.sight_range))
+
+        self.squads = []
+        for key, members in groups.items():
+            squad = Squad(key)
+            center_x = sum(member[1] for member in members) / len(members)
+            center_y = sum(member[2] for member in members) / len(members)
+            squad.center = Point2((center_x, center_y))
+            for tag, x, y, sight_range in members:
+                distance = math.hypot(x - center_x, y - center_y)
+                squad.tags.append(tag)
+                squad.radius = max(squad.radius, distance)
+                squad.max_sight = max(squad.max_sight, sight_range)
+                self.members[tag] = (squad, distance)
+            self.squads.append(squad)
+
+    def nearest_enemy(self, squad: Squad) -> float:
+        """
+        Zwraca odległość od środka oddziału *squad* do najbliższego przeciwnika, który może zostać zaatakowany i może
+        być widoczny dla którejkolwiek jednostki oddziału (lub nieskończoność, jeśli takiego przeciwnika nie ma).
+        """
+        if not squad.nearest_enemy_known:
+            enemies = self.enemy_index.query(squad.center, squad.radius + squad.max_sight + self.eps)
+            center_x, center_y = squad.center
+            squad.nearest_enemy = min((math.hypot(enemy.position_tuple[0] - center_x,
+                                                  enemy.position_tuple[1] - center_y)
+                                       for enemy in enemies if enemy.can_be_attacked), default=math.inf)
+            squad.nearest_enemy_known = True
+        return squad.nearest_enemy
+
+    def sees_enemies(self, unit: Unit) -> Optional[bool]:
+        """
+        Sprawdza na podstawie danych oddziału, czy w zasięgu wzroku jednostki *unit* są przeciwnicy, którzy mogą
+        zostać zaatakowani.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, dla której wykonywane jest sprawdzenie.
+
+        Returns
+        -------
+        out : Optional[bool]
+            wynik sprawdzenia lub None, jeśli jednostka nie należy do żadnego oddziału lub znajduje się na jego skraju
+            i wymaga osobnego zapytania.
+        """
+        member = self.members.get(unit.tag)
+        if member is None:
+            return None
+        squad, distance = member
+        nearest_enemy = self.nearest_enemy(squad)
+        sight_range = unit.sight_range
+        if nearest_enemy > distance + sight_range + self.eps:
+            self.decided += 1
+            return False
+        if nearest_enemy + distance <= sight_range - self.eps:
+            self.decided += 1
+            return True
+        self.fallbacks += 1
+        return None
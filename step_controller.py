@@ -0,0 +1,105 @@
+from typing import Callable, Optional
+import math
+import time
+
+
+class GameStepController:
+    """
+    Regulator wartości *game_step* (co ile klatek gry wywoływana jest metoda *on_step()* bota), dobieranej na podstawie
+    zmierzonego czasu wykonania kroków oraz intensywności walki.
+
+    - Podczas walki (gdy jednostki bota tracą punkty życia lub w zasięgu wzroku znajduje się co najmniej
+      *combat_enemies* jednostek przeciwnika) krok ma najmniejszą wartość *min_step*, tak aby jednostki reagowały
+      szybko.
+    - Jeśli walka nie toczy się od co najmniej *calm_time* sekund, krok zwiększa się do *max_step* – decyzje
+      ekonomiczne nie wymagają tak częstego podejmowania.
+    - W grze w czasie rzeczywistym (*realtime* równe True) krok, niezależnie od intensywności walki, zwiększany jest,
+      jeśli wygładzony czas wykonania kroku przekracza ułamek *latency_fraction* czasu, który upływa w grze pomiędzy
+      kolejnymi krokami – inaczej bot nie nadążałby za grą. W pozostałych grach gra czeka na bota, więc czas
+      wykonania kroków nie wpływa na krok (a decyzje bota nie zależą od szybkości komputera).
+
+    Ponieważ wartość kroku się zmienia, regulator zapamiętuje także liczbę klatek gry, które faktycznie upłynęły od
+    poprzedniego kroku (*step_frames*), na podstawie której bot oblicza czas pomiędzy kolejnymi wywołaniami
+    *on_step()*.
+    """
+    def __init__(self, min_step: int = 4, max_step: int = 8, frames_per_second: float = 22.4,
+                 latency_fraction: float = 0.8, smoothing: float = 0.2, calm_time: float = 2.,
+                 combat_enemies: int = 1, enabled: bool = True, realtime: bool = False,
+                 clock: Callable[[], float] = time.perf_counter):
+        if not 1 <= min_step <= max_step:
+            raise ValueError("Nieprawidłowe granice kroku: {}, {}".format(min_step, max_step))
+        self.min_step:          int                     = min_step
+        self.max_step:          int                     = max_step
+        self.frames_per_second: float                   = frames_per_second
+        self.latency_fraction:  float                   = latency_fraction
+        self.smoothing:         float                   = smoothing
+        self.calm_time:         float                   = calm_time
+        self.combat_enemies:    int                     = combat_enemies
+        self.enabled:           bool                    = enabled
+        self.realtime:          bool                    = realtime
+        self.clock:             Callable[[], float]     = clock
+
+        self.step:              int                     = min_step
+        self.step_frames:       int                     = min_step
+        self.last_game_loop:    Optional[int]           = None
+        self.last_combat_time:  float                   = -math.inf
+        self.step_start:        float                   = 0.
+
+        # Wygładzony wykładniczo czas wykonania kroku (w sekundach) oraz liczba kroków, w których czas wykonania
+        # przekroczył czas dostępny w trybie rzeczywistym.
+        self.step_latency:      float                   = 0.
+        self.overruns:          int                     = 0
+
+    def begin_step(self, game_loop: int):
+        """
+        Zapamiętuje liczbę klatek gry, które upłynęły od poprzedniego kroku, oraz rozpoczyna pomiar czasu wykonania
+        kroku. Metoda powinna być wywoływana na początku metody *on_step()* bota.
+        """
+        self.step_start = self.clock()
+        if self.last_game_loop is not None and game_loop > self.last_game_loop:
+            self.step_frames = game_loop - self.last_game_loop
+        self.last_game_loop = game_loop
+
+    def required_step(self) -> int:
+        """
+        Zwraca najmniejszy krok, przy którym (wygładzony) czas wykonania kroku mieści się w ułamku *latency_fraction*
+        czasu upływającego w grze pomiędzy krokami.
+        """
+        return math.ceil(self.step_latency * self.frames_per_second / self.latency_fraction)
+
+    def end_step(self, game_time: float, damaged_units: int, visible_enemies: int) -> int:
+        """
+        Aktualizuje regulator na podstawie zakończonego kroku i zwraca wartość *game_step* dla kolejnego kroku. Metoda
+        powinna być wywoływana na końcu metody *on_step()* bota.
+
+        Parameters
+        ----------
+        game_time : float
+            czas gry w sekundach.
+        damaged_units : int
+            liczba jednostek bota, które w tym kroku utraciły punkty życia lub tarczy.
+        visible_enemies : int
+            liczba widocznych jednostek przeciwnika.
+
+        Returns
+        -------
+        out : int
+            wartość *game_step*.
+        """
+        elapsed = self.clock() - self.step_start
+        if self.step_latency == 0.:
+            self.step_latency = elapsed
+        else:
+            self.step_latency += self.smoothing * (elapsed - self.step_latency)
+        if elapsed > self.step * self.latency_fraction / self.frames_per_second:
+            self.overruns += 1
+
+        if not self.enabled:
+            return self.step
+        if damaged_units > 0 or visible_enemies >= self.combat_enemies:
+            self.last_combat_time = game_time
+        step = self.min_step if game_time - self.last_combat_time < self.calm_time else self.max_step
+        if self.realtime:
+            step = max(step, self.required_step())
+        self.step = max(self.min_step, min(self.max_step, step))
+        return self.step
@@ -0,0 +1,139 @@
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+from sc2.units import Units
+from typing import Callable, Dict, Optional, Tuple
+import math
+
+
+class EnemyStrengthLedger:
+    """
+    Rejestr siły zauważonych jednostek przeciwnika, prowadzony przyrostowo według ich tagów. Siła jednostki (domyślnie
+    liczba zadawanych obrażeń na sekundę) obliczana jest, gdy jednostka pojawia się w zasięgu wzroku, oraz gdy zmieni
+    się jej typ (np. czołg oblężniczy w trybie oblężenia, Hellion/Hellbat, Viking w trybie naziemnym).
+    Jednostki widoczne liczą się w pełni, a te, które zniknęły we mgle wojny, są pamiętane wraz z czasem, w którym
+    widziano je po raz ostatni – ich siła maleje wykładniczo z okresem połowicznego zaniku *half_life*. Zniszczone
+    jednostki usuwane są z rejestru metodą *remove()*.
+
+    Ponieważ zanik jest wykładniczy, suma sił niewidocznych jednostek przechowywana jest jako suma wartości
+    przeskalowanych względem czasu *base_time*, co pozwala odpowiedzieć na zapytanie o siłę przeciwnika w czasie O(1).
+    """
+    def __init__(self, half_life: float = 60., strength_of: Callable[[Unit], float] = lambda unit: unit.ground_dps):
+        self.half_life:         float                               = half_life
+        self.decay:             float                               = math.log(2.) / half_life
+        self.strength_of:       Callable[[Unit], float]             = strength_of
+
+        # Siła widocznych jednostek oraz pary (siła, czas ostatniego zauważenia) jednostek niewidocznych.
+        self.visible:           Dict[int, float]                    = {}
+        self.visible_types:     Dict[int, UnitTypeId]               = {}
+        self.unseen:            Dict[int, Tuple[float, float]]      = {}
+        self.visible_strength:  float                               = 0.
+        self.unseen_sum:        float                               = 0.
+        self.base_time:         float                               = 0.
+        self.last_time:         float                               = 0.    # Czas poprzedniej obserwacji.
+
+        # Po przekroczeniu tej wartości wykładnika suma przeliczana jest względem nowego czasu *base_time*.
+        self.max_exponent:      float                               = 20.
+
+        # Jednostki, których zapamiętana siła spadła poniżej tego ułamka, są zapominane przy przeliczaniu sumy.
+        self.min_weight:        float                               = 0.001
+
+    def weight(self, time: float) -> float:
+        return math.exp(self.decay * (time - self.base_time))
+
+    def rebase(self, time: float):
+        """
+        Przelicza sumę sił niewidocznych jednostek względem czasu *time*, zapominając jednostki o znikomej sile.
+        """
+        self.base_time = time
+        self.unseen = {tag: (strength, last_seen) for tag, (strength, last_seen) in self.unseen.items()
+                       if self.weight(last_seen) >= self.min_weight}
+        self.unseen_sum = sum(strength * self.weight(last_seen) for strength, last_seen in self.unseen.values())
+        self.visible_strength = sum(self.visible.values())
+
+    def observe(self, enemies: Units, time: float):
+        """
+        Aktualizuje rejestr na podstawie jednostek przeciwnika widocznych w obecnej klatce gry. Siła obliczana jest
+        jedynie dla jednostek, które właśnie pojawiły się w zasięgu wzroku lub których typ zmienił się od poprzedniej
+        obserwacji.
+
+        Parameters
+        ----------
+        enemies : Units
+            widoczne jednostki przeciwnika.
+        time : float
+            obecny czas gry w sekundach.
+        """
+        current = {enemy.tag: enemy for enemy in enemies}
+        visible = self.visible
+        last_time = self.last_time
+        for tag in visible.keys() - current.keys():
+            # Jednostka była widoczna po raz ostatni podczas poprzedniej obserwacji.
+            strength = visible.pop(tag)
+            del self.visible_types[tag]
+            self.visible_strength -= strength
+            self.unseen[tag] = (strength, last_time)
+            self.unseen_sum += strength * self.weight(last_time)
+        visible_types = self.visible_types
+        for tag, enemy in current.items():
+            type_id = enemy.type_id
+            known_type = visible_types.get(tag)
+            if known_type == type_id:
+                continue
+            if known_type is None:
+                self.forget_unseen(tag)
+            else:
+                self.visible_strength -= visible[tag]
+            strength = self.strength_of(enemy)
+            visible[tag] = strength
+            visible_types[tag] = type_id
+            self.visible_strength += strength
+        self.last_time = time
+        if self.decay * (time - self.base_time) > self.max_exponent:
+            self.rebase(time)
+
+    def forget_unseen(self, tag: int):
+        entry = self.unseen.pop(tag, None)
+        if entry is not None:
+            strength, last_seen = entry
+            self.unseen_sum -= strength * self.weight(last_seen)
+
+    def remove(self, tag: int):
+        """
+        Usuwa z rejestru jednostkę o tagu *tag* (np. po jej zniszczeniu).
+
+        Parameters
+        ----------
+        tag : int
+            tag jednostki.
+        """
+        strength = self.visible.pop(tag, None)
+        if strength is not None:
+            del self.visible_types[tag]
+            self.visible_strength -= strength
+        self.forget_unseen(tag)
+
+    def last_seen(self, tag: int) -> Optional[float]:
+        """
+        Zwraca czas, w którym jednostkę o tagu *tag* widziano po raz ostatni, lub None, jeśli jest obecnie widoczna
+        albo nie ma jej w rejestrze.
+        """
+        entry = self.unseen.get(tag)
+        return entry[1] if entry is not None else None
+
+    def strength(self, time: float) -> float:
+        """
+        Zwraca szacowaną siłę przeciwnika w czasie *time*: sumę sił widocznych jednostek oraz zanikających sił
+        jednostek niewidocznych.
+
+        Parameters
+        ----------
+        time : float
+            obecny czas gry w sekundach.
+
+        Returns
+        -------
+        out : float
+            szacowana siła przeciwnika.
+        """
+        unseen_strength = self.unseen_sum * math.exp(-self.decay * (time - self.base_time)) if self.unseen else 0.
+        return max(0., self.visible_strength + unseen_strength)
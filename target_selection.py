@@ -0,0 +1,194 @@
+import sc2
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.unit import Unit
+from typing import Dict, List, Optional
+import numpy as np
+
+
+def select_best_targets(friendly_positions:     np.ndarray,
+                        friendly_sight:         np.ndarray,
+                        friendly_radius:        np.ndarray,
+                        friendly_ground_range:  np.ndarray,
+                        friendly_air_range:     np.ndarray,
+                        enemy_positions:        np.ndarray,
+                        enemy_radius:           np.ndarray,
+                        enemy_health:           np.ndarray,
+                        enemy_shield:           np.ndarray,
+                        enemy_health_max:       np.ndarray,
+                        enemy_shield_max:       np.ndarray,
+                        enemy_ground_target:    np.ndarray,
+                        enemy_air_target:       np.ndarray,
+                        enemy_threat:           np.ndarray,
+                        enemy_structure:        np.ndarray,
+                        bonus_sight_ratio:      float = 0.15,
+                        eps:                    float = 0.0001) -> np.ndarray:
+    """
+    Wybiera najlepszy cel ataku dla każdej jednostki bota w jednym zwektoryzowanym przebiegu. Reguły wyboru są takie
+    same, jak w węźle *AttackBestTarget*:
+
+    - spośród zagrożeń (*enemy_threat*) w zasięgu wzroku jednostki wybierane jest to, które ma najmniejszy stosunek
+      sumy punktów życia i tarczy do ich maksymalnej wartości, przy czym jeśli któreś z zagrożeń jest w zasięgu ataku
+      jednostki (powiększonym o *bonus_sight_ratio* zasięgu wzroku), wybór ograniczony jest tylko do nich,
+    - przy równym stosunku punktów życia wybierany jest przeciwnik bliższy jednostce,
+    - jeśli jednostka nie widzi żadnego zagrożenia, wybierany jest najbliższy widoczny budynek przeciwnika.
+
+    Dla *n* jednostek bota oraz *m* jednostek przeciwnika wszystkie tablice jednostek bota mają rozmiar (n,)
+    (pozycje (n, 2)), a tablice przeciwnika rozmiar (m,) (pozycje (m, 2)). Zasięg ataku równy 0 oznacza, że jednostka
+    nie może atakować danego rodzaju celów.
+
+    Parameters
+    ----------
+    friendly_positions : np.ndarray
+        pozycje jednostek bota.
+    friendly_sight : np.ndarray
+        zasięgi wzroku jednostek bota.
+    friendly_radius : np.ndarray
+        promienie jednostek bota.
+    friendly_ground_range : np.ndarray
+        zasięgi ataku na cele naziemne.
+    friendly_air_range : np.ndarray
+        zasięgi ataku na cele powietrzne.
+    enemy_positions : np.ndarray
+        pozycje jednostek przeciwnika.
+    enemy_radius : np.ndarray
+        promienie jednostek przeciwnika.
+    enemy_health : np.ndarray
+        punkty życia jednostek przeciwnika.
+    enemy_shield : np.ndarray
+        punkty tarczy jednostek przeciwnika.
+    enemy_health_max : np.ndarray
+        maksymalne punkty życia jednostek przeciwnika.
+    enemy_shield_max : np.ndarray
+        maksymalne punkty tarczy jednostek przeciwnika.
+    enemy_ground_target : np.ndarray
+        maska jednostek przeciwnika, które można atakować bronią naziemną.
+    enemy_air_target : np.ndarray
+        maska jednostek przeciwnika, które można atakować bronią przeciwlotniczą.
+    enemy_threat : np.ndarray
+        maska jednostek przeciwnika, które są brane pod uwagę jako zagrożenie.
+    enemy_structure : np.ndarray
+        maska budynków przeciwnika.
+    bonus_sight_ratio : float
+        część zasięgu wzroku dodawana do zasięgu ataku jednostki.
+    eps : float
+        mała wartość zabezpieczająca przed dzieleniem przez 0.
+
+    Returns
+    -------
+    out : np.ndarray
+        tablica rozmiaru (n,) z indeksami wybranych celów lub -1, jeśli jednostka nie ma celu.
+    """
+    n, m = len(friendly_positions), len(enemy_positions)
+    if n == 0 or m == 0:
+        return np.full(n, -1, dtype=np.int64)
+
+    # Macierz kwadratów odległości (n, m) pomiędzy środkami jednostek bota oraz przeciwnika.
+    delta = friendly_positions[:, None, :] - enemy_positions[None, :, :]
+    distance_squared = np.einsum("ijk,ijk->ij", delta, delta)
+
+    visible = distance_squared <= (friendly_sight ** 2)[:, None]
+    candidates = visible & enemy_threat[None, :]
+
+    # Zasięg ataku zależy od tego, czy cel jest naziemny, czy powietrzny (tak jak w metodzie Unit.target_in_range()).
+    can_hit_ground = (friendly_ground_range > 0)[:, None] & enemy_ground_target[None, :]
+    can_hit_air = ~can_hit_ground & (friendly_air_range > 0)[:, None] & enemy_air_target[None, :]
+    attack_range = np.where(can_hit_ground, friendly_ground_range[:, None],
+                            np.where(can_hit_air, friendly_air_range[:, None], 0.))
+    reach = friendly_radius[:, None] + enemy_radius[None, :] + attack_range + \
+        (friendly_sight * bonus_sight_ratio)[:, None]
+    in_range = candidates & (can_hit_ground | can_hit_air) & (distance_squared <= reach ** 2)
+
+    has_in_range = in_range.any(axis=1)
+    chosen = np.where(has_in_range[:, None], in_range, candidates)
+
+    ratio = (enemy_health + enemy_shield) / (enemy_health_max + enemy_shield_max + eps)
+    masked_ratio = np.where(chosen, ratio[None, :], np.inf)
+    best_ratio = masked_ratio.min(axis=1)
+    ties = chosen & (masked_ratio == best_ratio[:, None])
+    best = np.argmin(np.where(ties, distance_squared, np.inf), axis=1)
+
+    # Jeśli jednostka nie widzi żadnego zagrożenia, zaatakuj najbliższy widoczny budynek.
+    visible_structures = visible & enemy_structure[None, :]
+    closest_structure = np.argmin(np.where(visible_structures, distance_squared, np.inf), axis=1)
+    has_candidate = chosen.any(axis=1)
+    return np.where(has_candidate, best,
+                    np.where(visible_structures.any(axis=1), closest_structure, -1)).astype(np.int64)
+
+
+class BatchTargetSelector:
+    """
+    Klasa wybierająca cele ataku dla wszystkich jednostek bojowych bota jednocześnie. Przy pierwszym zapytaniu w danej
+    klatce gry dane jednostek bota oraz przeciwnika są kopiowane do tablic NumPy, a następnie funkcja
+    *select_best_targets()* wyznacza cel dla każdej jednostki w jednym zwektoryzowanym przebiegu. Węzły
+    *AttackBestTarget* odczytują jedynie przydzielony cel.
+    """
+    def __init__(self, bot: sc2.BotAI):
+        self.bot:       sc2.BotAI                   = bot
+        self.frame:     int                         = -1
+        self.targets:   Dict[int, Optional[Unit]]   = {}
+
+    def assign_targets(self):
+        """
+        Wyznacza cele ataku dla wszystkich jednostek bota niebędących robotnikami na podstawie obecnego stanu gry.
+        """
+        self.targets.clear()
+        friendly: List[Unit] = [unit for unit in self.bot.units if unit.type_id != UnitTypeId.PROBE]
+        enemies: List[Unit] = list(self.bot.enemy_units) + list(self.bot.enemy_structures)
+        if not friendly:
+            return
+        if not enemies:
+            self.targets = {unit.tag: None for unit in friendly}
+            return
+
+        friendly_positions = np.array([unit.position_tuple for unit in friendly], dtype=np.float64)
+        friendly_sight = np.array([unit.sight_range for unit in friendly], dtype=np.float64)
+        friendly_radius = np.array([unit.radius for unit in friendly], dtype=np.float64)
+        friendly_ground_range = np.array([unit.ground_range if unit.can_attack_ground else 0. for unit in friendly],
+                                         dtype=np.float64)
+        friendly_air_range = np.array([unit.air_range if unit.can_attack_air else 0. for unit in friendly],
+                                      dtype=np.float64)
+
+        enemy_positions = np.array([enemy.position_tuple for enemy in enemies], dtype=np.float64)
+        enemy_radius = np.array([enemy.radius for enemy in enemies], dtype=np.float64)
+        enemy_health = np.array([enemy.health for enemy in enemies], dtype=np.float64)
+        enemy_shield = np.array([enemy.shield for enemy in enemies], dtype=np.float64)
+        enemy_health_max = np.array([enemy.health_max for enemy in enemies], dtype=np.float64)
+        enemy_shield_max = np.array([enemy.shield_max for enemy in enemies], dtype=np.float64)
+        enemy_flying = np.array([enemy.is_flying for enemy in enemies], dtype=bool)
+        enemy_colossus = np.array([enemy.type_id == UnitTypeId.COLOSSUS for enemy in enemies], dtype=bool)
+        enemy_structure = np.array([enemy.is_structure for enemy in enemies], dtype=bool)
+        enemy_threat = np.array([enemy.can_attack if enemy.is_structure else enemy.can_be_attacked
+                                 for enemy in enemies], dtype=bool)
+
+        best = select_best_targets(friendly_positions, friendly_sight, friendly_radius,
+                                   friendly_ground_range, friendly_air_range,
+                                   enemy_positions, enemy_radius, enemy_health, enemy_shield,
+                                   enemy_health_max, enemy_shield_max,
+                                   ~enemy_flying, enemy_flying | enemy_colossus,
+                                   enemy_threat, enemy_structure)
+        for unit, index in zip(friendly, best):
+            self.targets[unit.tag] = enemies[index] if index >= 0 else None
+
+    def target_for(self, unit: Unit) -> Optional[Unit]:
+        """
+        Zwraca cel ataku przydzielony jednostce *unit* w obecnej klatce gry. Jeśli w tej klatce cele nie zostały
+        jeszcze przydzielone, są one najpierw wyznaczane dla wszystkich jednostek bota.
+
+        Parameters
+        ----------
+        unit : Unit
+            jednostka, której cel należy zwrócić.
+
+        Returns
+        -------
+        out : Optional[Unit]
+            cel ataku lub None, jeśli jednostka nie ma kogo atakować.
+        """
+        frame = self.bot.state.game_loop
+        if frame != self.frame:
+            self.frame = frame
+            self.assign_targets()
+        if unit.tag not in self.targets:
+            # Jednostka nie była brana pod uwagę przy przydziale celów (np. powstała w trakcie tej klatki gry).
+            return None
+        return self.targets[unit.tag]
@@ -2,6 +2,12 @@ from enum import Enum
 from typing import Any, Dict, Optional, Callable
 from abc import abstractmethod, abstractproperty
 import sc2
+from sc2.unit import Unit
+from perception import PerceptionCache
+from target_selection import BatchTargetSelector
+from unit_lookup import UnitLookup
+from ability_model import AbilityModel
+from profiling import NodeProfiler
 
 
 class UnitAiOrderType(Enum):
@@ -55,16 +61,35 @@ class UnitAiData:
                  bot: sc2.BotAI,
                  unit_tag: int,
                  unit_ai_order: Optional[UnitAiOrder],
-                 unit_attacked: Callable[[int], bool]):
+                 unit_attacked: Callable[[int], bool],
+                 perception: PerceptionCache,
+                 target_selector: BatchTargetSelector,
+                 unit_lookup: UnitLookup,
+                 ability_model: AbilityModel):
         self.bot:               sc2.BotAI               = bot
         self.unit_tag:          int                     = unit_tag
         self.unit_ai_order:     Optional[UnitAiOrder]   = unit_ai_order
         self.unit_attacked:     Callable[[int], bool]   = unit_attacked
+        self.perception:        PerceptionCache         = perception
+        self.target_selector:   BatchTargetSelector     = target_selector
+        self.unit_lookup:       UnitLookup              = unit_lookup
+        self.ability_model:     AbilityModel            = ability_model
         self.defend_range:      float                   = 15.
         self.low_health:        float                   = 0.45
         self.timeout_duration:  float                   = 5.
         self.eps:               float                   = 0.0001
 
+    def unit(self) -> Optional[Unit]:
+        """
+        Zwraca jednostkę sterowaną przez kontroler, do którego należą te dane, lub None, jeśli jednostka nie istnieje.
+
+        Returns
+        -------
+        out : Optional[Unit]
+            sterowana jednostka lub None.
+        """
+        return self.unit_lookup.friendly(self.unit_tag)
+
 
 class UnitAiController:
     """
@@ -75,6 +100,15 @@ class UnitAiController:
     def update(self):
         raise NotImplementedError("update() abstract method not implemented in UnitAiController subclass.")
 
+    @property
+    @abstractmethod
+    def in_combat(self) -> bool:
+        raise NotImplementedError("in_combat() abstract property not implemented in UnitAiController subclass.")
+
+    @abstractmethod
+    def instrument(self, profiler: NodeProfiler):
+        raise NotImplementedError("instrument() abstract method not implemented in UnitAiController subclass.")
+
     @property
     @abstractmethod
     def order(self) -> Optional[UnitAiOrder]:
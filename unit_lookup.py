@@ -0,0 +1,76 @@
+import sc2
+from sc2.unit import Unit
+from sc2.units import Units
+from typing import Dict, Iterable, Optional
+
+
+class UnitLookup:
+    """
+    Indeks pozwalający w czasie O(1) odnaleźć jednostkę (lub budynek) bota albo przeciwnika na podstawie jej tagu.
+    Metody *Units.find_by_tag()* oraz *Units.tags_in()* przeglądają wszystkie jednostki, dlatego słowniki tagów
+    budowane są raz na każde wywołanie metody *on_step()* bota i współdzielone przez wszystkie kontrolery jednostek
+    oraz drzewo zachowań armii.
+    """
+    def __init__(self, bot: sc2.BotAI):
+        self.bot:               sc2.BotAI       = bot
+        self.friendly_units:    Dict[int, Unit] = {}
+        self.enemy_units:       Dict[int, Unit] = {}
+
+    def rebuild(self):
+        """
+        Buduje słowniki tagów od nowa na podstawie obecnego stanu gry. Metoda powinna być wywoływana raz na początku
+        każdego wywołania metody *on_step()* bota.
+        """
+        self.friendly_units = {unit.tag: unit for unit in self.bot.units}
+        self.friendly_units.update((structure.tag, structure) for structure in self.bot.structures)
+        self.enemy_units = {unit.tag: unit for unit in self.bot.enemy_units}
+        self.enemy_units.update((structure.tag, structure) for structure in self.bot.enemy_structures)
+
+    def friendly(self, tag: int) -> Optional[Unit]:
+        """
+        Zwraca jednostkę lub budynek bota o tagu *tag* albo None, jeśli taki obiekt nie istnieje.
+
+        Parameters
+        ----------
+        tag : int
+            tag szukanej jednostki.
+
+        Returns
+        -------
+        out : Optional[Unit]
+            odnaleziona jednostka lub None.
+        """
+        return self.friendly_units.get(tag)
+
+    def enemy(self, tag: int) -> Optional[Unit]:
+        """
+        Zwraca widoczną jednostkę lub budynek przeciwnika o tagu *tag* albo None, jeśli taki obiekt nie istnieje.
+
+        Parameters
+        ----------
+        tag : int
+            tag szukanej jednostki.
+
+        Returns
+        -------
+        out : Optional[Unit]
+            odnaleziona jednostka lub None.
+        """
+        return self.enemy_units.get(tag)
+
+    def friendly_group(self, tags: Iterable[int]) -> Units:
+        """
+        Zwraca grupę jednostek bota o podanych tagach. Tagi, dla których nie istnieje jednostka, są pomijane.
+
+        Parameters
+        ----------
+        tags : Iterable[int]
+            tagi jednostek, które powinny znaleźć się w grupie.
+
+        Returns
+        -------
+        out : Units
+            grupa odnalezionych jednostek.
+        """
+        units = self.friendly_units
+        return Units([units[tag] for tag in tags if tag in units], self.bot)